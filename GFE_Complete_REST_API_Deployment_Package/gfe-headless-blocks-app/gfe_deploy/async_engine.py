@@ -0,0 +1,428 @@
+"""
+Good Faith Exteriors - Async deployment engine
+Drives the deployment steps on one asyncio event loop over a shared aiohttp or
+httpx connection pool, so hundreds of requests can be in flight without a
+thread each. Either library is optional; only the async engine needs one.
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from gfe_deploy.bulk_insert import BULK_INSERT_ENDPOINT, BulkInserter, chunked
+from gfe_deploy.health_check import (
+    DEFAULT_PROBE_REPEATS,
+    DEFAULT_PROBE_TIMEOUT,
+    DEFAULT_PROBE_WORKERS,
+    READ_CHUNK_SIZE,
+    probe_targets,
+    summarize_probes
+)
+from gfe_deploy.http_session import DEFAULT_MAX_RETRIES, DEFAULT_POOL_SIZE
+from gfe_deploy.rate_limit import (
+    DEFAULT_MAX_RATE,
+    DEFAULT_RATE,
+    RETRY_STATUSES,
+    HostRateLimiters,
+    backoff_delay,
+    parse_retry_after
+)
+from gfe_deploy.scheduler import PhaseScheduler
+from gfe_deploy.tracing import SPAN_KIND_INTERNAL, http_span, record_http_response, span
+
+ASYNC_BACKENDS = ("aiohttp", "httpx")
+# Bad or revoked credentials: every later call would fail the same way
+FATAL_STATUSES = (401, 403)
+
+class FatalApiError(RuntimeError):
+    """An API answer that makes the rest of the deployment pointless"""
+
+def available_backends():
+    """Installed async HTTP libraries, in order of preference"""
+    installed = {"aiohttp": aiohttp, "httpx": httpx}
+    return [name for name in ASYNC_BACKENDS if installed[name] is not None]
+
+def pick_backend(backend=None):
+    """The requested backend, or the first installed one; raises if it is unavailable"""
+    installed = available_backends()
+    if backend is None and installed:
+        return installed[0]
+    if backend in installed:
+        return backend
+    wanted = backend or " or ".join(ASYNC_BACKENDS)
+    raise RuntimeError(f"The async engine needs {wanted}: pip install {backend or 'aiohttp'}")
+
+async def gather_or_cancel(coroutines):
+    """Run coroutines concurrently; the first exception cancels the rest and is re-raised"""
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    if not tasks:
+        return []
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+        return [task.result() for task in tasks]
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def run_steps_async(steps, perform):
+    """run_steps on the event loop: perform is a coroutine function and yielded
+    lists of step generators run concurrently"""
+    result = None
+    while True:
+        try:
+            effect = steps.send(result)
+        except StopIteration as done:
+            return done.value
+        if isinstance(effect, list):
+            result = await gather_or_cancel([run_steps_async(child, perform) for child in effect])
+        else:
+            result = await perform(effect)
+
+class AsyncResponse:
+    """The parts of requests.Response the deployers read, from a fully read async response"""
+
+    def __init__(self, method, url, status_code, headers, content):
+        self.request = SimpleNamespace(method=method)
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        """Decoded JSON body; raises ValueError like requests does"""
+        return json.loads(self.content)
+
+class AsyncSession:
+    """PooledSession for asyncio: one keep-alive pool, per-host adaptive pacing and retries"""
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+                 rate=DEFAULT_RATE, max_rate=DEFAULT_MAX_RATE, backend=None, log=None, limiters=None):
+        self.backend = pick_backend(backend)
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.rate = rate
+        self.max_rate = max_rate
+        self.log = log or (lambda message, level="INFO": None)
+        self.client = None
+        self.limiters = limiters or HostRateLimiters(rate=rate, max_rate=max_rate)
+        self.retries = 0
+        self.requests_sent = 0
+        self.connections_opened = 0
+        self.streams = set()
+        if self.backend == "aiohttp":
+            self.transport_errors = (aiohttp.ClientError, asyncio.TimeoutError)
+            self.connect_errors = (aiohttp.ClientConnectorError,)
+        else:
+            self.transport_errors = (httpx.HTTPError,)
+            self.connect_errors = (httpx.ConnectError, httpx.ConnectTimeout)
+
+    def open(self):
+        """The backend client, created on first use so it binds to the running loop"""
+        if self.client is None:
+            if self.backend == "aiohttp":
+                trace = aiohttp.TraceConfig()
+                trace.on_connection_create_end.append(self.connection_created)
+                self.client = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size),
+                    trace_configs=[trace]
+                )
+            else:
+                limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+                self.client = httpx.AsyncClient(limits=limits, follow_redirects=True)
+        return self.client
+
+    async def connection_created(self, session, context, params):
+        self.connections_opened += 1
+
+    def limiter_for(self, url):
+        """Rate limiter shared by every call to the URL's host"""
+        return self.limiters.for_url(url)
+
+    async def send(self, method, url, headers=None, params=None, json=None, data=None, timeout=30):
+        """One exchange with the body read, retrying only failed connection attempts
+
+        data is a streamed upload body (media_upload.FileBody), iterated asynchronously.
+        """
+        client = self.open()
+        attempt = 0
+        while True:
+            try:
+                self.requests_sent += 1
+                if self.backend == "aiohttp":
+                    async with client.request(method, url, headers=headers, params=params, json=json, data=data,
+                                              timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        content = await response.read()
+                        return AsyncResponse(method, str(response.url), response.status, response.headers, content)
+                # httpx would treat a sync-iterable body as a blocking stream; hand it a fresh async iterator
+                response = await client.request(method, url, headers=headers, params=params, json=json,
+                                                content=data.__aiter__() if data is not None else None,
+                                                timeout=timeout)
+                self.streams.add(response.extensions.get("network_stream"))
+                return AsyncResponse(method, str(response.url), response.status_code, response.headers,
+                                     response.content)
+            except self.connect_errors:
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+
+    async def request(self, method, url, **kwargs):
+        """Send a paced request, retrying 429/502/503/504 with Retry-After or jittered backoff"""
+        with http_span(method, url) as span:
+            response, retries = await self.send_with_retries(method, url, **kwargs)
+            if span.recording:
+                body = kwargs.get("json")
+                if kwargs.get("data") is not None:
+                    sent = len(kwargs["data"])
+                else:
+                    sent = len(json.dumps(body).encode("utf-8")) if body is not None else 0
+                record_http_response(span, response.status_code, sent, len(response.content), retries)
+            return response
+
+    async def send_with_retries(self, method, url, **kwargs):
+        """Paced sends until a final answer or the retries run out; returns (response, retries)"""
+        limiter = self.limiter_for(url)
+        attempt = 0
+        while True:
+            wait = limiter.try_acquire()
+            while wait:
+                await asyncio.sleep(wait)
+                wait = limiter.try_acquire()
+            start = time.perf_counter()
+            response = await self.send(method, url, **kwargs)
+            limiter.record(time.perf_counter() - start, response.status_code)
+
+            if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                return response, attempt
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            if response.status_code == 429:
+                limiter.pause(delay)
+            self.log(f"{method} {urlsplit(url).path}: {response.status_code}, retrying in {delay:.2f}s", "WARNING")
+            self.retries += 1
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def timed_get(self, url, timeout=DEFAULT_PROBE_TIMEOUT):
+        """One unpaced GET: status, TTFB (headers received), total time and body bytes"""
+        client = self.open()
+        start = time.perf_counter()
+        size = 0
+        self.requests_sent += 1
+        if self.backend == "aiohttp":
+            async with client.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                ttfb = time.perf_counter() - start
+                async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+                    size += len(chunk)
+                status = response.status
+        else:
+            async with client.stream("GET", url, timeout=timeout) as response:
+                ttfb = time.perf_counter() - start
+                self.streams.add(response.extensions.get("network_stream"))
+                async for chunk in response.aiter_bytes(READ_CHUNK_SIZE):
+                    size += len(chunk)
+                status = response.status_code
+        return {"status": status, "ttfb": ttfb, "total": time.perf_counter() - start, "bytes": size}
+
+    def connection_stats(self):
+        """Connections opened vs. reused, in the same shape as PooledSession's"""
+        opened = self.connections_opened if self.backend == "aiohttp" else len(self.streams - {None})
+        return {
+            "backend": self.backend,
+            "pool_size": self.pool_size,
+            "max_retries": self.max_retries,
+            "requests": self.requests_sent,
+            "connections_opened": opened,
+            "connections_reused": max(0, self.requests_sent - opened)
+        }
+
+    def rate_limit_stats(self):
+        """Per-host limiter state plus the number of status retries issued"""
+        return {
+            "retries": self.retries,
+            "hosts": self.limiters.stats()
+        }
+
+    async def close(self):
+        """Close the pool's connections"""
+        if self.client is not None:
+            if self.backend == "aiohttp":
+                await self.client.close()
+            else:
+                await self.client.aclose()
+            self.client = None
+
+class AsyncBulkInserter(BulkInserter):
+    """BulkInserter whose batches are tasks on the event loop; request is an async make_api_request"""
+
+    async def insert(self, items):
+        """Insert every item; returns counts plus the items that still failed after retries"""
+        slots = asyncio.Semaphore(self.max_workers)
+        in_flight = set()
+        offset = 0
+
+        async def insert_when_free(indexed):
+            async with slots:
+                await self.insert_batch(indexed)
+
+        try:
+            for chunk in chunked(items, self.batch_size):
+                # Keep a bounded number of batches queued so streamed input stays streamed
+                if len(in_flight) >= self.max_workers * 2:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+                indexed = list(enumerate(chunk, start=offset))
+                offset += len(chunk)
+                in_flight.add(asyncio.ensure_future(insert_when_free(indexed)))
+            await gather_or_cancel(in_flight)
+        finally:
+            for task in in_flight:
+                task.cancel()
+        return self.summary(offset)
+
+    async def insert_batch(self, indexed):
+        """Send one batch, then resend only the rejected items until max_attempts"""
+        pending = indexed
+        errors = {}
+        for attempt in range(1, self.max_attempts + 1):
+            if attempt > 1:
+                with self.lock:
+                    self.retried_items += len(pending)
+            response = await self.request("POST", BULK_INSERT_ENDPOINT, self.batch_body(pending))
+            errors = self.batch_errors(pending, response)
+            pending = self.record_attempt(pending, errors)
+            if not pending:
+                return
+        self.record_failures(pending, errors)
+
+class AsyncEndpointProber:
+    """EndpointProber on the event loop, with its own unpaced connection pool"""
+
+    def __init__(self, repeats=DEFAULT_PROBE_REPEATS, max_workers=DEFAULT_PROBE_WORKERS,
+                 timeout=DEFAULT_PROBE_TIMEOUT, backend=None):
+        self.repeats = max(1, repeats)
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.session = AsyncSession(pool_size=self.max_workers, max_retries=0, backend=backend)
+
+    async def probe(self, url):
+        """One GET: status, TTFB, total time and body bytes, or the transport error"""
+        start = time.perf_counter()
+        with http_span("GET", url) as span:
+            try:
+                sample = await self.session.timed_get(url, self.timeout)
+            except self.session.transport_errors as e:
+                span.fail(f"{type(e).__name__}: {e}")
+                return {"status": "error", "error": f"{type(e).__name__}: {e}", "total": time.perf_counter() - start}
+            record_http_response(span, sample["status"], 0, sample["bytes"], 0)
+            return sample
+
+    async def run(self, endpoints):
+        """Probe every page/API endpoint repeats times at once; returns {name: summary}"""
+        targets = probe_targets(endpoints)
+        if not targets:
+            return {}
+
+        slots = asyncio.Semaphore(self.max_workers)
+
+        async def probe_when_free(name, url):
+            async with slots:
+                return name, await self.probe(url)
+
+        probes = await gather_or_cancel([
+            probe_when_free(name, data["url"]) for name, data in targets.items() for _ in range(self.repeats)
+        ])
+        samples = {name: [] for name in targets}
+        for name, sample in probes:
+            samples[name].append(sample)
+        return {name: summarize_probes(targets[name], samples[name]) for name in targets}
+
+    async def close(self):
+        """Release the probe pool's connections"""
+        await self.session.close()
+
+class AsyncPhaseScheduler(PhaseScheduler):
+    """PhaseScheduler on the event loop; phase funcs are coroutine functions
+
+    The first failing phase cancels every phase still running instead of
+    waiting for it, and dependants are skipped as before; a phase returning
+    False only skips its own dependants.
+    """
+
+    async def run(self):
+        """Run every phase; re-raises the first phase failure after cancelling the rest"""
+        pending = dict(self.phases)
+        finished = set()
+        running = {}
+        failure = None
+
+        def start_ready():
+            for name, phase in list(pending.items()):
+                if all(dependency in finished for dependency in phase.depends_on):
+                    del pending[name]
+                    running[asyncio.ensure_future(self.run_phase(phase))] = name
+
+        try:
+            start_ready()
+            while running:
+                completed, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in completed:
+                    name = running.pop(task)
+                    error = None if task.cancelled() else task.exception()
+                    if error is not None:
+                        failure = failure or error
+                    elif not task.cancelled() and task.result() is not False:
+                        finished.add(name)
+                if failure is not None:
+                    break
+                start_ready()
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+        self.record_skipped(pending, finished)
+
+        if failure is not None:
+            raise failure
+        return self.timings
+
+    async def run_phase(self, phase):
+        """Run one phase and record its wall-clock window"""
+        started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        status = "error"
+        with span(phase.name, SPAN_KIND_INTERNAL, **{"gfe.phase": phase.name}) as phase_span:
+            try:
+                result = await phase.func()
+                status = "success" if result is not False else "failed"
+                return result
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            finally:
+                self.record_timing(phase, status, started_at, start, phase_span)
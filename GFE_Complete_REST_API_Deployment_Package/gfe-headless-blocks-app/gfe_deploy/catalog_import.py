@@ -0,0 +1,134 @@
+"""
+Good Faith Exteriors - Streaming catalog importer
+Reads manufacturer product files (CSV or JSONL) row by row, validates them
+against the collection's field list and feeds a bounded bulk-insert queue
+"""
+
+import csv
+import json
+import os
+import time
+
+PROGRESS_INTERVAL_SECONDS = 5
+MAX_REJECTED_SAMPLES = 100
+ARRAY_SEPARATOR = "|"
+
+def read_rows(path):
+    """Yield (line number, row dict) from a .csv or .jsonl/.ndjson file, one row at a time
+
+    Unparseable JSONL lines are yielded as (line number, None) so they can be rejected.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if extension == ".csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        elif extension in (".jsonl", ".ndjson"):
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    yield line_number, None
+        else:
+            raise ValueError(f"Unsupported catalog format: {extension} (expected .csv or .jsonl)")
+
+class RowValidator:
+    """Coerces a raw row to a collection's field types, or explains why it cannot"""
+
+    def __init__(self, fields, required=("name",)):
+        self.fields = {field["key"]: field["type"] for field in fields}
+        self.required = required
+
+    def validate(self, row):
+        """Return (item, None) for a valid row or (None, reason) for a rejected one"""
+        if not isinstance(row, dict):
+            return None, "not a JSON object"
+        item = {}
+        for key, value in row.items():
+            if key not in self.fields or value is None or value == "":
+                continue
+            try:
+                item[key] = self.coerce(self.fields[key], value)
+            except (TypeError, ValueError) as e:
+                return None, f"{key}: {e}"
+        missing = [key for key in self.required if key not in item]
+        if missing:
+            return None, f"missing {', '.join(missing)}"
+        return item, None
+
+    @staticmethod
+    def coerce(field_type, value):
+        """Convert a CSV string (or JSON value) to the Wix field type"""
+        if field_type == "number":
+            if isinstance(value, (int, float)):
+                return value
+            number = float(str(value).replace("$", "").replace(",", "").strip())
+            return int(number) if number.is_integer() else number
+        if field_type == "array":
+            if isinstance(value, list):
+                return value
+            text = str(value).strip()
+            if text.startswith("["):
+                return json.loads(text)
+            return [part.strip() for part in text.split(ARRAY_SEPARATOR) if part.strip()]
+        if field_type == "object":
+            if isinstance(value, dict):
+                return value
+            parsed = json.loads(value)
+            if not isinstance(parsed, dict):
+                raise ValueError("expected a JSON object")
+            return parsed
+        return str(value).strip()
+
+class CatalogImporter:
+    """Streams a product file through a RowValidator into a BulkInserter"""
+
+    def __init__(self, inserter, fields, log=None):
+        self.inserter = inserter
+        self.validator = RowValidator(fields)
+        self.log = log or (lambda message, level="INFO": None)
+        self.rows_read = 0
+        self.rejected = 0
+        self.rejected_samples = []
+
+    def valid_items(self, path):
+        """Validated items from the file, logging throughput as rows stream past"""
+        started = time.monotonic()
+        last_report = started
+        for line_number, row in read_rows(path):
+            self.rows_read += 1
+            item, reason = self.validator.validate(row)
+            if item is None:
+                self.rejected += 1
+                if len(self.rejected_samples) < MAX_REJECTED_SAMPLES:
+                    self.rejected_samples.append({"line": line_number, "reason": reason})
+            else:
+                yield item
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                last_report = now
+                rate = self.rows_read / (now - started)
+                self.log(f"📥 {self.rows_read:,} rows read ({rate:,.0f} rows/s), "
+                         f"{self.inserter.inserted:,} inserted, {self.rejected:,} rejected")
+
+    def run(self, path):
+        """Import the whole file and return the combined validation and insert summary"""
+        self.log(f"📥 Importing {path} into {self.inserter.collection_id}...")
+        started = time.monotonic()
+        result = self.inserter.insert(self.valid_items(path))
+        elapsed = time.monotonic() - started
+        result.update({
+            "source": path,
+            "rows_read": self.rows_read,
+            "rows_rejected": self.rejected,
+            "rejected_samples": self.rejected_samples,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows_read / elapsed, 1) if elapsed else None
+        })
+        self.log(f"📥 Import finished: {result['inserted']:,}/{self.rows_read:,} rows inserted "
+                 f"in {elapsed:.1f}s ({result['rows_per_second'] or 0:,.0f} rows/s)")
+        return result
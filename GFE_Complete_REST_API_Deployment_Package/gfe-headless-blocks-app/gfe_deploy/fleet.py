@@ -0,0 +1,153 @@
+"""
+Good Faith Exteriors - Fleet deployment
+Rolls the same release out to many Wix sites at once: every site gets its own
+deployer (session, manifest scope, error log and log buffer), at most max_sites
+deploy side by side, and one site failing never stops the others. Sites share
+their per-host rate limiters (see run_fleet), so max_sites bounds the sites in
+flight, not the request rate; open connections are bounded by
+max_sites x pool_size.
+"""
+
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+DEFAULT_MAX_SITES = 4
+DEFAULT_FLEET_REPORT = "fleet-deployment-report.json"
+FLEET_ERRORS_PER_SITE = 5
+REQUIRED_SITE_FIELDS = ("name", "meta_site_id")
+
+def load_fleet(path):
+    """Site configs from a fleet file: a JSON list of sites or {"sites": [...]}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    sites = data.get("sites") if isinstance(data, dict) else data
+    if not isinstance(sites, list) or not sites:
+        raise ValueError(f"{path} lists no sites")
+    names = set()
+    for index, site in enumerate(sites):
+        if not isinstance(site, dict):
+            raise ValueError(f"Site #{index + 1} in {path} is not an object")
+        missing = [field for field in REQUIRED_SITE_FIELDS if not site.get(field)]
+        if missing:
+            raise ValueError(f"Site #{index + 1} in {path} is missing {', '.join(missing)}")
+        if site["name"] in names:
+            raise ValueError(f"Site name {site['name']} appears twice in {path}")
+        names.add(site["name"])
+    return sites
+
+def site_slug(name):
+    """File-name-safe form of a site name, for per-site log files"""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", name).strip("-") or "site"
+
+class FleetDeployment:
+    """Deploys a list of sites on a bounded thread pool and merges their results
+
+    make_deployer(site) builds a fresh deployer for one site; it is called on
+    the worker thread, so a site whose config is rejected fails on its own.
+    """
+
+    def __init__(self, sites, make_deployer, max_sites=DEFAULT_MAX_SITES, log=None):
+        self.sites = list(sites)
+        self.make_deployer = make_deployer
+        self.max_sites = max(1, max_sites)
+        self.log = log or (lambda message, level="INFO": None)
+        self.lock = threading.Lock()
+        self.finished = 0
+
+    def deploy_site(self, site):
+        """Deploy one site and summarise it; never raises"""
+        started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        deployer = None
+        report = None
+        error = None
+        try:
+            deployer = self.make_deployer(site)
+            report = deployer.execute_complete_deployment()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        result = self.site_result(site, deployer, report, error)
+        result.update({
+            "start": started_at,
+            "end": datetime.now().isoformat(),
+            "duration_seconds": round(time.perf_counter() - start, 3)
+        })
+        with self.lock:
+            self.finished += 1
+            progress = f"[{self.finished}/{len(self.sites)}]"
+        icon = {"succeeded": "✅", "degraded": "⚠️"}.get(result["status"], "❌")
+        self.log(f"{icon} {progress} {site['name']} {result['status']} in {result['duration_seconds']:.2f}s",
+                 "INFO" if result["status"] == "succeeded" else "WARNING")
+        return result
+
+    def site_result(self, site, deployer, report, error):
+        """Status, phase timings and top errors for one site"""
+        phases = getattr(deployer, "phase_timings", {}) or {}
+        failed_phases = sorted(name for name, timing in phases.items() if timing.get("status") != "success")
+        if report is None:
+            status = "failed"
+        else:
+            status = "degraded" if failed_phases else "succeeded"
+        errors = deployer.errors.to_list() if deployer else []
+        result = {
+            "name": site["name"],
+            "meta_site_id": site["meta_site_id"],
+            "domain": site.get("domain"),
+            "status": status,
+            "phases": phases,
+            "failed_phases": failed_phases,
+            "critical_path": getattr(deployer, "critical_path", {}) or {},
+            "error_count": deployer.errors.total() if deployer else 0,
+            "errors": errors[:FLEET_ERRORS_PER_SITE]
+        }
+        if error:
+            result["error"] = error
+        if report:
+            result.update({
+                "endpoints": len(report.get("endpoints") or {}),
+                "http_requests": (report.get("http_connections") or {}).get("requests"),
+                "data_imports": report.get("data_imports")
+            })
+        return result
+
+    def run(self):
+        """Deploy every site, at most max_sites at a time, and return the merged report"""
+        self.log(f"🚚 Deploying {len(self.sites)} sites, {self.max_sites} at a time...")
+        started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_sites, thread_name_prefix="site") as pool:
+            futures = {pool.submit(self.deploy_site, site): site["name"] for site in self.sites}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        report = self.report(results, started_at, round(time.perf_counter() - start, 3))
+        summary = report["summary"]
+        self.log(f"🚚 Fleet finished in {report['duration_seconds']:.2f}s: {summary['succeeded']} succeeded, "
+                 f"{summary['degraded']} degraded, {summary['failed']} failed "
+                 f"(serial would have taken ~{summary['serial_seconds']:.0f}s)")
+        return report
+
+    def report(self, results, started_at, elapsed):
+        """Merged fleet report: totals, then each site in fleet-file order"""
+        ordered = [results[site["name"]] for site in self.sites]
+        statuses = [result["status"] for result in ordered]
+        slowest = max(ordered, key=lambda result: result["duration_seconds"], default=None)
+        return {
+            "deployment_timestamp": started_at,
+            "duration_seconds": elapsed,
+            "max_sites": self.max_sites,
+            "summary": {
+                "sites": len(ordered),
+                "succeeded": statuses.count("succeeded"),
+                "degraded": statuses.count("degraded"),
+                "failed": statuses.count("failed"),
+                "serial_seconds": round(sum(result["duration_seconds"] for result in ordered), 3),
+                "slowest_site": slowest["name"] if slowest else None,
+                "error_count": sum(result["error_count"] for result in ordered)
+            },
+            "sites": ordered
+        }
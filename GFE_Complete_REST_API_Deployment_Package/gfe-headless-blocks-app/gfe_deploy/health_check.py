@@ -0,0 +1,132 @@
+"""
+Good Faith Exteriors - Post-launch endpoint health checker
+Probes every deployed page and API endpoint concurrently, several times each,
+and reports latency percentiles, time to first byte and response size
+"""
+
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from gfe_deploy.tracing import http_span, in_current_context, record_http_response
+
+DEFAULT_PROBE_REPEATS = 5
+DEFAULT_PROBE_WORKERS = 8
+DEFAULT_PROBE_TIMEOUT = 10
+READ_CHUNK_SIZE = 64 * 1024
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers, or None when it is empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def latency_summary(seconds):
+    """p50/p95/p99, min and max of a list of durations, in milliseconds"""
+    if not seconds:
+        return None
+    summary = {f"p{pct}": round(percentile(seconds, pct) * 1000, 1) for pct in (50, 95, 99)}
+    summary["min"] = round(min(seconds) * 1000, 1)
+    summary["max"] = round(max(seconds) * 1000, 1)
+    return summary
+
+def is_accessible(endpoint_type, status):
+    """Pages must answer 200; API functions only need to avoid server errors"""
+    if endpoint_type == "page":
+        return status == 200
+    return status < 500
+
+def probe_targets(endpoints):
+    """The page and API endpoints worth probing, by name"""
+    return {
+        name: data for name, data in endpoints.items()
+        if data.get("type") in ("page", "api") and data.get("url")
+    }
+
+def summarize_probes(endpoint, samples):
+    """Collapse one endpoint's probes into the report entry"""
+    answered = [sample for sample in samples if sample["status"] != "error"]
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample["status"])] = statuses.get(str(sample["status"]), 0) + 1
+    healthy = [sample for sample in answered if is_accessible(endpoint["type"], sample["status"])]
+    errors = sorted({sample["error"] for sample in samples if "error" in sample})
+    return {
+        "url": endpoint["url"],
+        "type": endpoint["type"],
+        "probes": len(samples),
+        "status": answered[-1]["status"] if answered else "error",
+        "status_counts": statuses,
+        "accessible": len(healthy) == len(samples),
+        "failed_probes": len(samples) - len(healthy),
+        "success_rate": round(len(healthy) / len(samples), 3),
+        "latency_ms": latency_summary([sample["total"] for sample in answered]),
+        "ttfb_ms": latency_summary([sample["ttfb"] for sample in answered]),
+        "bytes": max((sample["bytes"] for sample in answered), default=None),
+        "errors": errors
+    }
+
+class EndpointProber:
+    """Runs repeated GET probes against the deployment's page and API endpoints
+
+    Probes use their own keep-alive session rather than the Wix API session, so
+    they are not paced by the API rate limiter and the timings stay honest.
+    """
+
+    def __init__(self, repeats=DEFAULT_PROBE_REPEATS, max_workers=DEFAULT_PROBE_WORKERS,
+                 timeout=DEFAULT_PROBE_TIMEOUT, session=None):
+        self.repeats = max(1, repeats)
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+    def probe(self, url):
+        """One GET: status, TTFB (headers received), total time and body bytes"""
+        start = time.perf_counter()
+        with http_span("GET", url) as span:
+            try:
+                with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                    ttfb = time.perf_counter() - start
+                    size = sum(len(chunk) for chunk in response.iter_content(READ_CHUNK_SIZE))
+                    record_http_response(span, response.status_code, 0, size, 0)
+                    return {
+                        "status": response.status_code,
+                        "ttfb": ttfb,
+                        "total": time.perf_counter() - start,
+                        "bytes": size
+                    }
+            except requests.RequestException as e:
+                span.fail(f"{type(e).__name__}: {e}")
+                return {"status": "error", "error": f"{type(e).__name__}: {e}", "total": time.perf_counter() - start}
+
+    def run(self, endpoints):
+        """Probe every page/API endpoint repeats times at once; returns {name: summary}"""
+        targets = probe_targets(endpoints)
+        if not targets:
+            return {}
+
+        jobs = [(name, data["url"]) for name, data in targets.items() for _ in range(self.repeats)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [(name, pool.submit(in_current_context(self.probe), url)) for name, url in jobs]
+            probes = [(name, future.result()) for name, future in futures]
+
+        samples = {name: [] for name in targets}
+        for name, sample in probes:
+            samples[name].append(sample)
+        return {name: summarize_probes(targets[name], samples[name]) for name in targets}
+
+    def close(self):
+        """Release the probe session's pooled connections"""
+        self.session.close()
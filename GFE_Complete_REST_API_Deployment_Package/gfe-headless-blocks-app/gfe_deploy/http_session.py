@@ -0,0 +1,135 @@
+"""
+Good Faith Exteriors - Pooled HTTP session for the Wix deployment scripts
+Keeps TCP+TLS connections to www.wixapis.com alive across API calls and paces
+them through an adaptive rate limiter that backs off on 429/5xx
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from gfe_deploy.rate_limit import (
+    DEFAULT_MAX_RATE,
+    DEFAULT_RATE,
+    RETRY_STATUSES,
+    HostRateLimiters,
+    backoff_delay,
+    parse_retry_after
+)
+from gfe_deploy.tracing import http_span, record_http_response
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+
+def body_size(request):
+    """Bytes in a prepared request's body; streamed bodies report their Content-Length"""
+    if isinstance(request.body, (bytes, str)):
+        return len(request.body)
+    return int(request.headers.get("Content-Length") or 0)
+
+class PooledSession(requests.Session):
+    """requests.Session with a sized keep-alive pool, per-host rate limiting and retries
+
+    Pass limiters (a HostRateLimiters) to pace several sessions as one.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+                 rate=DEFAULT_RATE, max_rate=DEFAULT_MAX_RATE, log=None, limiters=None):
+        super().__init__()
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.rate = rate
+        self.max_rate = max_rate
+        self.log = log or (lambda message, level="INFO": None)
+        self.limiters = limiters or HostRateLimiters(rate=rate, max_rate=max_rate)
+        self.retries_lock = threading.Lock()
+        self.retries = 0
+        self.headers["Connection"] = "keep-alive"
+
+        # The adapter only retries connection failures; status retries happen in request()
+        retry = Retry(
+            total=max_retries,
+            read=0,
+            status=0,
+            backoff_factor=0.5,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def limiter_for(self, url):
+        """Rate limiter shared by every call to the URL's host"""
+        return self.limiters.for_url(url)
+
+    def request(self, method, url, *args, **kwargs):
+        """Send a paced request, retrying 429/502/503/504 with Retry-After or jittered backoff"""
+        with http_span(method, url) as span:
+            response, retries = self.send_with_retries(method, url, *args, **kwargs)
+            if span.recording:
+                # A streamed response is left unread for the caller
+                received = response.headers.get("Content-Length") if kwargs.get("stream") else len(response.content)
+                record_http_response(span, response.status_code, body_size(response.request),
+                                     int(received or 0), retries)
+            return response
+
+    def send_with_retries(self, method, url, *args, **kwargs):
+        """Paced sends until a final answer or the retries run out; returns (response, retries)"""
+        limiter = self.limiter_for(url)
+        attempt = 0
+        while True:
+            limiter.acquire()
+            start = time.perf_counter()
+            response = super().request(method, url, *args, **kwargs)
+            limiter.record(time.perf_counter() - start, response.status_code)
+
+            if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                return response, attempt
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            if response.status_code == 429:
+                limiter.pause(delay)
+            self.log(f"{method} {urlsplit(url).path}: {response.status_code}, retrying in {delay:.2f}s", "WARNING")
+            with self.retries_lock:
+                self.retries += 1
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def connection_stats(self):
+        """Count connections opened vs. reused across all host pools"""
+        requests_sent = 0
+        connections_opened = 0
+        for adapter in set(self.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_sent += pool.num_requests
+                connections_opened += pool.num_connections
+        return {
+            "pool_size": self.pool_size,
+            "max_retries": self.max_retries,
+            "requests": requests_sent,
+            "connections_opened": connections_opened,
+            "connections_reused": max(0, requests_sent - connections_opened)
+        }
+
+    def rate_limit_stats(self):
+        """Per-host limiter state plus the number of status retries issued"""
+        with self.retries_lock:
+            retries = self.retries
+        return {
+            "retries": retries,
+            "hosts": self.limiters.stats()
+        }
@@ -0,0 +1,385 @@
+"""
+Good Faith Exteriors - Image asset pipeline
+Fetches every app-config.json image asset once into a content-addressed cache,
+renders responsive WebP/AVIF sizes of it, uploads those through the Media
+Manager and rewrites <img src> in widget and page HTML to srcset variants.
+Pillow is optional; without it the assets are still cached but left as they are.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+from gfe_deploy.http_session import PooledSession
+from gfe_deploy.media_upload import DEFAULT_MEDIA_FOLDER, upload_file_steps
+
+DEFAULT_IMAGE_CACHE = ".image-cache"
+DEFAULT_FETCH_WORKERS = 8
+FETCH_TIMEOUT = 30
+FETCH_CHUNK_SIZE = 64 * 1024
+# Preferred first: AVIF goes in a <picture> <source>, WebP in the <img> srcset
+IMAGE_FORMATS = ("avif", "webp")
+IMAGE_QUALITY = {"avif": 55, "webp": 80}
+IMAGE_MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+# The widgets draw logos, brand logos and window types at 20-80 CSS px; backgrounds span the page
+DEFAULT_IMAGE_WIDTHS = (80, 160, 320, 640)
+DEFAULT_IMAGE_SIZES = "160px"
+CATEGORY_WIDTHS = {"backgrounds": (640, 1024, 1600, 2400)}
+CATEGORY_SIZES = {"backgrounds": "100vw"}
+IMAGE_TAG = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+SRC_ATTRIBUTE = re.compile(r"""\ssrc\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+SRCSET_ATTRIBUTE = re.compile(r"\ssrcset\s*=", re.IGNORECASE)
+WIDTH_ATTRIBUTE = re.compile(r"""\swidth\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+HEIGHT_ATTRIBUTE = re.compile(r"""\sheight\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+
+def image_assets(config):
+    """{url: (category, name)} for the nested image_assets section of app-config.json"""
+    assets = {}
+    for category, images in (config.get("image_assets") or {}).items():
+        for name, url in images.items():
+            assets.setdefault(url, (category, name))
+    return assets
+
+def attribute_value(pattern, tag):
+    """Value of the attribute pattern matches in tag, however it is quoted; None when absent"""
+    match = pattern.search(tag)
+    return None if match is None else next(group for group in match.groups() if group is not None).strip()
+
+def supported_formats(formats=IMAGE_FORMATS):
+    """The requested output formats this Pillow build can encode"""
+    if Image is None:
+        return []
+    supported = []
+    for image_format in formats:
+        try:
+            if features.check(image_format):
+                supported.append(image_format)
+        except ValueError:
+            pass
+    return supported
+
+def url_extension(url):
+    """Lower-case file extension of a URL's path, without the dot"""
+    return os.path.splitext(urlsplit(url).path)[1].lstrip(".").lower() or "bin"
+
+class ImageCache:
+    """Files stored under their sha256, plus a JSON index from URLs and derived variants to hashes"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self.index.setdefault("sources", {})
+        self.index.setdefault("variants", {})
+
+    def path(self, digest, extension):
+        """Where the object with this hash lives"""
+        return os.path.join(self.directory, "objects", digest[:2], f"{digest}.{extension}")
+
+    def lookup(self, section, key):
+        """Index entry whose object is still on disk, or None"""
+        with self.lock:
+            entry = self.index[section].get(key)
+        if entry and os.path.exists(self.path(entry["sha256"], entry["extension"])):
+            return entry
+        return None
+
+    def key_lock(self, key):
+        """Lock held while one source or variant is produced, so concurrent sites wait instead of redoing it"""
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def store(self, chunks, extension):
+        """Write chunks to the cache under their hash; returns (sha256, bytes)"""
+        os.makedirs(self.directory, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            path = self.path(digest.hexdigest(), extension)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest.hexdigest(), size
+
+    def remember(self, section, key, entry):
+        """Add an index entry"""
+        with self.lock:
+            self.index[section][key] = entry
+        return entry
+
+    def save(self):
+        """Write the index atomically"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(handle, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+shared_caches = {}
+shared_caches_lock = threading.Lock()
+
+def shared_cache(directory):
+    """One ImageCache per directory in the process, so fleet sites fetch and encode each asset once"""
+    directory = os.path.abspath(directory)
+    with shared_caches_lock:
+        if directory not in shared_caches:
+            shared_caches[directory] = ImageCache(directory)
+        return shared_caches[directory]
+
+def file_chunks(path):
+    """A local file in FETCH_CHUNK_SIZE pieces"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(FETCH_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+class ImagePipeline:
+    """Prefetch, resize, convert, upload and rewrite the configured image assets
+
+    source_dir serves assets by file name instead of downloading them, so the
+    pipeline runs offline.
+    """
+
+    def __init__(self, assets, cache_dir, source_dir=None, formats=IMAGE_FORMATS,
+                 fetch_workers=DEFAULT_FETCH_WORKERS, folder=DEFAULT_MEDIA_FOLDER, log=None):
+        self.assets = assets
+        self.cache = shared_cache(cache_dir)
+        self.source_dir = source_dir
+        self.formats = supported_formats(formats)
+        self.fetch_workers = max(1, fetch_workers)
+        self.folder = folder
+        self.log = log or (lambda message, level="INFO": None)
+        self.session = None
+        self.images = {}
+        self.fetched = 0
+
+    def fetch(self, url):
+        """Cache entry for the original at url, downloaded (or copied) only on first use"""
+        entry = self.cache.lookup("sources", url)
+        if entry:
+            return entry
+        with self.cache.key_lock(url):
+            return self.cache.lookup("sources", url) or self.download(url)
+
+    def download(self, url):
+        """Stream one original into the cache, from source_dir or the network"""
+        extension = url_extension(url)
+        if self.source_dir:
+            chunks = file_chunks(os.path.join(self.source_dir, os.path.basename(urlsplit(url).path)))
+            digest, size = self.cache.store(chunks, extension)
+        else:
+            with self.session.get(url, stream=True, timeout=FETCH_TIMEOUT) as response:
+                response.raise_for_status()
+                digest, size = self.cache.store(response.iter_content(FETCH_CHUNK_SIZE), extension)
+        with self.cache.lock:
+            self.fetched += 1
+        return self.cache.remember("sources", url, {"sha256": digest, "extension": extension, "bytes": size})
+
+    def variants(self, url, source):
+        """Resized, re-encoded copies of one cached original, encoded only once per source and setting"""
+        category = self.assets[url][0]
+        path = self.cache.path(source["sha256"], source["extension"])
+        with Image.open(path) as opened:
+            image = ImageOps.exif_transpose(opened)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if image.mode in ("P", "LA", "PA") or "transparency" in image.info
+                                      else "RGB")
+            source_width, source_height = image.size
+            wanted = CATEGORY_WIDTHS.get(category, DEFAULT_IMAGE_WIDTHS)
+            widths = [width for width in wanted if width < source_width]
+            if len(widths) < len(wanted):
+                widths.append(source_width)
+            variants = []
+            for image_format in self.formats:
+                for width in widths:
+                    key = f"{source['sha256']}:{image_format}:{width}:{IMAGE_QUALITY[image_format]}"
+                    with self.cache.key_lock(key):
+                        entry = self.cache.lookup("variants", key) or self.encode(image, image_format, width, key)
+                    variants.append(dict(entry, format=image_format))
+        return {"width": source_width, "height": source_height, "variants": variants}
+
+    def encode(self, image, image_format, width, key):
+        """Resize image to width, encode it and store the result under key"""
+        source_width, source_height = image.size
+        height = max(1, round(source_height * width / source_width))
+        resized = image if width == source_width else image.resize((width, height), Image.LANCZOS)
+        with tempfile.TemporaryFile() as encoded:
+            resized.save(encoded, image_format.upper(), quality=IMAGE_QUALITY[image_format])
+            encoded.seek(0)
+            digest, size = self.cache.store(iter(lambda: encoded.read(FETCH_CHUNK_SIZE), b""), image_format)
+        return self.cache.remember("variants", key, {
+            "sha256": digest, "extension": image_format, "bytes": size, "width": width, "height": height
+        })
+
+    def prepare_one(self, url):
+        """Fetch and convert one asset; never raises"""
+        category, name = self.assets[url]
+        try:
+            source = self.fetch(url)
+            image = {"category": category, "name": name, "bytes": source["bytes"], "variants": []}
+            if self.formats:
+                image.update(self.variants(url, source))
+            return url, image
+        except Exception as e:
+            self.log(f"⚠️ Image asset {category}.{name} skipped: {type(e).__name__}: {e}", "WARNING")
+            return url, None
+
+    def prepare(self):
+        """Fetch every asset into the cache and build its variants, fetch_workers at a time"""
+        if Image is None:
+            self.log("⚠️ Pillow is not installed; image assets are cached but not resized or converted", "WARNING")
+        elif not self.formats:
+            self.log("⚠️ This Pillow build encodes none of the requested image formats", "WARNING")
+        if not self.source_dir:
+            self.session = PooledSession(pool_size=self.fetch_workers, log=self.log)
+        try:
+            with ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="image") as pool:
+                for url, image in pool.map(self.prepare_one, self.assets):
+                    if image is not None:
+                        self.images[url] = image
+        finally:
+            if self.session is not None:
+                self.session.close()
+            self.cache.save()
+        variants = sum(len(image["variants"]) for image in self.images.values())
+        self.log(f"🖼️ {len(self.images)}/{len(self.assets)} image assets ready "
+                 f"({self.fetched} fetched, {variants} variants)")
+        return self.images
+
+    def upload_steps(self, manifest, force=False):
+        """Steps that upload every variant not already on the site; returns how many are live"""
+        variants = [variant for image in self.images.values() for variant in image["variants"]]
+        live = yield [self.variant_upload_steps(variant, manifest, force) for variant in variants]
+        self.log(f"🖼️ Image variants live: {sum(live)}/{len(variants)}")
+        return sum(live)
+
+    def variant_upload_steps(self, variant, manifest, force):
+        """Upload one variant unless the manifest has it; the hash is the content, so it is the key"""
+        key = f"{variant['sha256']}.{variant['extension']}"
+        entry = manifest.lookup("images", key)
+        if not force and manifest.is_unchanged("images", key, variant["sha256"]):
+            variant["url"] = entry.get("url")
+            return True
+        path = self.cache.path(variant["sha256"], variant["extension"])
+        descriptor = yield from upload_file_steps(path, key, self.folder, log=self.log)
+        if descriptor is None:
+            return False
+        manifest.record("images", key, variant["sha256"], descriptor.get("id"), url=descriptor.get("url", ""))
+        variant["url"] = descriptor.get("url")
+        return True
+
+    def srcset(self, image, image_format):
+        """"url 320w, ..." for the uploaded variants of one format"""
+        return ", ".join(f"{variant['url']} {variant['width']}w" for variant in image["variants"]
+                         if variant["format"] == image_format and variant.get("url"))
+
+    def rewrite(self, html):
+        """html with each known <img src> swapped for srcset variants (AVIF in a <picture> when built)"""
+        if not self.images:
+            return html
+        return IMAGE_TAG.sub(self.rewrite_tag, html)
+
+    def rewrite_tag(self, match):
+        """One <img> tag, rewritten if its src is a prepared asset with uploaded variants"""
+        tag = match.group(0)
+        src = SRC_ATTRIBUTE.search(tag)
+        if src is None or SRCSET_ATTRIBUTE.search(tag):
+            return tag
+        image = self.images.get(next(group for group in src.groups() if group is not None))
+        if image is None:
+            return tag
+        sets = {image_format: self.srcset(image, image_format) for image_format in self.formats}
+        sets = {image_format: srcset for image_format, srcset in sets.items() if srcset}
+        if not sets:
+            return tag
+        sizes = CATEGORY_SIZES.get(image["category"], DEFAULT_IMAGE_SIZES)
+        fallback = "webp" if "webp" in sets else next(iter(sets))
+        largest = max((variant for variant in image["variants"]
+                       if variant["format"] == fallback and variant.get("url")), key=lambda variant: variant["width"])
+        attributes = f' src="{largest["url"]}" srcset="{sets[fallback]}" sizes="{sizes}"' + self.dimensions(tag, image)
+        rewritten = tag[:src.start()] + attributes + tag[src.end():]
+        sources = "".join(f'<source type="{IMAGE_MIME_TYPES[image_format]}" srcset="{srcset}" sizes="{sizes}">'
+                          for image_format, srcset in sets.items() if image_format != fallback)
+        return f"<picture>{sources}{rewritten}</picture>" if sources else rewritten
+
+    @staticmethod
+    def dimensions(tag, image):
+        """width/height attributes the tag lacks, so it keeps the source aspect ratio before loading
+
+        A tag with neither gets the source size; one with a pixel width or
+        height gets the other scaled to match. Non-numeric values are left alone.
+        """
+        width = attribute_value(WIDTH_ATTRIBUTE, tag)
+        height = attribute_value(HEIGHT_ATTRIBUTE, tag)
+        if width is None and height is None:
+            return f' width="{image["width"]}" height="{image["height"]}"'
+        if height is None and width.isdigit():
+            return f' height="{round(int(width) * image["height"] / image["width"])}"'
+        if width is None and height.isdigit():
+            return f' width="{round(int(height) * image["width"] / image["height"])}"'
+        return ""
+
+    def report(self):
+        """Bytes of the originals against the largest variant of each, per asset and in total"""
+        assets = {}
+        for url, image in self.images.items():
+            largest = {}
+            for variant in image["variants"]:
+                if variant["width"] >= largest.get(variant["format"], {}).get("width", 0):
+                    largest[variant["format"]] = variant
+            assets[f"{image['category']}.{image['name']}"] = {
+                "url": url,
+                "bytes": image["bytes"],
+                "largest_variant_bytes": {image_format: variant["bytes"] for image_format, variant in largest.items()},
+                "variants": len(image["variants"]),
+                "uploaded": sum(1 for variant in image["variants"] if variant.get("url"))
+            }
+        return {
+            "formats": self.formats,
+            "assets": assets,
+            "original_bytes": sum(asset["bytes"] for asset in assets.values()),
+            "largest_variant_bytes": {
+                image_format: sum(asset["largest_variant_bytes"].get(image_format, 0) for asset in assets.values())
+                for image_format in self.formats
+            }
+        }
+
+def add_image_arguments(parser):
+    """--optimize-images and its options, shared by both deployment scripts"""
+    parser.add_argument(
+        "--optimize-images",
+        action="store_true",
+        help="Cache the image assets, upload WebP/AVIF sizes of them and rewrite <img> tags to srcset"
+    )
+    parser.add_argument("--image-source-dir",
+                        help="Read image assets from this directory by file name instead of downloading them")
+    parser.add_argument("--image-cache", help=f"Content-addressed image cache (default: {DEFAULT_IMAGE_CACHE} "
+                                              "in the app directory)")
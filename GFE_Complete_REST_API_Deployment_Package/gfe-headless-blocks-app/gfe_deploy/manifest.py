@@ -0,0 +1,93 @@
+"""
+Good Faith Exteriors - Content-hash deployment manifest
+Remembers what was last uploaded for each artifact so unchanged widgets,
+pages and backend functions can be skipped and changed ones updated in place
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+MANIFEST_FILENAME = "deployment-manifest.json"
+MANIFEST_VERSION = 1
+
+# Deployers for different sites in one process can share a manifest file
+SAVE_LOCK = threading.Lock()
+
+def content_hash(payload):
+    """SHA-256 of a payload's canonical JSON form"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class DeploymentManifest:
+    """Per-site record of artifact hashes and the remote ids they were deployed as
+
+    With path None the manifest lives only for the run (used against the fake API).
+    """
+
+    def __init__(self, path, scope):
+        self.path = path
+        self.scope = scope
+        self.lock = threading.Lock()
+        self.data = self.load()
+
+    def load(self):
+        """Read the manifest, starting fresh if it is missing or from another version"""
+        if not self.path or not os.path.exists(self.path):
+            return {"version": MANIFEST_VERSION, "sites": {}}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {"version": MANIFEST_VERSION, "sites": {}}
+        if data.get("version") != MANIFEST_VERSION:
+            return {"version": MANIFEST_VERSION, "sites": {}}
+        return data
+
+    def artifacts(self, kind):
+        """Entries of one artifact kind for this manifest's site (caller holds the lock)"""
+        return self.data["sites"].setdefault(self.scope, {}).setdefault(kind, {})
+
+    def lookup(self, kind, key):
+        """Last deployed entry for an artifact, or None"""
+        with self.lock:
+            return self.artifacts(kind).get(key)
+
+    def is_unchanged(self, kind, key, digest):
+        """True when the artifact was deployed before with the same content"""
+        entry = self.lookup(kind, key)
+        return bool(entry and entry.get("hash") == digest and entry.get("remote_id"))
+
+    def record(self, kind, key, digest, remote_id, **details):
+        """Remember a successful upload, plus any details worth reporting on a skip"""
+        with self.lock:
+            self.artifacts(kind)[key] = {
+                "hash": digest,
+                "remote_id": remote_id,
+                "deployed_at": datetime.now().isoformat(),
+                **details
+            }
+            return self.artifacts(kind)[key]
+
+    def forget(self, kind, key):
+        """Drop an artifact whose remote copy no longer exists"""
+        with self.lock:
+            self.artifacts(kind).pop(key, None)
+
+    def save(self):
+        """Write the manifest atomically so an interrupted run never corrupts it
+
+        Only this manifest's site is replaced; other sites are re-read from disk
+        so deployers saving to the same file side by side keep each other's entries.
+        """
+        if not self.path:
+            return
+        with SAVE_LOCK, self.lock:
+            data = self.load()
+            data["sites"][self.scope] = self.data["sites"].get(self.scope, {})
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
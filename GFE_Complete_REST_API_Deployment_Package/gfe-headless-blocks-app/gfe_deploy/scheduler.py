@@ -0,0 +1,154 @@
+"""
+Good Faith Exteriors - Dependency-graph phase scheduler
+Runs deployment phases concurrently as soon as their prerequisites finish
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from gfe_deploy.tracing import NULL_SPAN, SPAN_KIND_INTERNAL, in_current_context, span
+
+class Phase:
+    """A named unit of deployment work and the phases it waits for"""
+
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+class PhaseScheduler:
+    """Executes a DAG of phases on a thread pool and records per-phase timing"""
+
+    def __init__(self, phases, max_workers=None, log=None):
+        self.phases = {phase.name: phase for phase in phases}
+        self.max_workers = max_workers or len(self.phases)
+        self.log = log or (lambda message, level="INFO": None)
+        self.timings = {}
+        self.validate()
+
+    def validate(self):
+        """Reject unknown prerequisites and dependency cycles"""
+        for phase in self.phases.values():
+            for dependency in phase.depends_on:
+                if dependency not in self.phases:
+                    raise ValueError(f"Phase {phase.name} depends on unknown phase {dependency}")
+
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through phase {name}")
+            visiting.add(name)
+            for dependency in self.phases[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.phases:
+            visit(name)
+
+    def run(self):
+        """Run every phase; re-raises the first phase failure after in-flight phases finish
+
+        A phase that returns False is recorded as failed and, like one that
+        raises, its dependants are skipped; phases not waiting on it still run.
+        """
+        pending = dict(self.phases)
+        finished = set()
+        running = {}
+        failure = None
+
+        def start_ready(pool):
+            for name, phase in list(pending.items()):
+                if all(dependency in finished for dependency in phase.depends_on):
+                    del pending[name]
+                    running[pool.submit(in_current_context(self.run_phase), phase)] = name
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            start_ready(pool)
+            while running:
+                completed, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        failure = failure or error
+                    elif future.result() is not False:
+                        finished.add(name)
+                if failure is None:
+                    start_ready(pool)
+
+        self.record_skipped(pending, finished)
+
+        if failure is not None:
+            raise failure
+        return self.timings
+
+    def run_phase(self, phase):
+        """Run one phase and record its wall-clock window"""
+        started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        status = "error"
+        with span(phase.name, SPAN_KIND_INTERNAL, **{"gfe.phase": phase.name}) as phase_span:
+            try:
+                result = phase.func()
+                status = "success" if result is not False else "failed"
+                return result
+            finally:
+                self.record_timing(phase, status, started_at, start, phase_span)
+
+    def record_skipped(self, pending, finished):
+        """Mark the phases that never started as skipped, with the prerequisites that did not succeed"""
+        for name in pending:
+            depends_on = self.phases[name].depends_on
+            self.timings[name] = {
+                "status": "skipped",
+                "depends_on": list(depends_on),
+                "blocked_by": [dependency for dependency in depends_on if dependency not in finished]
+            }
+            self.log(f"Phase {name} skipped", "WARNING")
+
+    def record_timing(self, phase, status, started_at, start, phase_span=NULL_SPAN):
+        """Store and log one finished phase's wall-clock window"""
+        phase_span.set(**{"gfe.phase.status": status})
+        if status == "failed":
+            phase_span.fail("Phase reported failure")
+        duration = round(time.perf_counter() - start, 3)
+        self.timings[phase.name] = {
+            "status": status,
+            "depends_on": list(phase.depends_on),
+            "start": started_at,
+            "end": datetime.now().isoformat(),
+            "duration_seconds": duration
+        }
+        self.log(f"Phase {phase.name} {status} in {duration:.2f}s", "INFO" if status == "success" else "WARNING")
+
+    def critical_path(self):
+        """Longest chain of dependent phases by measured duration"""
+        finish = {}
+        previous = {}
+
+        def finish_time(name):
+            if name not in finish:
+                duration = self.timings.get(name, {}).get("duration_seconds", 0)
+                best = None
+                for dependency in self.phases[name].depends_on:
+                    if best is None or finish_time(dependency) > finish_time(best):
+                        best = dependency
+                previous[name] = best
+                finish[name] = duration + (finish_time(best) if best else 0)
+            return finish[name]
+
+        if not self.phases:
+            return {"phases": [], "seconds": 0}
+
+        end = max(self.phases, key=finish_time)
+        path = []
+        node = end
+        while node:
+            path.append(node)
+            node = previous[node]
+        return {"phases": list(reversed(path)), "seconds": round(finish[end], 3)}
@@ -0,0 +1,35 @@
+"""
+Good Faith Exteriors - Deployment steps
+Phase logic is written once as generators that yield the I/O they need: an API
+call, a streamed file upload, a bulk insert, an endpoint probe, blocking local
+work (file and image processing), or a list of steps to run side by side.
+The sync and async engines each drive the same generators with their own I/O.
+"""
+
+from collections import namedtuple
+
+ApiCall = namedtuple("ApiCall", ("method", "endpoint", "data", "params"), defaults=(None, None))
+# A raw body sent to an absolute (pre-signed upload) URL; body is a media_upload.FileBody
+StreamUpload = namedtuple("StreamUpload", ("method", "url", "body", "headers"))
+BulkInsert = namedtuple("BulkInsert", ("collection_id", "items"))
+ProbeEndpoints = namedtuple("ProbeEndpoints", ("endpoints",))
+# func(*args) run off the event loop by the async engine, inline by the sync one
+BlockingCall = namedtuple("BlockingCall", ("func", "args"), defaults=((),))
+
+def run_steps(steps, perform):
+    """Drive a steps generator to completion and return its result
+
+    perform(effect) carries out one ApiCall, StreamUpload, BulkInsert,
+    ProbeEndpoints or BlockingCall; a yielded list of step generators is run
+    one after another and its results are sent back as a list.
+    """
+    result = None
+    while True:
+        try:
+            effect = steps.send(result)
+        except StopIteration as done:
+            return done.value
+        if isinstance(effect, list):
+            result = [run_steps(child, perform) for child in effect]
+        else:
+            result = perform(effect)
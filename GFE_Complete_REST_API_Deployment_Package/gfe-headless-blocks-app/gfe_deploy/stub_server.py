@@ -0,0 +1,450 @@
+"""
+Good Faith Exteriors - In-process HTTP stub server
+A small threaded JSON server with a route table, used to run the benchmark
+and the deployment scripts offline against local stand-ins
+"""
+
+import base64
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BASE36_DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+LISTEN_BACKLOG = 1024
+DEFAULT_PRODUCT_PAGE_SIZE = 24
+MAX_PRODUCT_PAGE_SIZE = 100
+PRODUCT_CACHE_TTL_SECONDS = 60
+PRODUCT_CACHE_MAX_ENTRIES = 200
+PRODUCT_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+PRODUCT_FILTER_FIELDS = ("brand", "style", "material", "type")
+PRODUCT_FIELDS = (
+    "name", "brand", "type", "style", "material", "series", "basePrice",
+    "priceRange", "features", "image", "description", "specifications"
+)
+
+STREAM_READ_SIZE = 256 * 1024
+
+StubRequest = namedtuple("StubRequest", ["method", "path", "params", "match", "body", "headers", "stream"],
+                         defaults=(None,))
+
+class Route:
+    """One METHOD + path pattern; {name} segments become match groups
+
+    raw routes get the request body as a RequestStream instead of parsed JSON.
+    """
+
+    def __init__(self, method, pattern, handler, raw=False):
+        self.method = method
+        self.regex = re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", pattern) + "/?$")
+        self.handler = handler
+        self.raw = raw
+
+class RequestStream:
+    """A request body read in bounded chunks, for upload routes"""
+
+    def __init__(self, rfile, length):
+        self.rfile = rfile
+        self.remaining = length
+
+    def __iter__(self):
+        while self.remaining > 0:
+            chunk = self.rfile.read(min(STREAM_READ_SIZE, self.remaining))
+            if not chunk:
+                self.remaining = 0
+                return
+            self.remaining -= len(chunk)
+            yield chunk
+
+    def drain(self):
+        """Read and discard whatever the handler left, so the connection can be reused"""
+        for _ in self:
+            pass
+
+class FaultInjector:
+    """Added latency, random server errors and a token-bucket rate limit answered with 429
+
+    Seeded, so a run with the same settings sees the same sequence of faults.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 rate_limit=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = float(rate_limit or 0)
+        self.refilled_at = time.monotonic()
+        self.injected_errors = 0
+        self.throttled = 0
+
+    def apply(self):
+        """Sleep for the configured latency; returns a fault response or None to proceed"""
+        with self.lock:
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+            fail = self.error_rate and self.rng.random() < self.error_rate
+            retry_after = self.take_token()
+            if retry_after is not None:
+                self.throttled += 1
+            elif fail:
+                self.injected_errors += 1
+        if delay:
+            time.sleep(delay)
+        if retry_after is not None:
+            return 429, {"message": "Too many requests"}, {"Retry-After": f"{retry_after:.3f}"}
+        if fail:
+            return self.error_status, {"message": "Injected failure"}
+        return None
+
+    def take_token(self):
+        """Spend one rate-limit token; returns seconds until one is available when empty"""
+        if not self.rate_limit:
+            return None
+        now = time.monotonic()
+        self.tokens = min(self.rate_limit, self.tokens + (now - self.refilled_at) * self.rate_limit)
+        self.refilled_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return None
+        return (1 - self.tokens) / self.rate_limit
+
+    def stats(self):
+        """Faults injected so far"""
+        with self.lock:
+            return {"injected_errors": self.injected_errors, "throttled": self.throttled}
+
+class StubServer:
+    """Serves JSON routes from a background thread on 127.0.0.1
+
+    handler(request) returns (status, body) or (status, body, headers); body is
+    JSON-encoded unless it is already bytes. An optional FaultInjector runs
+    before every request.
+    """
+
+    def __init__(self, routes=(), host="127.0.0.1", port=0, faults=None):
+        self.routes = list(routes)
+        self.host = host
+        self.port = port
+        self.faults = faults
+        self.server = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.requests_served = 0
+
+    def add_route(self, method, pattern, handler):
+        """Register a handler for METHOD pattern"""
+        self.routes.append(Route(method, pattern, handler))
+
+    @property
+    def url(self):
+        """Base URL of the running server"""
+        return f"http://{self.host}:{self.server.server_port}"
+
+    def start(self):
+        """Bind and serve in a daemon thread; returns self"""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Buffer headers and body into one write; separate small writes stall on delayed ACKs
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def handle_any(self):
+                stub.dispatch(self)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_any
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            # The default listen backlog of 5 resets connections when async clients open hundreds at once
+            request_queue_size = LISTEN_BACKLOG
+
+        self.server = Server((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down and release the port"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def find_route(self, method, path):
+        """(route, match) for the request, or (None, None)"""
+        for route in self.routes:
+            if route.method == method:
+                match = route.regex.match(path)
+                if match:
+                    return route, match
+        return None, None
+
+    def dispatch(self, handler):
+        """Parse the request, run the matching route and write the JSON response"""
+        with self.lock:
+            self.requests_served += 1
+        parts = urlsplit(handler.path)
+        length = int(handler.headers.get("Content-Length") or 0)
+        route, match = self.find_route(handler.command, parts.path)
+        body = stream = None
+        if route is not None and route.raw:
+            stream = RequestStream(handler.rfile, length)
+        else:
+            raw = handler.rfile.read(length) if length else b""
+            try:
+                body = json.loads(raw) if raw else None
+            except ValueError:
+                self.respond(handler, 400, {"error": "invalid JSON body"})
+                return
+        if self.faults:
+            fault = self.faults.apply()
+            if fault:
+                if stream:
+                    stream.drain()
+                self.respond(handler, *fault)
+                return
+
+        if route is None:
+            self.respond(handler, 404, {"error": f"no route for {handler.command} {parts.path}"})
+            return
+        request = StubRequest(
+            method=handler.command,
+            path=parts.path,
+            params={key: values[-1] for key, values in parse_qs(parts.query).items()},
+            match=match.groupdict(),
+            body=body,
+            headers=handler.headers,
+            stream=stream
+        )
+        try:
+            result = route.handler(request)
+        except Exception as e:
+            result = (500, {"error": f"{type(e).__name__}: {e}"})
+        if stream:
+            stream.drain()
+        self.respond(handler, *result)
+
+    @staticmethod
+    def respond(handler, status, body, headers=None):
+        """Write one response with an explicit Content-Length so keep-alive works"""
+        payload = body if isinstance(body, bytes) else json.dumps(body, default=str).encode("utf-8")
+        handler.send_response(status)
+        headers = dict(headers or {})
+        headers.setdefault("Content-Type", "application/json")
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+class FunctionStore:
+    """In-memory collections standing in for wix-data behind the HTTP function stubs
+
+    Keys listed in unique_keys are indexed like the site's unique collection
+    indexes, so lookups on them stay constant-time as the stub fills up.
+    """
+
+    def __init__(self, products=(), unique_keys=None):
+        self.lock = threading.Lock()
+        self.collections = {"GFE_Quotes": {}, "GFE_Leads": {}, "GFE_WindowProducts": {}}
+        self.unique_keys = unique_keys if unique_keys is not None else {"GFE_Quotes": "quoteId"}
+        self.indexes = {collection_id: {} for collection_id in self.unique_keys}
+        for product in products:
+            self.insert("GFE_WindowProducts", dict(product))
+
+    def insert(self, collection_id, item):
+        """Store an item, assigning _id and _createdDate like wixData.insert"""
+        item["_id"] = str(uuid.uuid4())
+        item["_createdDate"] = datetime.now().isoformat()
+        key = self.unique_keys.get(collection_id)
+        with self.lock:
+            if key:
+                if item.get(key) in self.indexes[collection_id]:
+                    raise ValueError(f"duplicate {key}: {item.get(key)}")
+                self.indexes[collection_id][item.get(key)] = item
+            self.collections.setdefault(collection_id, {})[item["_id"]] = item
+        return item
+
+    def find(self, collection_id, key, value):
+        """First item whose key equals value, or None"""
+        with self.lock:
+            if self.unique_keys.get(collection_id) == key:
+                return self.indexes[collection_id].get(value)
+            items = list(self.collections.get(collection_id, {}).values())
+        return next((item for item in items if item.get(key) == value), None)
+
+    def items(self, collection_id):
+        """Snapshot of a collection's items"""
+        with self.lock:
+            return list(self.collections.get(collection_id, {}).values())
+
+def base36(number):
+    """Uppercase base-36 digits of a non-negative integer, like JavaScript's toString(36)"""
+    digits = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        digits = BASE36_DIGITS[remainder] + digits
+        if not number:
+            return digits
+
+def quote_id_generator():
+    """Callable producing ids in the generated post_quotes format: time, counter, random"""
+    sequence = itertools.count(1)
+    rng = random.Random()
+
+    def new_quote_id():
+        return (f"GFE-{base36(int(time.time() * 1000))}"
+                f"-{base36(next(sequence) % 1296).rjust(2, '0')}"
+                f"-{base36(rng.getrandbits(31)).rjust(6, '0')[-6:]}")
+    return new_quote_id
+
+def product_query(query):
+    """Validated /api/products parameters, mirroring parseQuery in the generated handler"""
+    try:
+        limit = int(query.get("limit", DEFAULT_PRODUCT_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_PRODUCT_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PRODUCT_PAGE_SIZE}")
+    fields = sorted(field.strip() for field in query.get("fields", "").split(",") if field.strip())
+    unknown = [field for field in fields if field not in PRODUCT_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    prices = {}
+    for name in ("minPrice", "maxPrice"):
+        if query.get(name, "") != "":
+            try:
+                prices[name] = float(query[name])
+            except ValueError:
+                raise ValueError(f"{name} must be a non-negative number")
+            if prices[name] < 0:
+                raise ValueError(f"{name} must be a non-negative number")
+    after = None
+    if query.get("cursor"):
+        try:
+            after = json.loads(base64.b64decode(query["cursor"]))["after"]
+        except (ValueError, KeyError, TypeError):
+            raise ValueError("invalid cursor")
+    return {
+        "filters": {field: query[field] for field in PRODUCT_FILTER_FIELDS if query.get(field)},
+        "minPrice": prices.get("minPrice"),
+        "maxPrice": prices.get("maxPrice"),
+        "fields": fields,
+        "limit": limit,
+        "after": after
+    }
+
+def product_page(items, params):
+    """One keyset page of products: ordered by _id, filtered, projected, with the next cursor"""
+    matches = sorted(
+        (item for item in items
+         if all(item.get(field) == value for field, value in params["filters"].items())
+         and (params["minPrice"] is None or item.get("basePrice", 0) >= params["minPrice"])
+         and (params["maxPrice"] is None or item.get("basePrice", 0) <= params["maxPrice"])
+         and (params["after"] is None or item["_id"] > params["after"])),
+        key=lambda item: item["_id"]
+    )
+    page = matches[:params["limit"]]
+    if params["fields"]:
+        page = [{key: item.get(key) for key in ["_id"] + params["fields"]} for item in page]
+    next_cursor = None
+    if len(matches) > params["limit"]:
+        next_cursor = base64.b64encode(json.dumps({"after": page[-1]["_id"]}).encode("utf-8")).decode("ascii")
+    return {"items": page, "nextCursor": next_cursor}
+
+def http_function_routes(store):
+    """Routes mirroring the generated /api/quotes, /api/leads and /api/products functions"""
+    new_quote_id = quote_id_generator()
+
+    def post_quotes(request):
+        data = request.body or {}
+        quote_id = new_quote_id()
+        quote = store.insert("GFE_Quotes", {
+            "quoteId": quote_id,
+            "customerEmail": data.get("email"),
+            "customerName": data.get("name"),
+            "customerPhone": data.get("phone"),
+            "windowType": data.get("windowType"),
+            "brand": data.get("brand"),
+            "material": data.get("material"),
+            "quantity": data.get("quantity"),
+            "unitPrice": data.get("unitPrice"),
+            "total": data.get("total"),
+            "status": "pending",
+            "quoteData": data
+        })
+        return 200, {"success": True, "quoteId": quote_id, "quote": quote}
+
+    def get_quote(request):
+        quote = store.find("GFE_Quotes", "quoteId", request.match["id"])
+        if quote is None:
+            return 400, {"error": "Quote not found"}
+        return 200, quote
+
+    def post_leads(request):
+        data = request.body or {}
+        lead = store.insert("GFE_Leads", {
+            "name": data.get("name"),
+            "email": data.get("email"),
+            "phone": data.get("phone"),
+            "source": data.get("source") or "website",
+            "status": "new",
+            "notes": data.get("notes") or ""
+        })
+        return 200, {"success": True, "leadId": lead["_id"], "lead": lead}
+
+    product_cache = {}
+
+    def get_products(request):
+        try:
+            params = product_query(request.params)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        key = json.dumps(params, sort_keys=True)
+        with store.lock:
+            entry = product_cache.get(key)
+            cache_status = "HIT" if entry and entry["expires"] > time.monotonic() else "MISS"
+        if cache_status == "MISS":
+            body = json.dumps(product_page(store.items("GFE_WindowProducts"), params), default=str).encode("utf-8")
+            entry = {
+                "expires": time.monotonic() + PRODUCT_CACHE_TTL_SECONDS,
+                "body": body,
+                "etag": f'W/"{hashlib.sha1(body).hexdigest()[:16]}"'
+            }
+            with store.lock:
+                product_cache[key] = entry
+                while len(product_cache) > PRODUCT_CACHE_MAX_ENTRIES:
+                    product_cache.pop(next(iter(product_cache)))
+        headers = {"Cache-Control": PRODUCT_CACHE_CONTROL, "ETag": entry["etag"], "X-Cache": cache_status}
+        if request.headers.get("If-None-Match") == entry["etag"]:
+            return 304, b"", headers
+        return 200, entry["body"], headers
+
+    return [
+        Route("POST", "/api/quotes", post_quotes),
+        Route("GET", "/api/quotes/{id}", get_quote),
+        Route("POST", "/api/leads", post_leads),
+        Route("GET", "/api/products", get_products)
+    ]
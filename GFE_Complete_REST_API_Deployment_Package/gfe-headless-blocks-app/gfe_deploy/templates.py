@@ -0,0 +1,176 @@
+"""
+Good Faith Exteriors - Page template registry
+Resolves widget and page templates relative to the app directory, renders each
+one once per theme (palette colors swapped for app-config.json's in hex, #rgb
+shorthand and rgb()/rgba() form, {{name}} placeholders filled) and caches both
+the file text and the rendered page by file mtime, so repeated and multi-site
+deploys reuse them without re-reading
+"""
+
+import json
+import os
+import re
+import threading
+
+from gfe_deploy.html_split import split_html
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_CONFIG_PATH = os.path.join(APP_DIR, "config", "app-config.json")
+
+# Colors the templates are written in; rendering swaps each for the configured theme value
+AUTHORED_PALETTE = {
+    "primary_color": "#1a2332",
+    "secondary_color": "#d4af37",
+    "accent_color": "#c0c0c0",
+    "text_color": "#ffffff",
+    "background_color": "#0f1419"
+}
+PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# Color literals a palette color can be written as: #rrggbb, #rgb, rgb(r, g, b) and rgba(r, g, b, a)
+COLOR_LITERAL = re.compile(
+    r"#(?:[0-9a-fA-F]{6}|[0-9a-fA-F]{3})(?![0-9a-fA-F])"
+    r"|\b(rgba?)\(\s*(\d{1,3})\s*,?\s*(\d{1,3})\s*,?\s*(\d{1,3})\s*(?:[,/]\s*([\d.]+%?)\s*)?\)",
+    re.IGNORECASE
+)
+
+def load_theme(path=APP_CONFIG_PATH):
+    """The "theme" section of app-config.json"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get("theme", {})
+
+def hex_rgb(color):
+    """(r, g, b) of a #rgb or #rrggbb color, or None for anything else"""
+    digits = color.strip().lstrip("#") if color.strip().startswith("#") else ""
+    if len(digits) == 3:
+        digits = "".join(digit * 2 for digit in digits)
+    if len(digits) != 6:
+        return None
+    try:
+        return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+    except ValueError:
+        return None
+
+def literal_rgb(match):
+    """(r, g, b) of a COLOR_LITERAL match"""
+    if match.group(1):
+        return tuple(int(match.group(i)) for i in (2, 3, 4))
+    return hex_rgb(match.group(0))
+
+def frozen(mapping):
+    """Hashable, order-independent form of a flat dict, for cache keys"""
+    return tuple(sorted((mapping or {}).items()))
+
+class TemplateCache:
+    """File text and rendered pages, both keyed by the file's mtime and size
+
+    One cache is shared by every registry in the process, so fleet sites with
+    different themes still read each file once.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sources = {}
+        self.rendered = {}
+        self.reads = 0
+        self.renders = 0
+
+    def source(self, path, stamp):
+        """File text for path at stamp (mtime_ns, size), read only when the stamp changed"""
+        with self.lock:
+            cached = self.sources.get(path)
+            if cached and cached[0] == stamp:
+                return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        with self.lock:
+            self.sources[path] = (stamp, text)
+            self.reads += 1
+        return text
+
+    def render(self, key, stamp, build):
+        """Rendered page for key at stamp, built once per stamp"""
+        with self.lock:
+            cached = self.rendered.get(key)
+            if cached and cached[0] == stamp:
+                return cached[1]
+        page = build()
+        with self.lock:
+            self.rendered[key] = (stamp, page)
+            self.renders += 1
+        return page
+
+    def stats(self):
+        """Files read and pages rendered since the process started"""
+        with self.lock:
+            return {"files_cached": len(self.sources), "reads": self.reads,
+                    "pages_cached": len(self.rendered), "renders": self.renders}
+
+SHARED_CACHE = TemplateCache()
+
+class TemplateRegistry:
+    """Themed, cached templates under one app directory
+
+    theme maps AUTHORED_PALETTE keys to the colors to render; values fill
+    {{name}} placeholders (unknown names are left as written).
+    """
+
+    def __init__(self, root=APP_DIR, theme=None, values=None, cache=None):
+        self.root = root
+        self.theme = {key: value for key, value in (theme or {}).items()
+                      if key in AUTHORED_PALETTE and isinstance(value, str)}
+        self.values = dict(values or {})
+        self.cache = cache or SHARED_CACHE
+        # Keyed by (r, g, b), so every way a palette color is written maps to its replacement
+        self.color_swaps = {hex_rgb(AUTHORED_PALETTE[key]): value for key, value in self.theme.items()
+                            if hex_rgb(value) != hex_rgb(AUTHORED_PALETTE[key])}
+
+    def path(self, name):
+        """Absolute path of a template, relative to the app directory"""
+        return os.path.join(self.root, name)
+
+    def exists(self, name):
+        """True when the template file is present"""
+        return os.path.isfile(self.path(name))
+
+    def swap_color(self, match):
+        """Replacement for one color literal: the theme color, in rgb()/rgba() form with its alpha kept"""
+        value = self.color_swaps.get(literal_rgb(match))
+        if value is None:
+            return match.group(0)
+        function, alpha = match.group(1), match.group(5)
+        if not function:
+            return value
+        rgb = hex_rgb(value)
+        if rgb is None:
+            # A named or functional theme color has no channels to keep the alpha with
+            return match.group(0) if alpha else value
+        channels = ", ".join(str(channel) for channel in rgb)
+        return f"{function}({channels}, {alpha})" if alpha else f"{function}({channels})"
+
+    def substitute(self, text):
+        """Template text with theme colors swapped and placeholders filled"""
+        if self.color_swaps:
+            text = COLOR_LITERAL.sub(self.swap_color, text)
+        if self.values:
+            text = PLACEHOLDER.sub(lambda match: str(self.values.get(match.group(1), match.group(0))), text)
+        return text
+
+    def render(self, name, split=False):
+        """Rendered template, or None when the file is missing
+
+        split=True consolidates inline styles and scripts the way widget
+        blocks are split, for pages built from widget files.
+        """
+        path = self.path(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        key = (path, split, frozen(self.theme), frozen(self.values))
+
+        def build():
+            page = self.substitute(self.cache.source(path, stamp))
+            return split_html(page).render() if split else page
+
+        return self.cache.render(key, stamp, build)
@@ -0,0 +1,258 @@
+"""
+Good Faith Exteriors - Deployment tracing
+Times every outbound HTTP call as a span nested under the deployment phase
+that issued it, and exports the trace as a nested JSON tree and as OTLP/JSON,
+which an OpenTelemetry Collector or Cloud Trace's OTLP endpoint accepts as is
+"""
+
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+TRACE_FILENAME = "deployment-trace"
+TRACER_SCOPE = "gfe_deploy.tracing"
+
+# Path segments that name one resource rather than a route: UUIDs, long hex ids, numbers
+ID_SEGMENT = re.compile(r"^(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+                        r"|[0-9a-fA-F]{16,}|\d+)$")
+
+CURRENT_SPAN = contextvars.ContextVar("gfe_current_span", default=None)
+
+def endpoint_template(path):
+    """URL path with resource ids replaced by {id}, so spans group by route"""
+    return "/".join("{id}" if ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+def trace_paths(directory, name=TRACE_FILENAME):
+    """Where Tracer.export writes the JSON tree and the OTLP file"""
+    return {
+        "json": os.path.join(directory, f"{name}.json"),
+        "otlp": os.path.join(directory, f"{name}.otlp.json")
+    }
+
+def in_current_context(func):
+    """func bound to a copy of the caller's context, so spans started on a pool thread nest correctly
+
+    Take a fresh copy per submitted job: one context cannot run on two threads at once.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+def otlp_value(value):
+    """OTLP/JSON AnyValue for a Python attribute value"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def otlp_attributes(attributes):
+    """OTLP/JSON KeyValue list, skipping unset attributes"""
+    return [{"key": key, "value": otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+class NullSpan:
+    """Stand-in yielded when no trace is active; records nothing"""
+
+    recording = False
+
+    def set(self, **attributes):
+        pass
+
+    def fail(self, message):
+        pass
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    """One timed operation: wall-clock start in Unix nanoseconds, duration from the monotonic clock"""
+
+    recording = True
+
+    def __init__(self, tracer, name, kind, parent, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.status = STATUS_UNSET
+        self.status_message = None
+        self.start_ns = time.time_ns()
+        self.started = time.perf_counter_ns()
+        self.end_ns = None
+
+    def set(self, **attributes):
+        """Add or overwrite attributes; dotted OpenTelemetry names go through **{...}"""
+        self.attributes.update(attributes)
+
+    def fail(self, message):
+        """Mark the span as an error"""
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def finish(self):
+        """Close the span, defaulting its status to OK"""
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self.started)
+        if self.status == STATUS_UNSET:
+            self.status = STATUS_OK
+
+    def duration_ms(self):
+        """Span length in milliseconds"""
+        return round((self.end_ns - self.start_ns) / 1e6, 3)
+
+class Tracer:
+    """Collects the spans of one deployment under a single trace id"""
+
+    def __init__(self, service_name, resource=None):
+        self.trace_id = os.urandom(16).hex()
+        self.resource = {"service.name": service_name, **(resource or {})}
+        self.spans = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, kind=SPAN_KIND_INTERNAL, **attributes):
+        """Time the with-block as a child of the current span of this trace"""
+        parent = CURRENT_SPAN.get()
+        if parent is not None and parent.tracer is not self:
+            parent = None
+        current = Span(self, name, kind, parent, attributes)
+        token = CURRENT_SPAN.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.fail(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            CURRENT_SPAN.reset(token)
+            current.finish()
+            with self.lock:
+                self.spans.append(current)
+
+    def finished_spans(self):
+        """Spans closed so far, in start order"""
+        with self.lock:
+            return sorted(self.spans, key=lambda span: span.start_ns)
+
+    def to_tree(self):
+        """Nested JSON trace: each span with its attributes and children"""
+        spans = self.finished_spans()
+        nodes = {}
+        roots = []
+        for span in spans:
+            nodes[span.span_id] = {
+                "name": span.name,
+                "span_id": span.span_id,
+                "start_unix_nano": span.start_ns,
+                "duration_ms": span.duration_ms(),
+                "status": "error" if span.status == STATUS_ERROR else "ok",
+                "attributes": span.attributes,
+                "children": []
+            }
+            if span.status_message:
+                nodes[span.span_id]["status_message"] = span.status_message
+        for span in spans:
+            parent = nodes.get(span.parent_id)
+            (parent["children"] if parent else roots).append(nodes[span.span_id])
+        return {"trace_id": self.trace_id, "resource": self.resource, "spans": roots}
+
+    def to_otlp(self):
+        """OTLP/JSON ExportTraceServiceRequest body for every finished span"""
+        spans = []
+        for span in self.finished_spans():
+            status = {"code": span.status}
+            if span.status_message:
+                status["message"] = span.status_message
+            spans.append({
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_id or "",
+                "name": span.name,
+                "kind": span.kind,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": otlp_attributes(span.attributes),
+                "status": status
+            })
+        return {"resourceSpans": [{
+            "resource": {"attributes": otlp_attributes(self.resource)},
+            "scopeSpans": [{"scope": {"name": TRACER_SCOPE}, "spans": spans}]
+        }]}
+
+    def export(self, directory, name=TRACE_FILENAME):
+        """Write <name>.json (tree) and <name>.otlp.json (OTLP) into directory; returns both paths"""
+        paths = trace_paths(directory, name)
+        os.makedirs(directory, exist_ok=True)
+        with open(paths["json"], 'w', encoding='utf-8') as f:
+            json.dump(self.to_tree(), f, indent=2)
+        with open(paths["otlp"], 'w', encoding='utf-8') as f:
+            json.dump(self.to_otlp(), f)
+        return paths
+
+    def phase_summary(self):
+        """Per-phase totals of the HTTP spans beneath each phase span"""
+        spans = self.finished_spans()
+        by_id = {span.span_id: span for span in spans}
+        phases = {}
+        for span in spans:
+            if span.kind != SPAN_KIND_CLIENT:
+                continue
+            phase = by_id.get(span.parent_id)
+            while phase is not None and "gfe.phase" not in phase.attributes:
+                phase = by_id.get(phase.parent_id)
+            name = phase.attributes["gfe.phase"] if phase else "(no phase)"
+            totals = phases.setdefault(name, {
+                "requests": 0, "errors": 0, "retries": 0,
+                "bytes_sent": 0, "bytes_received": 0, "request_ms": 0.0, "slowest": None
+            })
+            attributes = span.attributes
+            totals["requests"] += 1
+            totals["errors"] += span.status == STATUS_ERROR
+            totals["retries"] += attributes.get("http.request.resend_count") or 0
+            totals["bytes_sent"] += attributes.get("http.request.body.size") or 0
+            totals["bytes_received"] += attributes.get("http.response.body.size") or 0
+            totals["request_ms"] = round(totals["request_ms"] + span.duration_ms(), 3)
+            if totals["slowest"] is None or span.duration_ms() > totals["slowest"]["duration_ms"]:
+                totals["slowest"] = {"name": span.name, "duration_ms": span.duration_ms()}
+        return phases
+
+@contextmanager
+def span(name, kind=SPAN_KIND_INTERNAL, **attributes):
+    """Child span of whatever trace is active in this context, or a NullSpan outside one"""
+    parent = CURRENT_SPAN.get()
+    if parent is None:
+        yield NULL_SPAN
+        return
+    with parent.tracer.span(name, kind, **attributes) as child:
+        yield child
+
+def http_span(method, url):
+    """Client span named "METHOD /route/{id}" with the OpenTelemetry HTTP attributes known up front"""
+    parts = urlsplit(url)
+    template = endpoint_template(parts.path or "/")
+    return span(f"{method} {template}", SPAN_KIND_CLIENT, **{
+        "http.request.method": method,
+        "url.template": template,
+        "server.address": parts.hostname
+    })
+
+def record_http_response(span, status, bytes_sent, bytes_received, retries):
+    """Final status, body sizes and resend count of an HTTP client span; 4xx/5xx mark it failed"""
+    span.set(**{
+        "http.response.status_code": status,
+        "http.request.body.size": bytes_sent,
+        "http.response.body.size": bytes_received,
+        "http.request.resend_count": retries
+    })
+    if status >= 400:
+        span.fail(f"HTTP {status}")
@@ -0,0 +1,39 @@
+"""
+Shared fixtures: both deployers and the gfe_deploy helpers, importable from the
+package directory, logging into a backend with no sinks
+"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEADLESS_APP_DIR = os.path.join(PACKAGE_DIR, "gfe-headless-blocks-app")
+
+for path in (PACKAGE_DIR, HEADLESS_APP_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from gfe_deploy.structured_log import LogBackend
+
+def load_headless_module():
+    """deploy-headless-blocks.py, imported under a name Python accepts"""
+    spec = importlib.util.spec_from_file_location(
+        "deploy_headless_blocks", os.path.join(HEADLESS_APP_DIR, "deploy-headless-blocks.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def log_backend():
+    """Log backend that only fills the deployers' own buffers"""
+    backend = LogBackend([])
+    yield backend
+    backend.close()
+
+@pytest.fixture(scope="session")
+def headless_module():
+    return load_headless_module()
@@ -0,0 +1,50 @@
+"""CSS minification and shared stylesheet lifting in AssetBundler"""
+
+from gfe_deploy.bundler import AssetBundler, minify_css
+from gfe_deploy.html_split import HtmlParts
+
+def test_drops_last_semicolon_of_each_block():
+    assert minify_css("a {\n  color: red;\n  margin: 0 ;\n}\n/* note */\nb { top: 0; }") == "a{color:red;margin:0}b{top:0}"
+
+def test_leaves_quoted_strings_untouched():
+    css = 'a::after { content: ";}" ; }\nb::before { content: \'a  ;}  b\'; }'
+    assert minify_css(css) == 'a::after{content:";}"}b::before{content:\'a  ;}  b\'}'
+
+def widget(css):
+    return HtmlParts(markup="<html><head><title>w</title></head><body></body></html>", css=css, javascript="")
+
+def test_lifts_only_the_leading_run_widgets_share():
+    bundler = AssetBundler()
+    bundled = bundler.build({
+        "a": widget("*{margin:0}body{color:#fff}.card{top:0}.btn:hover{color:red}"),
+        "b": widget("*{margin:0}body{color:#fff}.grid{left:0}.btn:hover{color:red}"),
+        "c": widget("*{margin:0}.chat{right:0}")
+    })
+
+    # .btn:hover is shared but follows each widget's own rules, so it stays put
+    assert bundler.shared_css == "*{margin:0}body{color:#fff}"
+    assert bundler.sharing == ["a", "b"]
+    assert bundled["a"].css == ".card{top:0}.btn:hover{color:red}"
+    assert bundled["b"].css == ".grid{left:0}.btn:hover{color:red}"
+    assert bundled["c"].css == "*{margin:0}.chat{right:0}"
+
+def test_links_the_sheet_ahead_of_the_widget_styles():
+    bundler = AssetBundler()
+    bundled = bundler.build({"a": widget("*{margin:0}.a{top:0}"), "b": widget("*{margin:0}.b{top:0}"),
+                             "c": widget(".c{top:0}")})
+    linked = bundler.link_shared(bundled, "https://static.example.com/theme.css?v=1&h=2")
+
+    link = '<link rel="stylesheet" href="https://static.example.com/theme.css?v=1&amp;h=2">'
+    for name in ("a", "b"):
+        assert linked[name].markup == f"<html><head><title>w</title>{link}</head><body></body></html>"
+        rendered = linked[name].render()
+        assert rendered.index(link) < rendered.index("<style>")
+    assert linked["c"] == bundled["c"]
+    assert "@import" not in "".join(parts.css for parts in linked.values())
+
+def test_unlift_restores_the_inline_rules():
+    bundler = AssetBundler()
+    bundler.build({"a": widget("*{margin:0}.a{top:0}"), "b": widget("*{margin:0}.b{top:0}")})
+    restored = bundler.unlift()
+    assert restored["a"].css == "*{margin:0}.a{top:0}"
+    assert bundler.shared_css == "" and bundler.sharing == []
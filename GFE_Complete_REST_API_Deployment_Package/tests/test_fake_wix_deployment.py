@@ -0,0 +1,99 @@
+"""Both deployers end to end against FakeWixServer, with latency, 503s and 429s injected"""
+
+import importlib.util
+
+import pytest
+
+from gfe_deploy.fake_wix import FakeWixServer
+from wix_rest_api_complete_deployment import DEPLOYMENT_PHASES, AsyncWixCompleteDeployment, WixCompleteDeployment
+
+FAULTS = {
+    "latency": {"latency": 0.01, "jitter": 0.01},
+    "errors": {"error_rate": 0.1},
+    "throttled": {"rate_limit": 5}
+}
+ENGINES = [
+    "sync",
+    pytest.param("aiohttp", marks=pytest.mark.skipif(importlib.util.find_spec("aiohttp") is None,
+                                                     reason="aiohttp not installed")),
+    pytest.param("httpx", marks=pytest.mark.skipif(importlib.util.find_spec("httpx") is None,
+                                                   reason="httpx not installed"))
+]
+# Fast client pacing and extra retries, so the injected faults are hit and recovered from
+CLIENT_OPTIONS = {"rate": 100, "max_rate": 100, "max_retries": 6}
+
+@pytest.fixture(params=sorted(FAULTS))
+def fault(request):
+    return request.param
+
+@pytest.fixture
+def fake_wix(fault):
+    server = FakeWixServer(seed=7, **FAULTS[fault]).start()
+    yield server
+    server.stop()
+
+def assert_faults_served(fake_wix, fault):
+    stats = fake_wix.stats()
+    if fault == "errors":
+        assert stats["injected_errors"] > 0
+    if fault == "throttled":
+        assert stats["throttled"] > 0
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_complete_deployment(engine, fault, fake_wix, log_backend):
+    options = dict(CLIENT_OPTIONS, base_url=fake_wix.url, probe_origin=fake_wix.url, persist_manifest=False,
+                   probe_repeats=2, report_path=None, trace_dir=None, log_backend=log_backend)
+    if engine == "sync":
+        deployer = WixCompleteDeployment(**options)
+    else:
+        deployer = AsyncWixCompleteDeployment(backend=engine, **options)
+
+    report = deployer.execute_complete_deployment()
+
+    assert report is not None
+    assert {name: timing["status"] for name, timing in report["phases"].items()} == {
+        name: "success" for name, _ in DEPLOYMENT_PHASES
+    }
+    stats = fake_wix.stats()
+    assert stats["pages"] == 4
+    assert stats["functions"] == 7
+    assert stats["publishes"] == 1
+    assert_faults_served(fake_wix, fault)
+
+    # Post-launch probes stay on the fake server rather than the live domain
+    assert report["endpoint_health"]
+    for result in report["endpoint_health"].values():
+        assert result["url"].startswith(fake_wix.url)
+    if fault == "latency":
+        assert report["endpoint_health"]["home"]["latency_ms"]["p50"] >= 10
+
+def test_headless_deployment(fault, fake_wix, log_backend, headless_module, monkeypatch):
+    deployer = headless_module.WixHeadlessBlocksDeployer(
+        base_url=fake_wix.url, persist_manifest=False, log_backend=log_backend, **CLIENT_OPTIONS
+    )
+    monkeypatch.setattr(deployer, "save_deployment_results", lambda: None)
+    monkeypatch.setattr(deployer, "print_deployment_summary", lambda: None)
+
+    deployer.deploy_all_widgets()
+
+    results = deployer.deployment_results
+    assert results["status"] == "completed"
+    deployed = [widget_id for widget_id, result in results["widgets"].items() if result["status"] == "success"]
+    assert sorted(deployed) == ["ai-chat-agent", "ai-window-estimator", "product-browser"]
+    assert deployer.shared_stylesheet_url
+    assert fake_wix.stats()["blocks"] == len(deployed) + 1
+    assert_faults_served(fake_wix, fault)
+
+def test_redeploy_to_existing_site(log_backend):
+    """Collections left by the first run answer 409 on the second, which still completes"""
+    server = FakeWixServer().start()
+    try:
+        options = dict(CLIENT_OPTIONS, base_url=server.url, probe_origin=server.url, persist_manifest=False,
+                       probe_repeats=1, report_path=None, trace_dir=None, log_backend=log_backend)
+        for _ in range(2):
+            report = WixCompleteDeployment(**options).execute_complete_deployment()
+            assert {name: timing["status"] for name, timing in report["phases"].items()} == {
+                name: "success" for name, _ in DEPLOYMENT_PHASES
+            }
+    finally:
+        server.stop()
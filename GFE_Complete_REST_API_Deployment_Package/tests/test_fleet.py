@@ -0,0 +1,54 @@
+"""Fleet runs pace every site through one set of per-host rate limiters"""
+
+import json
+from types import SimpleNamespace
+
+from gfe_deploy.fake_wix import FakeWixServer
+from gfe_deploy.http_session import PooledSession
+from gfe_deploy.rate_limit import HostRateLimiters
+from gfe_deploy.structured_log import DeployLog
+from wix_rest_api_complete_deployment import WixCompleteDeployment, run_fleet
+
+API_URL = "https://www.wixapis.com/site-list/v2/sites"
+
+def test_sessions_sharing_limiters_pause_together():
+    limiters = HostRateLimiters(rate=5, max_rate=5)
+    first, second = PooledSession(limiters=limiters), PooledSession(limiters=limiters)
+    try:
+        assert first.limiter_for(API_URL) is second.limiter_for(API_URL)
+        assert first.limiter_for(API_URL) is not PooledSession().limiter_for(API_URL)
+
+        # A Retry-After seen by one site holds the other as well
+        first.limiter_for(API_URL).pause(30)
+        assert second.limiter_for(API_URL).try_acquire() > 29
+        assert list(second.rate_limit_stats()["hosts"]) == ["www.wixapis.com"]
+    finally:
+        first.close()
+        second.close()
+
+def test_fleet_sites_share_one_limiter_per_host(tmp_path, log_backend):
+    sites = [{"name": f"site-{index}", "meta_site_id": f"meta-{index}"} for index in range(3)]
+    fleet_file = tmp_path / "fleet.json"
+    fleet_file.write_text(json.dumps({"sites": sites}))
+    deployers = []
+
+    class RecordingDeployment(WixCompleteDeployment):
+        def __init__(self, **options):
+            super().__init__(**options)
+            deployers.append(self)
+
+    server = FakeWixServer().start()
+    host = server.url.split("://", 1)[1]
+    try:
+        args = SimpleNamespace(path=str(fleet_file), max_sites=3, output=str(tmp_path / "fleet-report.json"))
+        options = dict(base_url=server.url, probe_origin=server.url, persist_manifest=False, probe_repeats=1,
+                       trace_dir=None, log_backend=log_backend, pool_size=4, max_retries=3, rate=100, max_rate=100)
+        run_fleet(args, RecordingDeployment, options, DeployLog(log_backend))
+    finally:
+        server.stop()
+
+    report = json.loads((tmp_path / "fleet-report.json").read_text())
+    assert report["summary"]["succeeded"] == 3
+    assert len(deployers) == 3
+    assert len({id(deployer.session.limiters) for deployer in deployers}) == 1
+    assert host in deployers[0].session.rate_limit_stats()["hosts"]
@@ -0,0 +1,159 @@
+"""ImagePipeline offline: originals from a local directory, variants in a tmp cache"""
+
+import os
+
+import pytest
+
+from gfe_deploy import image_pipeline
+from gfe_deploy.image_pipeline import ImageCache, ImagePipeline, supported_formats
+
+Image = pytest.importorskip("PIL.Image")
+
+BASE_URL = "https://static.example.com/media/"
+# name: (category, size, mode); the widths each should get follow from CATEGORY_WIDTHS
+SOURCES = {
+    "logo.png": ("logos", (400, 400), "RGBA"),
+    "brand.jpg": ("brand_logos", (500, 250), "RGB"),
+    "hero.png": ("backgrounds", (1200, 800), "RGB")
+}
+EXPECTED_WIDTHS = {
+    "logo.png": [80, 160, 320, 400],
+    "brand.jpg": [80, 160, 320, 500],
+    "hero.png": [640, 1024, 1200]
+}
+
+@pytest.fixture
+def source_dir(tmp_path):
+    directory = tmp_path / "originals"
+    directory.mkdir()
+    for name, (_, size, mode) in SOURCES.items():
+        image = Image.new(mode, size, (212, 175, 55, 255)[:len(mode)])
+        image.paste((26, 35, 50, 255)[:len(mode)], (size[0] // 4, size[1] // 4, size[0] // 2, size[1] // 2))
+        image.save(directory / name)
+    return str(directory)
+
+@pytest.fixture
+def assets():
+    return {BASE_URL + name: (category, name.split(".")[0]) for name, (category, _, _) in SOURCES.items()}
+
+@pytest.fixture
+def formats():
+    formats = supported_formats()
+    if not formats:
+        pytest.skip("this Pillow build encodes neither AVIF nor WebP")
+    return formats
+
+def pipeline(assets, source_dir, cache_dir):
+    return ImagePipeline(assets, cache_dir, source_dir=source_dir, fetch_workers=2)
+
+def cached_objects(cache_dir):
+    """{path: mtime} of every object in the cache"""
+    objects = {}
+    for root, _, files in os.walk(os.path.join(cache_dir, "objects")):
+        for name in files:
+            path = os.path.join(root, name)
+            objects[path] = os.stat(path).st_mtime_ns
+    return objects
+
+def mark_uploaded(images):
+    """Give every variant the URL an upload would have"""
+    for image in images.values():
+        for variant in image["variants"]:
+            variant["url"] = f"https://cdn.example.com/{variant['sha256']}.{variant['extension']}"
+
+def test_prepare_builds_each_width_in_each_format(assets, source_dir, tmp_path, formats):
+    images = pipeline(assets, source_dir, str(tmp_path / "cache")).prepare()
+
+    assert set(images) == set(assets)
+    for name, widths in EXPECTED_WIDTHS.items():
+        image = images[BASE_URL + name]
+        assert (image["width"], image["height"]) == SOURCES[name][1]
+        assert sorted((variant["format"], variant["width"]) for variant in image["variants"]) == sorted(
+            (image_format, width) for image_format in formats for width in widths
+        )
+        for variant in image["variants"]:
+            path = os.path.join(str(tmp_path / "cache"), "objects", variant["sha256"][:2],
+                                f"{variant['sha256']}.{variant['extension']}")
+            with Image.open(path) as encoded:
+                assert encoded.format == variant["format"].upper()
+                assert encoded.size == (variant["width"], variant["height"])
+
+def test_second_run_is_served_from_the_cache(assets, source_dir, tmp_path, formats, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first = pipeline(assets, source_dir, cache_dir)
+    first_images = first.prepare()
+    assert first.fetched == len(assets)
+    objects = cached_objects(cache_dir)
+
+    def no_encoding(*args):
+        raise AssertionError("variant re-encoded")
+
+    monkeypatch.setattr(ImagePipeline, "encode", no_encoding)
+    second = pipeline(assets, source_dir, cache_dir)
+    assert second.prepare() == first_images
+    assert second.fetched == 0
+    assert cached_objects(cache_dir) == objects
+
+    # The index on disk finds the same objects in a later process
+    on_disk = ImageCache(cache_dir)
+    for url in assets:
+        assert on_disk.lookup("sources", url)
+
+def test_without_pillow_assets_are_cached_but_html_is_untouched(assets, source_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(image_pipeline, "Image", None)
+    images = pipeline(assets, source_dir, str(tmp_path / "cache"))
+    assert images.formats == []
+    prepared = images.prepare()
+    assert all(image["variants"] == [] for image in prepared.values())
+    html = f'<img src="{BASE_URL}logo.png" alt="Logo">'
+    assert images.rewrite(html) == html
+
+@pytest.fixture
+def prepared(assets, source_dir, tmp_path, formats):
+    images = pipeline(assets, source_dir, str(tmp_path / "cache"))
+    mark_uploaded(images.prepare())
+    return images
+
+def variant_urls(prepared, name, image_format):
+    image = prepared.images[BASE_URL + name]
+    return [f"{variant['url']} {variant['width']}w" for variant in image["variants"]
+            if variant["format"] == image_format]
+
+def test_rewrite_double_quoted_src(prepared):
+    html = prepared.rewrite(f'<p><img src="{BASE_URL}logo.png" alt="Logo"></p>')
+
+    fallback = "webp" if "webp" in prepared.formats else prepared.formats[0]
+    largest = variant_urls(prepared, "logo.png", fallback)[-1].split(" ")[0]
+    img = f'<img src="{largest}" srcset="{", ".join(variant_urls(prepared, "logo.png", fallback))}" ' \
+          f'sizes="160px" width="400" height="400" alt="Logo">'
+    if "avif" in prepared.formats and fallback != "avif":
+        avif = ", ".join(variant_urls(prepared, "logo.png", "avif"))
+        assert html == f'<p><picture><source type="image/avif" srcset="{avif}" sizes="160px">{img}</picture></p>'
+    else:
+        assert html == f"<p>{img}</p>"
+    assert BASE_URL not in html
+
+def test_rewrite_single_quoted_src_keeps_given_width_and_scales_height(prepared):
+    html = prepared.rewrite(f"<img class='hero' src='{BASE_URL}hero.png' width='600'>")
+
+    assert BASE_URL not in html
+    assert "<img class='hero' src=\"https://cdn.example.com/" in html
+    assert 'sizes="100vw"' in html
+    assert "width='600'" in html and html.count("width=") == 1
+    assert 'height="400"' in html
+    assert "1200w" in html and "640w" in html
+
+def test_rewrite_fills_in_missing_width_only_for_pixel_heights(prepared):
+    html = prepared.rewrite(f'<img src="{BASE_URL}brand.jpg" height="50">')
+    assert 'width="100"' in html and html.count("height=") == 1
+
+    html = prepared.rewrite(f'<img src="{BASE_URL}brand.jpg" width="100%">')
+    assert 'width="100%"' in html and "height=" not in html
+
+def test_rewrite_leaves_tags_with_srcset_alone(prepared):
+    html = f'<img src="{BASE_URL}logo.png" srcset="{BASE_URL}logo@2x.png 2x">'
+    assert prepared.rewrite(html) == html
+
+def test_rewrite_leaves_unknown_src_alone(prepared):
+    html = '<img src="https://elsewhere.example.com/photo.png" alt="">'
+    assert prepared.rewrite(html) == html
@@ -0,0 +1,69 @@
+"""Phase failures and skipped dependants in PhaseScheduler and AsyncPhaseScheduler"""
+
+import asyncio
+
+import pytest
+
+from gfe_deploy.async_engine import AsyncPhaseScheduler
+from gfe_deploy.scheduler import Phase, PhaseScheduler
+
+def phases(results, ran, wrap=lambda func: func):
+    """install -> (pages, media) -> launch, where each phase returns results.get(name)"""
+    def phase(name, *depends_on):
+        def func():
+            ran.append(name)
+            outcome = results.get(name)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return Phase(name, wrap(func), depends_on)
+
+    return [
+        phase("install"),
+        phase("pages", "install"),
+        phase("media", "install"),
+        phase("launch", "pages", "media")
+    ]
+
+def as_coroutine(func):
+    async def run():
+        return func()
+    return run
+
+def run_sync(results, ran):
+    scheduler = PhaseScheduler(phases(results, ran))
+    scheduler.run()
+    return scheduler.timings
+
+def run_async(results, ran):
+    scheduler = AsyncPhaseScheduler(phases(results, ran, as_coroutine))
+    asyncio.run(scheduler.run())
+    return scheduler.timings
+
+@pytest.fixture(params=[run_sync, run_async], ids=["sync", "async"])
+def run(request):
+    return request.param
+
+def test_failed_phase_skips_its_dependants(run):
+    ran = []
+    timings = run({"pages": False}, ran)
+
+    assert sorted(ran) == ["install", "media", "pages"]
+    assert {name: timing["status"] for name, timing in timings.items()} == {
+        "install": "success", "pages": "failed", "media": "success", "launch": "skipped"
+    }
+    assert timings["launch"]["blocked_by"] == ["pages"]
+
+def test_failed_prerequisite_skips_the_whole_chain(run):
+    ran = []
+    timings = run({"install": False}, ran)
+
+    assert ran == ["install"]
+    assert [name for name, timing in timings.items() if timing["status"] == "skipped"] == ["pages", "media", "launch"]
+    assert timings["launch"]["blocked_by"] == ["pages", "media"]
+
+def test_raising_phase_is_reraised_and_dependants_skipped(run):
+    ran = []
+    with pytest.raises(RuntimeError):
+        run({"install": RuntimeError("no site")}, ran)
+    assert ran == ["install"]
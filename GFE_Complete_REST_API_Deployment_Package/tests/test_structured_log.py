@@ -0,0 +1,48 @@
+"""LogBackend flushes and closes without losing records or hanging"""
+
+import threading
+
+from gfe_deploy.structured_log import DeployLog, LogBackend
+
+def test_flush_writes_everything_logged_so_far():
+    backend = LogBackend([])
+    lines = []
+    log = DeployLog(backend, buffer=lines)
+    for index in range(100):
+        log(f"step {index}")
+    assert log.flush()
+    assert len(lines) == 100
+    backend.close()
+
+def test_records_logged_after_close_are_still_written():
+    backend = LogBackend([])
+    lines = []
+    log = DeployLog(backend, buffer=lines)
+    log("before")
+    backend.close()
+    log("after", "WARNING")
+    assert log.flush()
+    assert [line.split(" ", 1)[1] for line in lines] == ["INFO: before", "WARNING: after"]
+
+def test_flush_racing_close_never_hangs():
+    for _ in range(20):
+        backend = LogBackend([])
+        lines = []
+        log = DeployLog(backend, buffer=lines)
+        start = threading.Barrier(5)
+
+        def log_and_flush():
+            start.wait()
+            for index in range(50):
+                log(f"line {index}")
+                log.flush(timeout=5)
+
+        threads = [threading.Thread(target=log_and_flush) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        backend.close()
+        for thread in threads:
+            thread.join(timeout=10)
+            assert not thread.is_alive()
+        assert len(lines) == 200
@@ -0,0 +1,33 @@
+"""Theme color swaps in TemplateRegistry"""
+
+from gfe_deploy.templates import TemplateCache, TemplateRegistry
+
+def registry(**theme):
+    return TemplateRegistry(theme=theme, cache=TemplateCache())
+
+def test_swaps_every_form_of_a_palette_color():
+    themed = registry(secondary_color="#3366cc").substitute(
+        "a{color:#D4AF37;border:1px solid rgb(212,175,55);"
+        "background:rgba(212, 175, 55, 0.3);outline-color:rgb(212 175 55 / 50%)}"
+    )
+    assert themed == (
+        "a{color:#3366cc;border:1px solid rgb(51, 102, 204);"
+        "background:rgba(51, 102, 204, 0.3);outline-color:rgb(51, 102, 204, 50%)}"
+    )
+
+def test_swaps_shorthand_hex():
+    assert registry(text_color="#222222").substitute("color:#fff;fill:#FFFFFF") == "color:#222222;fill:#222222"
+
+def test_leaves_other_colors_and_longer_hex_alone():
+    text = "color:#d4af37aa;background:#888;border-color:rgba(0, 0, 0, 0.8)"
+    assert registry(secondary_color="#3366cc", text_color="#000000").substitute(text) == text
+
+def test_named_theme_color_keeps_authored_alpha_forms():
+    themed = registry(secondary_color="gold").substitute("color:#d4af37;background:rgba(212, 175, 55, 0.3)")
+    assert themed == "color:gold;background:rgba(212, 175, 55, 0.3)"
+
+def test_rendered_widget_has_no_authored_gold_left():
+    page = registry(secondary_color="#3366cc").render("widgets/product-browser.html")
+    assert "#d4af37" not in page.lower()
+    assert "212, 175, 55" not in page
+    assert "rgba(51, 102, 204, 0.3)" in page
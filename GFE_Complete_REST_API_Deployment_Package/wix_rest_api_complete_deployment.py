@@ -4,24 +4,183 @@ Good Faith Exteriors - Complete REST API Deployment Script
 Installs, launches, and configures all systems with mapped endpoints for goodfaithexteriors.com
 """
 
+import argparse
+import asyncio
 import json
-import requests
 import os
+import sys
 import time
 import base64
 from datetime import datetime
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
+
+HEADLESS_APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gfe-headless-blocks-app')
+sys.path.insert(0, HEADLESS_APP_DIR)
+
+from gfe_deploy.async_engine import (
+    ASYNC_BACKENDS,
+    FATAL_STATUSES,
+    AsyncBulkInserter,
+    AsyncEndpointProber,
+    AsyncPhaseScheduler,
+    AsyncSession,
+    FatalApiError,
+    run_steps_async
+)
+from gfe_deploy.benchmark import (
+    DEFAULT_BENCHMARK_CONCURRENCY,
+    DEFAULT_BENCHMARK_DURATION,
+    DEFAULT_BENCHMARK_RATE,
+    LoadGenerator,
+    product_catalog
+)
+from gfe_deploy.bulk_insert import DEFAULT_BATCH_SIZE, DEFAULT_INSERT_WORKERS, BulkInserter
+from gfe_deploy.bundler import AssetBundler
+from gfe_deploy.catalog_import import CatalogImporter
+from gfe_deploy.fake_wix import DEFAULT_BASE_URL, add_fake_wix_arguments, fake_wix_from_args, manifest_scope
+from gfe_deploy.fleet import DEFAULT_FLEET_REPORT, DEFAULT_MAX_SITES, FleetDeployment, load_fleet, site_slug
+from gfe_deploy.health_check import DEFAULT_PROBE_REPEATS, DEFAULT_PROBE_WORKERS, EndpointProber
+from gfe_deploy.http_session import DEFAULT_MAX_RETRIES, DEFAULT_POOL_SIZE, PooledSession
+from gfe_deploy.image_pipeline import DEFAULT_IMAGE_CACHE, ImagePipeline, add_image_arguments, image_assets
+from gfe_deploy.manifest import MANIFEST_FILENAME, DeploymentManifest, content_hash
+from gfe_deploy.media_upload import DEFAULT_MEDIA_DIR, UPLOAD_TIMEOUT, deploy_media_steps
+from gfe_deploy.rate_limit import DEFAULT_MAX_RATE, DEFAULT_RATE, HostRateLimiters
+from gfe_deploy.results import ErrorLog, LogBuffer
+from gfe_deploy.scheduler import Phase, PhaseScheduler
+from gfe_deploy.structured_log import DeployLog, add_logging_arguments, log_backend_from_args
+from gfe_deploy.steps import ApiCall, BlockingCall, BulkInsert, ProbeEndpoints, StreamUpload, run_steps
+from gfe_deploy.templates import TemplateRegistry, load_theme
+from gfe_deploy.tracing import TRACE_FILENAME, Tracer, trace_paths
+from gfe_deploy.stub_server import FunctionStore, StubServer, http_function_routes
+
+SUPPORTED_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+REPORT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'complete_deployment_report.json')
+LANDING_PAGE_TEMPLATE = 'landing-page/index.html'
+DEFAULT_LANDING_TEMPLATE = 'pages/default-landing.html'
+CONTACT_PAGE_TEMPLATE = 'pages/contact.html'
+TRACE_SERVICE_NAME = "gfe-complete-deployment"
+DATA_INDEXES_ENDPOINT = "/wix-data/v2/indexes"
+BENCHMARK_CATALOG_SIZE = 500
+WRITE_QUEUE_COLLECTION = "GFE_WriteQueue"
+# A plain backend module: unlike a .jsw web module, its exports cannot be called from the browser
+WRITE_QUEUE_MODULE = "backend/writeQueue.js"
+LEGACY_WRITE_QUEUE_MODULE = "backend/writeQueue.jsw"
+# The only collections the queue may write to
+WRITE_QUEUE_TARGETS = ("GFE_Quotes", "GFE_Leads")
+WRITE_QUEUE_BATCH_SIZE = 500
+# Wix scheduled jobs run at most hourly; handlers also kick a drain every N writes
+WRITE_QUEUE_CRON = "0 * * * *"
+WRITE_QUEUE_FLUSH_EVERY = 50
+WRITE_BEHIND_HANDLERS = ("quote-handler", "lead-handler")
+# Partial chat replies, saved by post_chat while the model streams and polled by the chat widget
+CHAT_STREAM_COLLECTION = "GFE_ChatStreams"
+
+# Time, a per-instance counter and a random suffix: two inserts in the same
+# millisecond, on one instance or several, never share an id
+QUOTE_ID_FUNCTION = """
+            let quoteSequence = 0;
+
+            function newQuoteId() {
+                quoteSequence = (quoteSequence + 1) % 1296;
+                return 'GFE-' + Date.now().toString(36).toUpperCase() +
+                    '-' + quoteSequence.toString(36).padStart(2, '0').toUpperCase() +
+                    '-' + Math.random().toString(36).slice(2, 8).toUpperCase();
+            }
+"""
+
+# The catalog collection gets a phase of its own, so seeding waits for it alone
+PRODUCT_COLLECTION = "GFE_WindowProducts"
+
+# Deployment phase DAG: (phase method, phases it must wait for)
+DEPLOYMENT_PHASES = [
+    ("install_site", ()),
+    ("optimize_images", ()),
+    ("create_product_collection", ("install_site",)),
+    ("create_data_collections", ("install_site",)),
+    ("deploy_pages", ("install_site", "optimize_images")),
+    ("upload_media_assets", ("install_site",)),
+    ("configure_domain_mapping", ("install_site",)),
+    ("setup_api_endpoints", ("install_site",)),
+    ("populate_sample_data", ("create_product_collection",)),
+    ("launch_system", (
+        "create_data_collections",
+        "deploy_pages",
+        "upload_media_assets",
+        "configure_domain_mapping",
+        "setup_api_endpoints",
+        "populate_sample_data"
+    ))
+]
 
 class WixCompleteDeployment:
-    def __init__(self):
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+                 rate=DEFAULT_RATE, max_rate=DEFAULT_MAX_RATE, force=False, minify=True,
+                 batch_size=DEFAULT_BATCH_SIZE, insert_workers=DEFAULT_INSERT_WORKERS,
+                 probe_repeats=DEFAULT_PROBE_REPEATS, probe_workers=DEFAULT_PROBE_WORKERS, probe_origin=None,
+                 base_url=DEFAULT_BASE_URL, persist_manifest=True, write_behind=False,
+                 site=None, report_path=REPORT_PATH, limiters=None,
+                 trace_dir=os.path.dirname(os.path.abspath(__file__)), log_backend=None,
+                 optimize_images=False, image_source_dir=None, image_cache=None):
         self.config = self.load_credentials()
-        self.base_url = "https://www.wixapis.com"
+        self.site = site or {}
+        self.site_name = self.site.get('name')
+        if site:
+            self.apply_site(site)
+        self.report_path = report_path
+        self.force = force
+        self.write_behind = write_behind
+        self.batch_size = batch_size
+        self.insert_workers = insert_workers
+        self.probe_repeats = probe_repeats
+        self.probe_workers = probe_workers
+        self.probe_origin = probe_origin.rstrip("/") if probe_origin else None
+        self.endpoint_health = {}
+        self.data_imports = {}
+        self.media_assets = {}
+        self.bundler = AssetBundler() if minify else None
+        self.manifest = DeploymentManifest(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), MANIFEST_FILENAME) if persist_manifest else None,
+            manifest_scope(self.config['wix']['headless']['meta_site_id'], base_url)
+        )
+        self.base_url = base_url
         self.headers = self.setup_headers()
-        self.deployment_log = []
+        self.session = self.make_session(pool_size, max_retries, rate, max_rate, limiters)
+        log_name = f"deployment-{site_slug(self.site_name)}.log" if self.site_name else 'deployment.log'
+        self.deployment_log = LogBuffer(
+            spill_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), log_name)
+        )
+        self.logger = DeployLog(log_backend, buffer=self.deployment_log, site=self.site_name)
+        self.errors = ErrorLog()
         self.endpoints = {}
         self.site_id = None
-        self.domain = "goodfaithexteriors.com"
+        self.domain = self.config['domain']
+        self.templates = TemplateRegistry(HEADLESS_APP_DIR, self.config['theme'], {"domain": self.domain})
+        self.images = self.load_image_pipeline(image_source_dir, image_cache) if optimize_images else None
+        self.phase_timings = {}
+        self.critical_path = {}
+        self.tracer = Tracer(TRACE_SERVICE_NAME, {
+            "gcp.project_id": self.config['google']['project_id'],
+            "gfe.site_id": self.config['wix']['headless']['meta_site_id'],
+            "gfe.site_name": self.site_name
+        })
+        self.trace_dir = trace_dir
+        self.trace_files = trace_paths(trace_dir, self.trace_name()) if trace_dir else {}
         
+    def make_session(self, pool_size, max_retries, rate, max_rate, limiters=None):
+        """The HTTP session every API call goes through; engines override this
+
+        limiters, a HostRateLimiters, paces this deployer together with others
+        (a fleet's sites) instead of on its own.
+        """
+        return PooledSession(
+            pool_size=pool_size,
+            max_retries=max_retries,
+            rate=rate,
+            max_rate=max_rate,
+            log=self.log,
+            limiters=limiters
+        )
+
     def load_credentials(self):
         """Load all credentials and configuration"""
         return {
@@ -44,15 +203,36 @@ class WixCompleteDeployment:
                 "service_account": "837326026335-compute@developer.gserviceaccount.com"
             },
             "domain": "goodfaithexteriors.com",
-            "theme": {
-                "primary_color": "#1a2332",
-                "secondary_color": "#d4af37",
-                "accent_color": "#c0c0c0",
-                "text_color": "#ffffff",
-                "background_color": "#0f1419"
-            }
+            "theme": load_theme(os.path.join(HEADLESS_APP_DIR, 'config', 'app-config.json'))
         }
 
+    def load_image_pipeline(self, source_dir=None, cache_dir=None):
+        """ImagePipeline for the image_assets listed in the app's app-config.json"""
+        with open(os.path.join(HEADLESS_APP_DIR, 'config', 'app-config.json'), 'r', encoding='utf-8') as f:
+            assets = image_assets(json.load(f))
+        return ImagePipeline(
+            assets,
+            cache_dir or os.path.join(HEADLESS_APP_DIR, DEFAULT_IMAGE_CACHE),
+            source_dir=source_dir,
+            log=self.log
+        )
+
+    def apply_site(self, site):
+        """Point the configuration at another site from a fleet file
+
+        meta_site_id is required; domain, account_id, api_token and theme fall
+        back to the Good Faith Exteriors values, and site_config entries
+        override the Sites API settings sent by install_site.
+        """
+        headless = self.config['wix']['headless']
+        headless['meta_site_id'] = site['meta_site_id']
+        for key in ('account_id', 'api_token'):
+            if site.get(key):
+                headless[key] = site[key]
+        if site.get('domain'):
+            self.config['domain'] = site['domain']
+        self.config['theme'].update(site.get('theme') or {})
+
     def setup_headers(self):
         """Setup API headers with authentication"""
         return {
@@ -64,38 +244,116 @@ class WixCompleteDeployment:
 
     def log(self, message, level="INFO"):
         """Log deployment messages"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {level}: {message}"
-        print(log_entry)
-        self.deployment_log.append(log_entry)
+        self.logger(message, level)
 
     def make_api_request(self, method, endpoint, data=None, params=None):
         """Make authenticated API request to Wix"""
         url = urljoin(self.base_url, endpoint)
         
         try:
-            if method.upper() == "GET":
-                response = requests.get(url, headers=self.headers, params=params, timeout=30)
-            elif method.upper() == "POST":
-                response = requests.post(url, headers=self.headers, json=data, timeout=30)
-            elif method.upper() == "PUT":
-                response = requests.put(url, headers=self.headers, json=data, timeout=30)
-            elif method.upper() == "PATCH":
-                response = requests.patch(url, headers=self.headers, json=data, timeout=30)
-            elif method.upper() == "DELETE":
-                response = requests.delete(url, headers=self.headers, timeout=30)
-            else:
+            if method.upper() not in SUPPORTED_METHODS:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
-            self.log(f"API {method} {endpoint}: {response.status_code}")
+            # GET and DELETE carry no JSON body
+            body = data if method.upper() in ("POST", "PUT", "PATCH") else None
+            response = self.session.request(
+                method.upper(),
+                url,
+                headers=self.headers,
+                params=params,
+                json=body,
+                timeout=30
+            )
+            
+            self.record_response(method, endpoint, response)
             return response
             
         except Exception as e:
-            self.log(f"API request failed: {str(e)}", "ERROR")
+            self.record_request_failure(method, endpoint, e)
             return None
 
+    def stream_upload(self, method, url, body, headers):
+        """Stream a file body to a pre-signed upload URL; the URL carries its own authorization"""
+        endpoint = urlsplit(url).path
+        try:
+            response = self.session.request(method, url, headers=headers, data=body, timeout=UPLOAD_TIMEOUT)
+        except Exception as e:
+            self.record_request_failure(method, endpoint, e)
+            return None
+        
+        self.record_response(method, endpoint, response)
+        return response
+
+    def record_response(self, method, endpoint, response):
+        """Log an API answer and keep it in the error log if it was rejected"""
+        self.log(f"API {method} {endpoint}: {response.status_code}")
+        if response.status_code >= 400:
+            self.errors.record("API request rejected", response.status_code, f"{method.upper()} {endpoint}", response.text)
+
+    def record_request_failure(self, method, endpoint, error):
+        """Log an API call that got no answer at all"""
+        self.log(f"API request failed: {str(error)}", "ERROR")
+        self.errors.record("API request failed", endpoint=f"{method.upper()} {endpoint}", body=str(error))
+
+    def drive(self, steps):
+        """Run deployment steps with blocking I/O, one step after another"""
+        return run_steps(steps, self.perform)
+
+    def perform(self, effect):
+        """Carry out one ApiCall, StreamUpload, BulkInsert, ProbeEndpoints or BlockingCall step"""
+        if isinstance(effect, ApiCall):
+            return self.make_api_request(*effect)
+        if isinstance(effect, StreamUpload):
+            return self.stream_upload(*effect)
+        if isinstance(effect, BlockingCall):
+            return effect.func(*effect.args)
+        if isinstance(effect, BulkInsert):
+            return self.bulk_insert(*effect)
+        if isinstance(effect, ProbeEndpoints):
+            return self.probe_endpoints(effect.endpoints)
+        raise TypeError(f"Unknown deployment step: {effect!r}")
+
+    def deploy_artifact(self, kind, key, payload, create_endpoint, update_endpoint, update_method="PATCH"):
+        """Upload an artifact unless the manifest shows identical content already deployed
+        
+        Known artifacts are sent to update_endpoint (formatted with the remote id);
+        new ones, or ones whose remote copy has gone, are POSTed to create_endpoint.
+        Returns (response, action); response is None when unchanged or on request failure.
+        """
+        return self.drive(self.deploy_artifact_steps(kind, key, payload, create_endpoint, update_endpoint, update_method))
+
+    def deploy_artifact_steps(self, kind, key, payload, create_endpoint, update_endpoint, update_method="PATCH"):
+        """Steps behind deploy_artifact()"""
+        digest = content_hash(payload)
+        if not self.force and self.manifest.is_unchanged(kind, key, digest):
+            return None, "unchanged"
+        
+        entry = self.manifest.lookup(kind, key)
+        response = None
+        if entry and entry.get("remote_id"):
+            response = yield ApiCall(update_method, update_endpoint.format(id=entry["remote_id"]), payload)
+            action = "updated"
+            if response is not None and response.status_code == 404:
+                self.manifest.forget(kind, key)
+                entry = None
+        if not entry or not entry.get("remote_id"):
+            response = yield ApiCall("POST", create_endpoint, payload)
+            action = "created"
+        
+        if response is not None and response.status_code in [200, 201]:
+            try:
+                remote_id = response.json().get("id")
+            except ValueError:
+                remote_id = None
+            self.manifest.record(kind, key, digest, remote_id or (entry or {}).get("remote_id"))
+        return response, action
+
     def install_site(self):
         """Install and configure the main Wix site"""
+        return self.drive(self.install_site_steps())
+
+    def install_site_steps(self):
+        """Steps behind install_site()"""
         self.log("🚀 Installing Wix Site...")
         
         # Create/Update site configuration
@@ -121,9 +379,10 @@ class WixCompleteDeployment:
                 "keywords": ["windows", "doors", "installation", "Long Island", "AI estimation", "quotes"]
             }
         }
+        site_config.update(self.site.get('site_config') or {})
         
         # Update site via Sites API
-        response = self.make_api_request(
+        response = yield ApiCall(
             "PATCH", 
             f"/sites/v1/sites/{self.config['wix']['headless']['meta_site_id']}", 
             site_config
@@ -138,11 +397,9 @@ class WixCompleteDeployment:
             self.site_id = self.config['wix']['headless']['meta_site_id']
             return True
 
-    def create_data_collections(self):
-        """Create all necessary data collections"""
-        self.log("📊 Creating Data Collections...")
-        
-        collections = [
+    def get_collection_definitions(self):
+        """Get the data collection schemas used by the site"""
+        return [
             {
                 "id": "GFE_Leads",
                 "displayName": "Leads",
@@ -174,10 +431,17 @@ class WixCompleteDeployment:
                     {"key": "status", "type": "text", "displayName": "Status"},
                     {"key": "quoteData", "type": "object", "displayName": "Quote Data"},
                     {"key": "createdDate", "type": "dateTime", "displayName": "Created Date"}
+                ],
+                "indexes": [
+                    {
+                        "name": "quoteId_unique",
+                        "fields": [{"path": "quoteId", "order": "ASC"}],
+                        "unique": True
+                    }
                 ]
             },
             {
-                "id": "GFE_WindowProducts",
+                "id": PRODUCT_COLLECTION,
                 "displayName": "Window Products",
                 "fields": [
                     {"key": "name", "type": "text", "displayName": "Product Name"},
@@ -208,36 +472,141 @@ class WixCompleteDeployment:
                     {"key": "createdDate", "type": "dateTime", "displayName": "Created Date"},
                     {"key": "lastActivity", "type": "dateTime", "displayName": "Last Activity"}
                 ]
-            }
-        ]
+            },
+            self.get_chat_stream_definition()
+        ] + ([self.get_write_queue_definition()] if self.write_behind else [])
+
+    def get_chat_stream_definition(self):
+        """Schema of the short-lived partial replies the chat widget polls"""
+        return {
+            "id": CHAT_STREAM_COLLECTION,
+            "displayName": "Chat Streams",
+            "fields": [
+                {"key": "requestId", "type": "text", "displayName": "Request ID"},
+                {"key": "text", "type": "text", "displayName": "Reply So Far"},
+                {"key": "done", "type": "boolean", "displayName": "Done"},
+                {"key": "error", "type": "text", "displayName": "Error"},
+                {"key": "updatedDate", "type": "dateTime", "displayName": "Updated Date"}
+            ],
+            "indexes": [
+                {
+                    "name": "requestId_unique",
+                    "fields": [{"path": "requestId", "order": "ASC"}],
+                    "unique": True
+                }
+            ]
+        }
+
+    def get_write_queue_definition(self):
+        """Schema of the queue the write-behind handlers append to"""
+        return {
+            "id": WRITE_QUEUE_COLLECTION,
+            "displayName": "Write Queue",
+            "fields": [
+                {"key": "target", "type": "text", "displayName": "Target Collection"},
+                {"key": "key", "type": "text", "displayName": "Lookup Key"},
+                {"key": "payload", "type": "object", "displayName": "Payload"},
+                {"key": "attempts", "type": "number", "displayName": "Attempts"},
+                {"key": "lastError", "type": "text", "displayName": "Last Error"},
+                {"key": "enqueuedDate", "type": "dateTime", "displayName": "Enqueued Date"}
+            ],
+            "indexes": [
+                {
+                    "name": "target_key",
+                    "fields": [{"path": "target", "order": "ASC"}, {"path": "key", "order": "ASC"}],
+                    "unique": False
+                }
+            ]
+        }
+
+    def get_collection_fields(self, collection_id):
+        """Get the field list of one data collection"""
+        for collection in self.get_collection_definitions():
+            if collection["id"] == collection_id:
+                return collection["fields"]
+        raise ValueError(f"Unknown collection: {collection_id}")
+
+    def create_product_collection(self):
+        """Create the product catalog collection and its indexes"""
+        return self.drive(self.create_product_collection_steps())
+
+    def create_product_collection_steps(self):
+        """Steps behind create_product_collection()"""
+        collection = next(
+            collection for collection in self.get_collection_definitions() if collection["id"] == PRODUCT_COLLECTION
+        )
+        return (yield from self.create_collection_steps(collection))
+
+    def create_data_collections(self):
+        """Create the remaining data collections"""
+        return self.drive(self.create_data_collections_steps())
+
+    def create_data_collections_steps(self):
+        """Steps behind create_data_collections()"""
+        self.log("📊 Creating Data Collections...")
         
-        success_count = 0
-        for collection in collections:
-            response = self.make_api_request(
-                "POST", 
-                "/data/v1/collections", 
-                collection
-            )
-            
-            if response and response.status_code in [200, 201]:
-                self.log(f"✅ Collection created: {collection['id']}")
-                success_count += 1
-            else:
-                self.log(f"⚠️ Collection creation failed: {collection['id']}", "WARNING")
+        collections = [
+            collection for collection in self.get_collection_definitions() if collection["id"] != PRODUCT_COLLECTION
+        ]
+        created = yield [self.create_collection_steps(collection) for collection in collections]
+        success_count = sum(created)
         
         self.log(f"📊 Collections setup: {success_count}/{len(collections)} successful")
         return success_count > 0
 
+    def create_collection_steps(self, collection):
+        """Create one collection, then its indexes; returns whether the collection is ready
+
+        A collection left by an earlier deploy (409) counts as ready, so a
+        redeploy does not fail the phase and skip the phases waiting on it.
+        """
+        response = yield ApiCall(
+            "POST", 
+            "/data/v1/collections", 
+            {key: value for key, value in collection.items() if key != "indexes"}
+        )
+        
+        ready = response is not None and response.status_code in [200, 201, 409]
+        if ready and response.status_code == 409:
+            self.log(f"⏭️ Collection already exists: {collection['id']}")
+        elif ready:
+            self.log(f"✅ Collection created: {collection['id']}")
+        else:
+            self.log(f"⚠️ Collection creation failed: {collection['id']}", "WARNING")
+        
+        # Indexes are created even when the collection already existed
+        for index in collection.get("indexes", []):
+            yield from self.create_collection_index_steps(collection['id'], index)
+        return ready
+
+    def create_collection_index(self, collection_id, index):
+        """Create one index on a collection; an index that already exists counts as created"""
+        return self.drive(self.create_collection_index_steps(collection_id, index))
+
+    def create_collection_index_steps(self, collection_id, index):
+        """Steps behind create_collection_index()"""
+        response = yield ApiCall(
+            "POST",
+            DATA_INDEXES_ENDPOINT,
+            {"dataCollectionId": collection_id, "index": index}
+        )
+        if response is not None and response.status_code in [200, 201, 409]:
+            self.log(f"🗂️ Index ready: {collection_id}.{index['name']}")
+            return True
+        self.log(f"⚠️ Index creation failed: {collection_id}.{index['name']}", "WARNING")
+        return False
+
     def deploy_pages(self):
         """Deploy all website pages"""
+        return self.drive(self.deploy_pages_steps())
+
+    def deploy_pages_steps(self):
+        """Steps behind deploy_pages()"""
         self.log("📄 Deploying Website Pages...")
         
         # Load landing page HTML
-        landing_page_path = "/home/ubuntu/gfe-headless-blocks-app/landing-page/index.html"
-        if os.path.exists(landing_page_path):
-            with open(landing_page_path, 'r', encoding='utf-8') as f:
-                landing_html = f.read()
-        else:
+        landing_html = self.templates.render(LANDING_PAGE_TEMPLATE)
+        if landing_html is None:
             self.log("Landing page file not found, using default", "WARNING")
             landing_html = self.get_default_landing_page()
         
@@ -288,156 +657,92 @@ class WixCompleteDeployment:
             }
         ]
         
-        success_count = 0
-        for page in pages:
-            response = self.make_api_request(
-                "POST", 
-                f"/sites/v1/sites/{self.site_id}/pages", 
-                page
-            )
-            
-            if response and response.status_code in [200, 201]:
-                self.log(f"✅ Page deployed: {page['title']}")
-                success_count += 1
-                
-                # Store endpoint
-                self.endpoints[page['slug'] or 'home'] = {
-                    "url": f"https://{self.domain}{page['url']}",
-                    "title": page['title'],
-                    "type": "page"
-                }
-            else:
-                self.log(f"⚠️ Page deployment failed: {page['title']}", "WARNING")
+        # Known image assets become srcset variants before minification
+        if self.images:
+            for page in pages:
+                page['html'] = self.images.rewrite(page['html'])
+        
+        # Pages are standalone documents, so they are minified but keep their styles inline
+        if self.bundler:
+            for page in pages:
+                page['html'] = self.bundler.bundle_page(page['slug'] or 'home', page['html'])
+        
+        deployed = yield [self.deploy_page_steps(page) for page in pages]
+        success_count = sum(deployed)
         
         self.log(f"📄 Pages deployed: {success_count}/{len(pages)} successful")
         return success_count > 0
 
+    def deploy_page_steps(self, page):
+        """Upload one page and record its endpoint; returns whether it is live"""
+        response, action = yield from self.deploy_artifact_steps(
+            "pages",
+            page['slug'] or 'home',
+            page,
+            f"/sites/v1/sites/{self.site_id}/pages",
+            f"/sites/v1/sites/{self.site_id}/pages/{{id}}"
+        )
+        
+        if action == "unchanged" or (response and response.status_code in [200, 201]):
+            self.log(f"✅ Page {action}: {page['title']}")
+            
+            # Store endpoint
+            self.endpoints[page['slug'] or 'home'] = {
+                "url": f"https://{self.domain}{page['url']}",
+                "title": page['title'],
+                "type": "page"
+            }
+            return True
+        self.log(f"⚠️ Page deployment failed: {page['title']}", "WARNING")
+        return False
+
+    def optimize_images(self):
+        """Fetch, resize and convert the image assets and upload their srcset variants"""
+        return self.drive(self.optimize_images_steps())
+
+    def optimize_images_steps(self):
+        """Steps behind optimize_images(); a no-op unless the image pipeline is enabled"""
+        if not self.images:
+            return True
+        self.log("🖼️ Optimizing image assets...")
+        images = yield BlockingCall(self.images.prepare)
+        live = yield from self.images.upload_steps(self.manifest, self.force)
+        return bool(images) and live == sum(len(image["variants"]) for image in images.values())
+
+    def upload_media_assets(self):
+        """Upload the large media assets (video backgrounds, 3D previews) under the app's media directory"""
+        return self.drive(self.upload_media_assets_steps())
+
+    def upload_media_assets_steps(self):
+        """Steps behind upload_media_assets()"""
+        self.media_assets = yield from deploy_media_steps(
+            os.path.join(HEADLESS_APP_DIR, DEFAULT_MEDIA_DIR),
+            self.manifest,
+            self.force,
+            log=self.log
+        )
+        return all(result["status"] == "success" for result in self.media_assets.values())
+
     def get_default_landing_page(self):
         """Get default landing page HTML"""
-        return """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Good Faith Exteriors - Premium Windows & Doors</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                body { font-family: Arial, sans-serif; margin: 0; padding: 0; background: #1a2332; color: #fff; }
-                .container { max-width: 1200px; margin: 0 auto; padding: 2rem; }
-                .header { text-align: center; margin-bottom: 3rem; }
-                .logo { width: 100px; height: 100px; margin: 0 auto 1rem; background: #d4af37; border-radius: 50%; }
-                .title { font-size: 3rem; color: #d4af37; margin-bottom: 1rem; }
-                .subtitle { font-size: 1.2rem; color: #c0c0c0; }
-                .tools-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 2rem; margin: 3rem 0; }
-                .tool-card { background: rgba(26, 35, 50, 0.8); border: 2px solid #d4af37; border-radius: 16px; padding: 2rem; text-align: center; }
-                .tool-icon { font-size: 3rem; margin-bottom: 1rem; }
-                .tool-title { font-size: 1.5rem; color: #d4af37; margin-bottom: 1rem; }
-                .tool-description { color: #c0c0c0; margin-bottom: 2rem; }
-                .btn { background: #d4af37; color: #1a2332; padding: 1rem 2rem; border: none; border-radius: 8px; font-weight: bold; cursor: pointer; }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <div class="logo"></div>
-                    <h1 class="title">Good Faith Exteriors</h1>
-                    <p class="subtitle">Premium Windows & Doors Installation</p>
-                </div>
-                <div class="tools-grid">
-                    <div class="tool-card">
-                        <div class="tool-icon">🪟</div>
-                        <h3 class="tool-title">AI Window Estimator</h3>
-                        <p class="tool-description">Get instant quotes using AI-powered photo analysis</p>
-                        <button class="btn">Start Estimate</button>
-                    </div>
-                    <div class="tool-card">
-                        <div class="tool-icon">📱</div>
-                        <h3 class="tool-title">Product Browser</h3>
-                        <p class="tool-description">Browse our complete catalog of premium products</p>
-                        <button class="btn">View Products</button>
-                    </div>
-                    <div class="tool-card">
-                        <div class="tool-icon">💬</div>
-                        <h3 class="tool-title">AI Chat Support</h3>
-                        <p class="tool-description">Get instant answers to your questions</p>
-                        <button class="btn">Start Chat</button>
-                    </div>
-                    <div class="tool-card">
-                        <div class="tool-icon">📞</div>
-                        <h3 class="tool-title">Contact Us</h3>
-                        <p class="tool-description">Speak with our experts directly</p>
-                        <button class="btn">Contact Now</button>
-                    </div>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        return self.templates.render(DEFAULT_LANDING_TEMPLATE)
 
     def get_widget_page_html(self, widget_id):
         """Get HTML for widget page"""
-        widget_path = f"/home/ubuntu/gfe-headless-blocks-app/widgets/{widget_id}.html"
-        if os.path.exists(widget_path):
-            with open(widget_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        return self.get_default_landing_page()
+        # Same single-pass split as the blocks deployer; styles and scripts are consolidated
+        page = self.templates.render(f"widgets/{widget_id}.html", split=True)
+        return page if page is not None else self.get_default_landing_page()
 
     def get_contact_page_html(self):
         """Get contact page HTML"""
-        return """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Contact - Good Faith Exteriors</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                body { font-family: Arial, sans-serif; margin: 0; padding: 0; background: #1a2332; color: #fff; }
-                .container { max-width: 800px; margin: 0 auto; padding: 2rem; }
-                .header { text-align: center; margin-bottom: 3rem; }
-                .contact-info { background: rgba(26, 35, 50, 0.8); border: 2px solid #d4af37; border-radius: 16px; padding: 2rem; }
-                .contact-item { margin-bottom: 2rem; }
-                .contact-label { color: #d4af37; font-weight: bold; margin-bottom: 0.5rem; }
-                .contact-value { color: #c0c0c0; font-size: 1.1rem; }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1 style="color: #d4af37;">Contact Good Faith Exteriors</h1>
-                    <p style="color: #c0c0c0;">Get in touch with our window and door experts</p>
-                </div>
-                <div class="contact-info">
-                    <div class="contact-item">
-                        <div class="contact-label">📞 Phone</div>
-                        <div class="contact-value">631-416-669</div>
-                    </div>
-                    <div class="contact-item">
-                        <div class="contact-label">📧 Email</div>
-                        <div class="contact-value">info@goodfaithexteriors.com</div>
-                    </div>
-                    <div class="contact-item">
-                        <div class="contact-label">🌐 Website</div>
-                        <div class="contact-value">goodfaithexteriors.com</div>
-                    </div>
-                    <div class="contact-item">
-                        <div class="contact-label">📍 Service Area</div>
-                        <div class="contact-value">Long Island, NY</div>
-                    </div>
-                    <div class="contact-item">
-                        <div class="contact-label">🕐 Business Hours</div>
-                        <div class="contact-value">
-                            Monday-Friday: 8 AM - 6 PM<br>
-                            Saturday: 9 AM - 4 PM<br>
-                            Sunday: By appointment
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        return self.templates.render(CONTACT_PAGE_TEMPLATE)
 
     def configure_domain_mapping(self):
         """Configure domain mapping for goodfaithexteriors.com"""
+        return self.drive(self.configure_domain_mapping_steps())
+
+    def configure_domain_mapping_steps(self):
+        """Steps behind configure_domain_mapping()"""
         self.log("🌐 Configuring Domain Mapping...")
         
         domain_config = {
@@ -455,7 +760,7 @@ class WixCompleteDeployment:
         }
         
         # Configure domain via Sites API
-        response = self.make_api_request(
+        response = yield ApiCall(
             "POST", 
             f"/sites/v1/sites/{self.site_id}/domains", 
             domain_config
@@ -480,6 +785,10 @@ class WixCompleteDeployment:
 
     def setup_api_endpoints(self):
         """Setup API endpoints for the application"""
+        return self.drive(self.setup_api_endpoints_steps())
+
+    def setup_api_endpoints_steps(self):
+        """Steps behind setup_api_endpoints()"""
         self.log("🔗 Setting up API Endpoints...")
         
         # Define API endpoints
@@ -519,51 +828,108 @@ class WixCompleteDeployment:
                 "method": "POST",
                 "description": "AI chat endpoint",
                 "handler": "chat-handler"
+            },
+            {
+                "path": "/api/chat/{id}",
+                "method": "GET",
+                "description": "Poll a chat reply while it is generated",
+                "handler": "chat-handler"
             }
         ]
         
         # Create backend functions for each endpoint
-        for endpoint in api_endpoints:
-            function_code = self.generate_backend_function(endpoint)
-            
-            # Deploy backend function
-            response = self.make_api_request(
-                "POST", 
-                "/backend/v1/functions", 
-                {
-                    "name": endpoint['handler'],
-                    "code": function_code,
-                    "httpMethod": endpoint['method'],
-                    "path": endpoint['path']
-                }
-            )
-            
-            if response and response.status_code in [200, 201]:
-                self.log(f"✅ API endpoint created: {endpoint['path']}")
-                self.endpoints[endpoint['handler']] = {
-                    "url": f"https://{self.domain}{endpoint['path']}",
-                    "method": endpoint['method'],
-                    "description": endpoint['description'],
-                    "type": "api"
-                }
-            else:
-                self.log(f"⚠️ API endpoint creation failed: {endpoint['path']}", "WARNING")
+        yield [self.deploy_endpoint_steps(endpoint) for endpoint in api_endpoints]
+        
+        if self.write_behind:
+            yield from self.deploy_write_queue_job_steps()
         
         return True
 
+    def deploy_endpoint_steps(self, endpoint):
+        """Generate and upload one backend function and record its endpoint"""
+        function_code = self.generate_backend_function(endpoint)
+        
+        # Deploy backend function
+        response, action = yield from self.deploy_artifact_steps(
+            "functions",
+            f"{endpoint['method']} {endpoint['path']}",
+            {
+                "name": endpoint['handler'],
+                "code": function_code,
+                "httpMethod": endpoint['method'],
+                "path": endpoint['path']
+            },
+            "/backend/v1/functions",
+            "/backend/v1/functions/{id}",
+            update_method="PUT"
+        )
+        
+        if action == "unchanged" or (response and response.status_code in [200, 201]):
+            self.log(f"✅ API endpoint {action}: {endpoint['path']}")
+            self.endpoints[endpoint['handler']] = {
+                "url": f"https://{self.domain}{endpoint['path']}",
+                "method": endpoint['method'],
+                "description": endpoint['description'],
+                "type": "api"
+            }
+        else:
+            self.log(f"⚠️ API endpoint creation failed: {endpoint['path']}", "WARNING")
+
+    def deploy_write_queue_job_steps(self):
+        """Deploy the queue module the write-behind handlers import and the job that drains it"""
+        yield from self.remove_legacy_write_queue_steps()
+        artifacts = [
+            (WRITE_QUEUE_MODULE, self.generate_write_queue_module()),
+            ("backend/jobs.config", json.dumps({
+                "jobs": [{
+                    "functionLocation": "/writeQueue.js",
+                    "functionName": "drainWriteQueue",
+                    "description": f"Bulk insert queued leads and quotes from {WRITE_QUEUE_COLLECTION}",
+                    "executionConfig": {"cronExpression": WRITE_QUEUE_CRON}
+                }]
+            }, indent=2))
+        ]
+        for path, code in artifacts:
+            response, action = yield from self.deploy_artifact_steps(
+                "functions",
+                path,
+                {"name": os.path.basename(path), "code": code, "path": path},
+                "/backend/v1/functions",
+                "/backend/v1/functions/{id}",
+                update_method="PUT"
+            )
+            if action == "unchanged" or (response and response.status_code in [200, 201]):
+                self.log(f"✅ Write queue {action}: {path}")
+            else:
+                self.log(f"⚠️ Write queue deployment failed: {path}", "WARNING")
+
+    def remove_legacy_write_queue_steps(self):
+        """Delete the browser-callable writeQueue.jsw web module an earlier deploy left on the site"""
+        entry = self.manifest.lookup("functions", LEGACY_WRITE_QUEUE_MODULE)
+        if not entry or not entry.get("remote_id"):
+            return
+        response = yield ApiCall("DELETE", f"/backend/v1/functions/{entry['remote_id']}")
+        if response is not None and response.status_code in [200, 204, 404]:
+            self.manifest.forget("functions", LEGACY_WRITE_QUEUE_MODULE)
+            self.log(f"🧹 Removed legacy web module: {LEGACY_WRITE_QUEUE_MODULE}")
+        else:
+            self.log(f"⚠️ Could not remove {LEGACY_WRITE_QUEUE_MODULE}; delete it by hand", "WARNING")
+
     def generate_backend_function(self, endpoint):
         """Generate backend function code for endpoint"""
+        if self.write_behind and endpoint['handler'] in WRITE_BEHIND_HANDLERS:
+            return self.generate_write_behind_function(endpoint)
         if endpoint['handler'] == 'quote-handler':
             return """
             import { ok, badRequest, serverError } from 'wix-http-functions';
             import wixData from 'wix-data';
-
+""" + QUOTE_ID_FUNCTION + """
             export async function post_quotes(request) {
                 try {
                     const quoteData = await request.body.json();
                     
                     // Generate quote ID
-                    const quoteId = 'GFE-' + Date.now();
+                    const quoteId = newQuoteId();
                     
                     // Prepare quote record
                     const quote = {
@@ -602,8 +968,15 @@ class WixCompleteDeployment:
             export async function get_quotes(request) {
                 try {
                     const quoteId = request.path[0];
+                    if (!quoteId) {
+                        return badRequest({
+                            body: { error: 'Quote ID is required' }
+                        });
+                    }
+                    // quoteId carries a unique index, so this is an index seek, not a scan
                     const quote = await wixData.query('GFE_Quotes')
                         .eq('quoteId', quoteId)
+                        .limit(1)
                         .find();
                     
                     if (quote.items.length > 0) {
@@ -658,154 +1031,1004 @@ class WixCompleteDeployment:
                 }
             }
             """
-        else:
+        elif endpoint['handler'] == 'product-handler':
             return """
-            import { ok } from 'wix-http-functions';
+            import { ok, badRequest, serverError, response } from 'wix-http-functions';
+            import wixData from 'wix-data';
 
-            export async function handler(request) {
-                return ok({
-                    body: {
-                        message: 'Endpoint active',
-                        timestamp: new Date().toISOString()
+            const CACHE_TTL_MS = 60 * 1000;
+            const CACHE_MAX_ENTRIES = 200;
+            const DEFAULT_PAGE_SIZE = 24;
+            const MAX_PAGE_SIZE = 100;
+            const FILTER_FIELDS = ['brand', 'style', 'material', 'type'];
+            const PROJECTABLE_FIELDS = [
+                'name', 'brand', 'type', 'style', 'material', 'series', 'basePrice',
+                'priceRange', 'features', 'image', 'description', 'specifications'
+            ];
+            const CACHE_CONTROL = 'public, max-age=60, stale-while-revalidate=300';
+
+            // Hot queries per function instance: normalized query -> { expires, body, etag }
+            const cache = new Map();
+
+            function parsePrice(value, name) {
+                if (value === undefined || value === '') {
+                    return undefined;
+                }
+                const price = Number(value);
+                if (!Number.isFinite(price) || price < 0) {
+                    throw new RangeError(name + ' must be a non-negative number');
+                }
+                return price;
+            }
+
+            function parseQuery(query) {
+                const limit = query.limit === undefined ? DEFAULT_PAGE_SIZE : parseInt(query.limit, 10);
+                if (!Number.isInteger(limit) || limit < 1 || limit > MAX_PAGE_SIZE) {
+                    throw new RangeError('limit must be between 1 and ' + MAX_PAGE_SIZE);
+                }
+                const fields = query.fields
+                    ? query.fields.split(',').map((field) => field.trim()).filter(Boolean)
+                    : [];
+                const unknown = fields.filter((field) => !PROJECTABLE_FIELDS.includes(field));
+                if (unknown.length) {
+                    throw new RangeError('unknown fields: ' + unknown.join(', '));
+                }
+                const filters = {};
+                FILTER_FIELDS.forEach((field) => {
+                    if (query[field]) {
+                        filters[field] = String(query[field]);
                     }
                 });
+                return {
+                    filters,
+                    minPrice: parsePrice(query.minPrice, 'minPrice'),
+                    maxPrice: parsePrice(query.maxPrice, 'maxPrice'),
+                    fields: fields.sort(),
+                    limit,
+                    cursor: query.cursor || null
+                };
             }
-            """
 
-    def populate_sample_data(self):
-        """Populate collections with sample data"""
-        self.log("📝 Populating Sample Data...")
-        
-        # Sample window products
-        sample_products = [
-            {
-                "name": "Andersen 400 Series Casement",
-                "brand": "Andersen",
-                "type": "windows",
-                "style": "casement",
-                "material": "wood",
-                "series": "400 Series",
-                "basePrice": 750,
-                "priceRange": "$600-900",
-                "features": ["Low-E Glass", "Argon Fill", "Wood Frame", "Energy Star"],
-                "description": "Premium wood casement window with superior energy efficiency and classic styling.",
-                "specifications": {
-                    "uFactor": 0.30,
-                    "shgc": 0.25,
-                    "warranty": "20 years"
+            // Keyset cursor: the last _id of the previous page, so deep pages never skip()
+            function decodeCursor(cursor) {
+                if (!cursor) {
+                    return null;
                 }
-            },
-            {
-                "name": "Marvin Essential Double Hung",
-                "brand": "Marvin",
-                "type": "windows",
-                "style": "double-hung",
-                "material": "fiberglass",
-                "series": "Essential",
-                "basePrice": 850,
-                "priceRange": "$700-1000",
-                "features": ["Triple Pane", "Fiberglass Frame", "Tilt-In Sash", "Lifetime Warranty"],
-                "description": "Durable fiberglass double hung window with excellent insulation properties.",
-                "specifications": {
-                    "uFactor": 0.25,
-                    "shgc": 0.22,
-                    "warranty": "Lifetime"
+                try {
+                    return JSON.parse(Buffer.from(cursor, 'base64').toString('utf8')).after;
+                } catch (error) {
+                    throw new RangeError('invalid cursor');
                 }
-            },
-            {
-                "name": "Pella Impervia Awning",
-                "brand": "Pella",
-                "type": "windows",
-                "style": "awning",
-                "material": "fiberglass",
-                "series": "Impervia",
-                "basePrice": 625,
-                "priceRange": "$500-750",
-                "features": ["Weather Shield", "Easy Clean", "Multi-Point Lock", "Custom Colors"],
-                "description": "Weather-resistant fiberglass awning window perfect for ventilation.",
-                "specifications": {
-                    "uFactor": 0.32,
-                    "shgc": 0.28,
-                    "warranty": "10 years"
+            }
+
+            function encodeCursor(lastId) {
+                return Buffer.from(JSON.stringify({ after: lastId })).toString('base64');
+            }
+
+            // FNV-1a over the response body: cheap, stable validator for ETag
+            function etagFor(text) {
+                let hash = 0x811c9dc5;
+                for (let i = 0; i < text.length; i++) {
+                    hash ^= text.charCodeAt(i);
+                    hash = Math.imul(hash, 0x01000193) >>> 0;
                 }
+                return 'W/"' + hash.toString(16) + '-' + text.length.toString(16) + '"';
             }
-        ]
-        
-        success_count = 0
-        for product in sample_products:
-            response = self.make_api_request(
-                "POST", 
-                "/data/v1/collections/GFE_WindowProducts/items", 
-                product
-            )
-            
-            if response and response.status_code in [200, 201]:
-                success_count += 1
-        
-        self.log(f"📝 Sample data populated: {success_count}/{len(sample_products)} products")
-        return success_count > 0
 
-    def launch_system(self):
-        """Launch the complete system"""
-        self.log("🚀 Launching Complete System...")
-        
-        # Publish site
-        response = self.make_api_request(
-            "POST", 
-            f"/sites/v1/sites/{self.site_id}/publish", 
-            {"notes": "Complete system launch with all widgets and endpoints"}
-        )
-        
-        if response and response.status_code in [200, 201]:
-            self.log("✅ Site published successfully")
-        else:
-            self.log("⚠️ Site publishing may need manual action", "WARNING")
-        
-        # Test all endpoints
-        self.test_endpoints()
-        
-        return True
+            function cacheGet(key) {
+                const entry = cache.get(key);
+                if (!entry) {
+                    return null;
+                }
+                if (entry.expires < Date.now()) {
+                    cache.delete(key);
+                    return null;
+                }
+                // Re-insert so Map order tracks recency for eviction
+                cache.delete(key);
+                cache.set(key, entry);
+                return entry;
+            }
 
-    def test_endpoints(self):
-        """Test all configured endpoints"""
-        self.log("🧪 Testing Endpoints...")
-        
-        test_results = {}
-        for endpoint_name, endpoint_data in self.endpoints.items():
-            if endpoint_data.get('type') == 'api':
-                # Test API endpoint
-                try:
-                    test_response = requests.get(endpoint_data['url'], timeout=10)
-                    test_results[endpoint_name] = {
-                        "status": test_response.status_code,
-                        "accessible": test_response.status_code < 500
-                    }
-                    self.log(f"🧪 {endpoint_name}: {test_response.status_code}")
-                except:
-                    test_results[endpoint_name] = {
-                        "status": "error",
-                        "accessible": False
-                    }
-                    self.log(f"🧪 {endpoint_name}: Error")
-            elif endpoint_data.get('type') == 'page':
-                # Test page endpoint
-                try:
-                    test_response = requests.get(endpoint_data['url'], timeout=10)
-                    test_results[endpoint_name] = {
-                        "status": test_response.status_code,
-                        "accessible": test_response.status_code == 200
-                    }
-                    self.log(f"🧪 {endpoint_name}: {test_response.status_code}")
-                except:
-                    test_results[endpoint_name] = {
-                        "status": "error",
-                        "accessible": False
-                    }
-                    self.log(f"🧪 {endpoint_name}: Error")
-        
-        return test_results
+            function cacheSet(key, entry) {
+                cache.set(key, entry);
+                while (cache.size > CACHE_MAX_ENTRIES) {
+                    cache.delete(cache.keys().next().value);
+                }
+            }
 
-    def generate_deployment_report(self):
+            async function loadPage(params) {
+                let query = wixData.query('GFE_WindowProducts').ascending('_id').limit(params.limit + 1);
+                Object.keys(params.filters).forEach((field) => {
+                    query = query.eq(field, params.filters[field]);
+                });
+                if (params.minPrice !== undefined) {
+                    query = query.ge('basePrice', params.minPrice);
+                }
+                if (params.maxPrice !== undefined) {
+                    query = query.le('basePrice', params.maxPrice);
+                }
+                const after = decodeCursor(params.cursor);
+                if (after) {
+                    query = query.gt('_id', after);
+                }
+                if (params.fields.length) {
+                    query = query.fields('_id', ...params.fields);
+                }
+                // One extra row tells us whether another page exists without a count query
+                const results = await query.find();
+                const items = results.items.slice(0, params.limit);
+                const hasMore = results.items.length > params.limit;
+                return {
+                    items,
+                    nextCursor: hasMore ? encodeCursor(items[items.length - 1]._id) : null
+                };
+            }
+
+            function respond(entry, request, cacheStatus) {
+                const headers = {
+                    'Content-Type': 'application/json',
+                    'Cache-Control': CACHE_CONTROL,
+                    'ETag': entry.etag,
+                    'X-Cache': cacheStatus
+                };
+                if (request.headers['if-none-match'] === entry.etag) {
+                    return response({ status: 304, headers });
+                }
+                return ok({ headers, body: entry.body });
+            }
+
+            export async function get_products(request) {
+                let params;
+                try {
+                    params = parseQuery(request.query || {});
+                } catch (error) {
+                    return badRequest({ body: { error: error.message } });
+                }
+                try {
+                    const key = JSON.stringify(params);
+                    const cached = cacheGet(key);
+                    if (cached) {
+                        return respond(cached, request, 'HIT');
+                    }
+                    const page = await loadPage(params);
+                    const body = JSON.stringify(page);
+                    const entry = { expires: Date.now() + CACHE_TTL_MS, body, etag: etagFor(body) };
+                    cacheSet(key, entry);
+                    return respond(entry, request, 'MISS');
+                } catch (error) {
+                    if (error instanceof RangeError) {
+                        return badRequest({ body: { error: error.message } });
+                    }
+                    return serverError({
+                        body: { error: error.message }
+                    });
+                }
+            }
+            """
+        elif endpoint['handler'] == 'ai-estimator':
+            return self.ai_backend_prelude(ttl_ms=6 * 60 * 60 * 1000, max_entries=1000) + """
+            // Only these inputs change the estimate; names, emails and notes do not
+            const ESTIMATE_INPUT_FIELDS = [
+                'windowType', 'brand', 'material', 'style', 'width', 'height',
+                'quantity', 'glassType', 'installation', 'zipCode'
+            ];
+
+            const ESTIMATE_SYSTEM_PROMPT = 'You are a window replacement estimator for Good Faith Exteriors. ' +
+                'Reply with JSON only: {"lowPrice": number, "highPrice": number, "unitPrice": number, ' +
+                '"laborHours": number, "notes": string}.';
+
+            export async function post_estimate(request) {
+                try {
+                    const estimateData = await request.body.json();
+                    const inputs = {};
+                    ESTIMATE_INPUT_FIELDS.forEach((field) => {
+                        inputs[field] = estimateData[field];
+                    });
+                    
+                    const result = await cachedCall('estimate', inputs, bypassCache(request), async () => {
+                        const text = await callModel(ESTIMATE_SYSTEM_PROMPT, [
+                            { role: 'user', content: 'Estimate this window job: ' + JSON.stringify(normalize(inputs)) }
+                        ]);
+                        return JSON.parse(text.slice(text.indexOf('{'), text.lastIndexOf('}') + 1));
+                    });
+                    
+                    return ok({
+                        headers: cacheHeaders(result),
+                        body: {
+                            success: true,
+                            estimate: result.value,
+                            cached: result.cache === 'HIT',
+                            cache: cacheStats()
+                        }
+                    });
+                } catch (error) {
+                    return serverError({
+                        body: { error: error.message }
+                    });
+                }
+            }
+            """
+        elif endpoint['handler'] == 'chat-handler':
+            return self.ai_backend_prelude(ttl_ms=10 * 60 * 1000, max_entries=500,
+                                           http_imports="ok, badRequest, serverError") + f"""
+            import wixData from 'wix-data';
+
+            const STREAMS = '{CHAT_STREAM_COLLECTION}';
+""" + """
+            const CHAT_SYSTEM_PROMPT = 'You are the Good Faith Exteriors assistant. Answer questions about ' +
+                'replacement windows and doors, products, pricing and scheduling concisely.';
+            const MAX_HISTORY = 10;
+            // Partial replies are saved at most this often while the model streams
+            const FLUSH_INTERVAL_MS = 250;
+            // Saved replies older than this are purged
+            const STREAM_TTL_MS = 10 * 60 * 1000;
+            // Request ids are the widget's random UUIDs, so only the requester can poll a reply
+            const REQUEST_ID = /^[0-9a-f-]{32,36}$/i;
+            const SUPPRESS = { suppressAuth: true, suppressHooks: true };
+
+            // Calls the model with stream: true and hands each text delta to onToken
+            // as it arrives; resolves with the full reply for the cache
+            async function streamModel(system, messages, onToken) {
+                const response = await fetch(MODEL_ENDPOINT, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'Accept': 'text/event-stream',
+                        'x-api-key': await getSecret('ANTHROPIC_API_KEY'),
+                        'anthropic-version': '2023-06-01'
+                    },
+                    body: JSON.stringify({ model: MODEL, max_tokens: 1024, stream: true, system, messages })
+                });
+                if (!response.ok) {
+                    throw new Error('Model request failed (' + response.status + '): ' + await response.text());
+                }
+                let reply = '';
+                let buffer = '';
+                // One decoder for the whole body, so a character split across chunks stays whole
+                const decoder = new TextDecoder();
+                const handleEvent = (block) => {
+                    const dataLine = block.split('\\n').find((line) => line.startsWith('data:'));
+                    if (!dataLine) {
+                        return;
+                    }
+                    const event = JSON.parse(dataLine.slice(5));
+                    if (event.type === 'content_block_delta' && event.delta && event.delta.text) {
+                        reply += event.delta.text;
+                        onToken(event.delta.text);
+                    } else if (event.type === 'error') {
+                        throw new Error('Model stream failed: ' + (event.error && event.error.message));
+                    }
+                };
+                const drain = () => {
+                    let boundary;
+                    while ((boundary = buffer.indexOf('\\n\\n')) >= 0) {
+                        handleEvent(buffer.slice(0, boundary));
+                        buffer = buffer.slice(boundary + 2);
+                    }
+                };
+                for await (const chunk of response.body) {
+                    buffer += decoder.decode(chunk, { stream: true });
+                    drain();
+                }
+                buffer += decoder.decode();
+                drain();
+                if (buffer.trim()) {
+                    handleEvent(buffer);
+                }
+                return reply;
+            }
+
+            // Saves the reply so far under the widget's request id for get_chat to serve;
+            // saves are chained, throttled to FLUSH_INTERVAL_MS and never hold up the model stream
+            function replyStore(requestId) {
+                let text = '';
+                let itemId = null;
+                let flushedAt = 0;
+                let saving = Promise.resolve();
+                const save = (fields) => {
+                    if (!requestId) {
+                        return saving;
+                    }
+                    saving = saving.then(async () => {
+                        const item = { requestId, text, done: false, updatedDate: new Date(), ...fields };
+                        if (itemId) {
+                            item._id = itemId;
+                        }
+                        itemId = (await wixData.save(STREAMS, item, SUPPRESS))._id;
+                    }).catch((error) => console.error('Partial reply not saved:', error.message));
+                    return saving;
+                };
+                return {
+                    append(delta) {
+                        text += delta;
+                        if (Date.now() - flushedAt >= FLUSH_INTERVAL_MS) {
+                            flushedAt = Date.now();
+                            save({});
+                        }
+                    },
+                    finish(reply, error) {
+                        text = reply || text;
+                        return save(error ? { done: true, error } : { done: true });
+                    }
+                };
+            }
+
+            async function purgeExpiredReplies() {
+                const expired = await wixData.query(STREAMS)
+                    .lt('updatedDate', new Date(Date.now() - STREAM_TTL_MS))
+                    .limit(100)
+                    .find(SUPPRESS);
+                if (expired.items.length) {
+                    await wixData.bulkRemove(STREAMS, expired.items.map((item) => item._id), SUPPRESS);
+                }
+            }
+
+            export async function post_chat(request) {
+                let store = replyStore(null);
+                try {
+                    const chatData = await request.body.json();
+                    const requestId = REQUEST_ID.test(String(chatData.requestId || '')) ? String(chatData.requestId) : null;
+                    store = replyStore(requestId);
+                    const history = (chatData.history || []).slice(-MAX_HISTORY);
+                    const messages = history
+                        .filter((message) => message && message.content)
+                        .map((message) => ({
+                            role: message.role === 'assistant' ? 'assistant' : 'user',
+                            content: String(message.content)
+                        }));
+                    messages.push({ role: 'user', content: String(chatData.message || '') });
+                    
+                    // The normalized conversation is the key, so repeated FAQ openers are served from cache;
+                    // cache hits and coalesced requests save the whole reply at once
+                    const result = await cachedCall('chat', messages, bypassCache(request), () =>
+                        streamModel(CHAT_SYSTEM_PROMPT, messages, (text) => store.append(text))
+                    );
+                    await store.finish(result.value);
+                    purgeExpiredReplies().catch((error) => console.error('Reply purge failed:', error.message));
+                    
+                    return ok({
+                        headers: cacheHeaders(result),
+                        body: { success: true, reply: result.value, cached: result.cache === 'HIT', cache: cacheStats() }
+                    });
+                } catch (error) {
+                    await store.finish('', error.message);
+                    return serverError({
+                        body: { error: error.message }
+                    });
+                }
+            }
+
+            // GET /api/chat/{requestId}: the reply saved so far while post_chat is still running
+            export async function get_chat(request) {
+                const requestId = String((request.path || [])[0] || '');
+                if (!REQUEST_ID.test(requestId)) {
+                    return badRequest({
+                        body: { error: 'A request id is required' }
+                    });
+                }
+                try {
+                    const found = await wixData.query(STREAMS)
+                        .eq('requestId', requestId)
+                        .limit(1)
+                        .find(SUPPRESS);
+                    const item = found.items[0];
+                    return ok({
+                        headers: { 'Cache-Control': 'no-store' },
+                        body: item
+                            ? { text: item.text || '', done: Boolean(item.done), error: item.error || null }
+                            : { text: '', done: false, error: null }
+                    });
+                } catch (error) {
+                    return serverError({
+                        body: { error: error.message }
+                    });
+                }
+            }
+            """
+        else:
+            return """
+            import { ok } from 'wix-http-functions';
+
+            export async function handler(request) {
+                return ok({
+                    body: {
+                        message: 'Endpoint active',
+                        timestamp: new Date().toISOString()
+                    }
+                });
+            }
+            """
+
+    def generate_write_behind_function(self, endpoint):
+        """Quote/lead handlers that enqueue the record and answer 202 instead of inserting it"""
+        prelude = """
+            import { ok, response, badRequest, serverError } from 'wix-http-functions';
+            import wixData from 'wix-data';
+            import { enqueueWrite, flushSoon } from 'backend/writeQueue';
+"""
+        if endpoint['handler'] == 'quote-handler':
+            return prelude + QUOTE_ID_FUNCTION + """
+            export async function post_quotes(request) {
+                try {
+                    const quoteData = await request.body.json();
+                    const quoteId = newQuoteId();
+                    const quote = {
+                        quoteId: quoteId,
+                        customerEmail: quoteData.email,
+                        customerName: quoteData.name,
+                        customerPhone: quoteData.phone,
+                        windowType: quoteData.windowType,
+                        brand: quoteData.brand,
+                        material: quoteData.material,
+                        quantity: quoteData.quantity,
+                        unitPrice: quoteData.unitPrice,
+                        total: quoteData.total,
+                        status: 'pending',
+                        quoteData: quoteData,
+                        createdDate: new Date()
+                    };
+                    
+                    // One small queue insert on the request path; the bulk insert into GFE_Quotes happens later
+                    const queued = await enqueueWrite('GFE_Quotes', quote, quoteId);
+                    flushSoon();
+                    
+                    return response({
+                        status: 202,
+                        headers: { 'Content-Type': 'application/json' },
+                        body: { success: true, queued: true, quoteId: quoteId, quote: queued }
+                    });
+                } catch (error) {
+                    return serverError({
+                        body: { error: error.message }
+                    });
+                }
+            }
+
+            export async function get_quotes(request) {
+                try {
+                    const quoteId = request.path[0];
+                    if (!quoteId) {
+                        return badRequest({
+                            body: { error: 'Quote ID is required' }
+                        });
+                    }
+                    const quote = await wixData.query('GFE_Quotes')
+                        .eq('quoteId', quoteId)
+                        .limit(1)
+                        .find();
+                    if (quote.items.length > 0) {
+                        return ok({
+                            body: quote.items[0]
+                        });
+                    }
+                    
+                    // Not drained yet: answer from the queue so a fresh quote is readable at once
+                    const queued = await wixData.query('""" + WRITE_QUEUE_COLLECTION + """')
+                        .eq('target', 'GFE_Quotes')
+                        .eq('key', quoteId)
+                        .limit(1)
+                        .find({ suppressAuth: true });
+                    if (queued.items.length > 0) {
+                        return ok({
+                            body: { ...queued.items[0].payload, queued: true }
+                        });
+                    }
+                    return badRequest({
+                        body: { error: 'Quote not found' }
+                    });
+                } catch (error) {
+                    return serverError({
+                        body: { error: error.message }
+                    });
+                }
+            }
+            """
+        return prelude + """
+            export async function post_leads(request) {
+                try {
+                    const leadData = await request.body.json();
+                    
+                    const lead = {
+                        name: leadData.name,
+                        email: leadData.email,
+                        phone: leadData.phone,
+                        source: leadData.source || 'website',
+                        status: 'new',
+                        notes: leadData.notes || '',
+                        createdDate: new Date(),
+                        lastContact: new Date()
+                    };
+                    
+                    const queued = await enqueueWrite('GFE_Leads', lead);
+                    flushSoon();
+                    
+                    return response({
+                        status: 202,
+                        headers: { 'Content-Type': 'application/json' },
+                        body: { success: true, queued: true, leadId: queued._id, lead: queued }
+                    });
+                } catch (error) {
+                    return serverError({
+                        body: { error: error.message }
+                    });
+                }
+            }
+            """
+
+    def generate_write_queue_module(self):
+        """backend/writeQueue.js: enqueue for the handlers, batched drain for the scheduled job"""
+        return f"""
+            import wixData from 'wix-data';
+            import {{ randomUUID }} from 'crypto';
+
+            const QUEUE = '{WRITE_QUEUE_COLLECTION}';
+            const TARGETS = new Set({json.dumps(list(WRITE_QUEUE_TARGETS))});
+            const BATCH_SIZE = {min(self.batch_size, WRITE_QUEUE_BATCH_SIZE)};
+            const FLUSH_EVERY = {WRITE_QUEUE_FLUSH_EVERY};
+""" + """
+            const MAX_ATTEMPTS = 5;
+            // Scheduled jobs are stopped after 5 minutes; leave room to finish the last batch
+            const DRAIN_BUDGET_MS = 4 * 60 * 1000;
+            const DUPLICATE_ITEM = 'WDE0074';
+            const OPTIONS = { suppressAuth: true, suppressHooks: true };
+
+            let writesSinceFlush = 0;
+            let draining = null;
+
+            // The target _id is fixed at enqueue time, so the id returned to the caller
+            // is the final one and re-draining an already inserted item is a no-op
+            export async function enqueueWrite(target, item, key) {
+                if (!TARGETS.has(target)) {
+                    throw new Error('Write queue does not accept ' + target);
+                }
+                const payload = { ...item, _id: item._id || randomUUID() };
+                await wixData.insert(QUEUE, {
+                    target,
+                    key: key || payload._id,
+                    payload,
+                    attempts: 0,
+                    enqueuedDate: new Date()
+                }, OPTIONS);
+                return payload;
+            }
+
+            // Best effort between scheduled runs: every FLUSH_EVERY writes on this
+            // instance start one batch without holding up the response
+            export function flushSoon() {
+                writesSinceFlush++;
+                if (writesSinceFlush >= FLUSH_EVERY && !draining) {
+                    writesSinceFlush = 0;
+                    draining = drainWriteQueue(1)
+                        .catch((error) => console.error('Write queue flush failed:', error))
+                        .finally(() => { draining = null; });
+                }
+            }
+
+            async function flushTarget(target, entries, summary) {
+                // Entries for any other collection are parked at MAX_ATTEMPTS, never inserted
+                if (!TARGETS.has(target)) {
+                    await wixData.bulkUpdate(QUEUE, entries.map((entry) => ({
+                        ...entry,
+                        attempts: MAX_ATTEMPTS,
+                        lastError: 'Write queue does not accept ' + String(target).slice(0, 100)
+                    })), OPTIONS);
+                    summary.failed += entries.length;
+                    return;
+                }
+                const failed = new Map();
+                try {
+                    const result = await wixData.bulkInsert(target, entries.map((entry) => entry.payload), OPTIONS);
+                    (result.errors || []).forEach((error) => {
+                        const entry = entries[error.originalIndex] ||
+                            entries.find((candidate) => error.item && candidate.payload._id === error.item._id);
+                        // Inserted by an earlier drain that died before dequeuing it
+                        if (entry && error.code !== DUPLICATE_ITEM) {
+                            failed.set(entry._id, error.message);
+                        }
+                    });
+                } catch (error) {
+                    entries.forEach((entry) => failed.set(entry._id, error.message));
+                }
+                
+                const done = entries.filter((entry) => !failed.has(entry._id));
+                const retry = entries.filter((entry) => failed.has(entry._id)).map((entry) => ({
+                    ...entry,
+                    attempts: (entry.attempts || 0) + 1,
+                    lastError: String(failed.get(entry._id)).slice(0, 500)
+                }));
+                if (done.length) {
+                    await wixData.bulkRemove(QUEUE, done.map((entry) => entry._id), OPTIONS);
+                }
+                if (retry.length) {
+                    await wixData.bulkUpdate(QUEUE, retry, OPTIONS);
+                }
+                summary.inserted += done.length;
+                summary.failed += retry.length;
+            }
+
+            // Scheduled job entry point: bulk insert queued writes, oldest first, one
+            // bulkInsert per target collection per batch. Each run walks the queue once,
+            // so a failing entry costs one attempt per run; entries failing MAX_ATTEMPTS
+            // times stay in the queue with lastError for inspection.
+            export async function drainWriteQueue(maxBatches = Infinity) {
+                const started = Date.now();
+                const summary = { batches: 0, inserted: 0, failed: 0 };
+                const seen = new Set();
+                let after = null;
+                while (summary.batches < maxBatches && Date.now() - started < DRAIN_BUDGET_MS) {
+                    let query = wixData.query(QUEUE).lt('attempts', MAX_ATTEMPTS);
+                    if (after) {
+                        query = query.ge('_createdDate', after);
+                    }
+                    const batch = await query.ascending('_createdDate').limit(BATCH_SIZE).find(OPTIONS);
+                    const entries = batch.items.filter((entry) => !seen.has(entry._id));
+                    if (entries.length === 0) {
+                        break;
+                    }
+                    summary.batches++;
+                    entries.forEach((entry) => seen.add(entry._id));
+                    after = entries[entries.length - 1]._createdDate;
+                    
+                    const byTarget = new Map();
+                    entries.forEach((entry) => {
+                        if (!byTarget.has(entry.target)) {
+                            byTarget.set(entry.target, []);
+                        }
+                        byTarget.get(entry.target).push(entry);
+                    });
+                    for (const [target, entries] of byTarget) {
+                        await flushTarget(target, entries, summary);
+                    }
+                    if (batch.items.length < BATCH_SIZE) {
+                        break;
+                    }
+                }
+                summary.ms = Date.now() - started;
+                return summary;
+            }
+"""
+
+    def ai_backend_prelude(self, ttl_ms, max_entries, http_imports="ok, serverError"):
+        """Shared model client and response cache for the AI estimator and chat functions"""
+        return f"""
+            import {{ {http_imports} }} from 'wix-http-functions';
+            import {{ getSecret }} from 'wix-secrets-backend';
+            import {{ fetch }} from 'wix-fetch';
+            import {{ createHash }} from 'crypto';
+
+            const MODEL_ENDPOINT = 'https://api.anthropic.com/v1/messages';
+            const MODEL = 'claude-3-sonnet-20240229';
+            // Bump to invalidate every cached answer after a prompt or pricing change
+            const CACHE_VERSION = 1;
+            const CACHE_TTL_MS = {ttl_ms};
+            const CACHE_MAX_ENTRIES = {max_entries};
+""" + """
+            // LRU + TTL cache per function instance: key -> { expires, value }
+            const responseCache = new Map();
+            // Identical requests already calling the model share its answer
+            const inflight = new Map();
+            const counters = { hits: 0, misses: 0, coalesced: 0, evictions: 0, expirations: 0 };
+
+            // Canonical form of the semantic inputs: trimmed lower-case text, numbers
+            // for numeric strings, sorted keys, and empty values dropped
+            function normalize(value) {
+                if (value === null || value === undefined || value === '') {
+                    return undefined;
+                }
+                if (Array.isArray(value)) {
+                    return value.map(normalize).filter((item) => item !== undefined);
+                }
+                if (typeof value === 'object') {
+                    const normalized = {};
+                    Object.keys(value).sort().forEach((key) => {
+                        const item = normalize(value[key]);
+                        if (item !== undefined) {
+                            normalized[key] = item;
+                        }
+                    });
+                    return normalized;
+                }
+                if (typeof value === 'string') {
+                    const text = value.trim().toLowerCase().replace(/\\s+/g, ' ');
+                    const number = Number(text);
+                    return text !== '' && Number.isFinite(number) ? number : text;
+                }
+                return value;
+            }
+
+            function cacheKey(namespace, inputs) {
+                const canonical = JSON.stringify([CACHE_VERSION, namespace, normalize(inputs)]);
+                return createHash('sha256').update(canonical).digest('hex');
+            }
+
+            function cacheGet(key) {
+                const entry = responseCache.get(key);
+                if (!entry) {
+                    return undefined;
+                }
+                if (entry.expires < Date.now()) {
+                    responseCache.delete(key);
+                    counters.expirations++;
+                    return undefined;
+                }
+                // Re-insert so Map order tracks recency for LRU eviction
+                responseCache.delete(key);
+                responseCache.set(key, entry);
+                return entry.value;
+            }
+
+            function cacheSet(key, value) {
+                responseCache.delete(key);
+                responseCache.set(key, { expires: Date.now() + CACHE_TTL_MS, value });
+                while (responseCache.size > CACHE_MAX_ENTRIES) {
+                    responseCache.delete(responseCache.keys().next().value);
+                    counters.evictions++;
+                }
+            }
+
+            function cacheStats() {
+                const served = counters.hits + counters.coalesced;
+                const lookups = served + counters.misses;
+                return {
+                    ...counters,
+                    size: responseCache.size,
+                    hitRate: lookups ? Math.round((served / lookups) * 1000) / 1000 : 0
+                };
+            }
+
+            // "Cache-Control: no-cache" from the caller skips the lookup but refreshes the entry
+            function bypassCache(request) {
+                return /no-cache/i.test(request.headers['cache-control'] || '');
+            }
+
+            function cacheHeaders(result) {
+                return {
+                    'Content-Type': 'application/json',
+                    'X-Cache': result.cache,
+                    'X-Cache-Key': result.key.slice(0, 16)
+                };
+            }
+
+            async function cachedCall(namespace, inputs, bypass, compute) {
+                const key = cacheKey(namespace, inputs);
+                if (!bypass) {
+                    const cached = cacheGet(key);
+                    if (cached !== undefined) {
+                        counters.hits++;
+                        return { key, cache: 'HIT', value: cached };
+                    }
+                    if (inflight.has(key)) {
+                        counters.coalesced++;
+                        return { key, cache: 'COALESCED', value: await inflight.get(key) };
+                    }
+                }
+                counters.misses++;
+                const pending = compute();
+                inflight.set(key, pending);
+                try {
+                    const value = await pending;
+                    cacheSet(key, value);
+                    return { key, cache: 'MISS', value };
+                } finally {
+                    inflight.delete(key);
+                }
+            }
+
+            async function callModel(system, messages) {
+                const response = await fetch(MODEL_ENDPOINT, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'x-api-key': await getSecret('ANTHROPIC_API_KEY'),
+                        'anthropic-version': '2023-06-01'
+                    },
+                    body: JSON.stringify({ model: MODEL, max_tokens: 1024, system, messages })
+                });
+                if (!response.ok) {
+                    throw new Error('Model request failed (' + response.status + '): ' + await response.text());
+                }
+                const data = await response.json();
+                return (data.content || []).map((block) => block.text || '').join('');
+            }
+"""
+
+    def populate_sample_data(self):
+        """Populate collections with sample data"""
+        return self.drive(self.populate_sample_data_steps())
+
+    def populate_sample_data_steps(self):
+        """Steps behind populate_sample_data()"""
+        self.log("📝 Populating Sample Data...")
+        
+        # Sample window products
+        sample_products = [
+            {
+                "name": "Andersen 400 Series Casement",
+                "brand": "Andersen",
+                "type": "windows",
+                "style": "casement",
+                "material": "wood",
+                "series": "400 Series",
+                "basePrice": 750,
+                "priceRange": "$600-900",
+                "features": ["Low-E Glass", "Argon Fill", "Wood Frame", "Energy Star"],
+                "description": "Premium wood casement window with superior energy efficiency and classic styling.",
+                "specifications": {
+                    "uFactor": 0.30,
+                    "shgc": 0.25,
+                    "warranty": "20 years"
+                }
+            },
+            {
+                "name": "Marvin Essential Double Hung",
+                "brand": "Marvin",
+                "type": "windows",
+                "style": "double-hung",
+                "material": "fiberglass",
+                "series": "Essential",
+                "basePrice": 850,
+                "priceRange": "$700-1000",
+                "features": ["Triple Pane", "Fiberglass Frame", "Tilt-In Sash", "Lifetime Warranty"],
+                "description": "Durable fiberglass double hung window with excellent insulation properties.",
+                "specifications": {
+                    "uFactor": 0.25,
+                    "shgc": 0.22,
+                    "warranty": "Lifetime"
+                }
+            },
+            {
+                "name": "Pella Impervia Awning",
+                "brand": "Pella",
+                "type": "windows",
+                "style": "awning",
+                "material": "fiberglass",
+                "series": "Impervia",
+                "basePrice": 625,
+                "priceRange": "$500-750",
+                "features": ["Weather Shield", "Easy Clean", "Multi-Point Lock", "Custom Colors"],
+                "description": "Weather-resistant fiberglass awning window perfect for ventilation.",
+                "specifications": {
+                    "uFactor": 0.32,
+                    "shgc": 0.28,
+                    "warranty": "10 years"
+                }
+            }
+        ]
+        
+        result = yield BulkInsert(PRODUCT_COLLECTION, sample_products)
+        
+        self.log(f"📝 Sample data populated: {result['inserted']}/{result['total']} products")
+        return result['inserted'] > 0
+
+    def bulk_insert(self, collection_id, items):
+        """Insert items in concurrent batches, retrying only the items Wix rejected"""
+        inserter = BulkInserter(
+            self.make_api_request,
+            collection_id,
+            batch_size=self.batch_size,
+            max_workers=self.insert_workers,
+            log=self.log
+        )
+        return self.record_import(collection_id, inserter.insert(items))
+
+    def record_import(self, collection_id, result):
+        """Keep a bulk insert summary for the report and warn about rejected items"""
+        self.data_imports[collection_id] = result
+        if result['failed']:
+            self.log(f"⚠️ {result['failed']} {collection_id} items could not be inserted", "WARNING")
+        return result
+
+    def import_catalog(self, path, collection_id=PRODUCT_COLLECTION):
+        """Stream a CSV/JSONL product file into a collection without loading it into memory"""
+        self.site_id = self.config['wix']['headless']['meta_site_id']
+        inserter = BulkInserter(
+            self.make_api_request,
+            collection_id,
+            batch_size=self.batch_size,
+            max_workers=self.insert_workers,
+            log=self.log
+        )
+        importer = CatalogImporter(inserter, self.get_collection_fields(collection_id), log=self.log)
+        result = importer.run(path)
+        self.data_imports[collection_id] = result
+        return result
+
+    def run_benchmark(self, target=None, rate=DEFAULT_BENCHMARK_RATE, concurrency=DEFAULT_BENCHMARK_CONCURRENCY,
+                      duration=DEFAULT_BENCHMARK_DURATION, stub=False, seed=None):
+        """Load-test the /api HTTP functions on the live domain, a given URL or a local stub"""
+        server = None
+        if stub:
+            store = FunctionStore(products=product_catalog(BENCHMARK_CATALOG_SIZE, seed))
+            server = StubServer(http_function_routes(store)).start()
+            target = server.url
+            self.log(f"🧩 Local function stub listening on {target}")
+        try:
+            generator = LoadGenerator(
+                target or f"https://{self.domain}",
+                rate=rate,
+                concurrency=concurrency,
+                duration=duration,
+                seed=seed,
+                log=self.log
+            )
+            return generator.run()
+        finally:
+            if server:
+                server.stop()
+
+    def launch_system(self):
+        """Launch the complete system"""
+        return self.drive(self.launch_system_steps())
+
+    def launch_system_steps(self):
+        """Steps behind launch_system()"""
+        self.log("🚀 Launching Complete System...")
+        
+        # Publish site
+        response = yield ApiCall(
+            "POST", 
+            f"/sites/v1/sites/{self.site_id}/publish", 
+            {"notes": "Complete system launch with all widgets and endpoints"}
+        )
+        
+        if response and response.status_code in [200, 201]:
+            self.log("✅ Site published successfully")
+        else:
+            self.log("⚠️ Site publishing may need manual action", "WARNING")
+        
+        # Test all endpoints
+        yield from self.test_endpoints_steps()
+        
+        return True
+
+    def test_endpoints(self):
+        """Probe all configured page and API endpoints concurrently, several times each"""
+        return self.drive(self.test_endpoints_steps())
+
+    def probe_endpoints(self, endpoints):
+        """Health-check probes on a thread pool with their own connection pool"""
+        prober = EndpointProber(repeats=self.probe_repeats, max_workers=self.probe_workers)
+        try:
+            return prober.run(endpoints)
+        finally:
+            prober.close()
+
+    def probe_endpoint_targets(self):
+        """Endpoints to probe; with probe_origin set, the ones on the site's domain, moved to that origin"""
+        if not self.probe_origin:
+            return self.endpoints
+        site = f"https://{self.domain}"
+        return {
+            name: dict(data, url=self.probe_origin + data["url"][len(site):])
+            for name, data in self.endpoints.items()
+            if data.get("url", "").startswith(site)
+        }
+
+    def test_endpoints_steps(self):
+        """Steps behind test_endpoints()"""
+        if self.probe_origin:
+            self.log(f"🧪 Testing Endpoints at {self.probe_origin} ({self.probe_repeats} probes each)...")
+        else:
+            self.log(f"🧪 Testing Endpoints ({self.probe_repeats} probes each)...")
+        
+        test_results = yield ProbeEndpoints(self.probe_endpoint_targets())
+        
+        for endpoint_name, result in test_results.items():
+            latency = result['latency_ms']
+            if latency:
+                self.log(f"🧪 {endpoint_name}: {result['status']} "
+                         f"p50 {latency['p50']}ms / p95 {latency['p95']}ms / p99 {latency['p99']}ms, "
+                         f"TTFB p50 {result['ttfb_ms']['p50']}ms, {result['bytes']} bytes")
+            else:
+                self.log(f"🧪 {endpoint_name}: Error ({'; '.join(result['errors'])})", "WARNING")
+            if not result['accessible']:
+                self.log(f"⚠️ {endpoint_name} failed {result['failed_probes']}/{result['probes']} probes", "WARNING")
+        
+        self.endpoint_health = test_results
+        return test_results
+
+    def generate_deployment_report(self):
         """Generate comprehensive deployment report"""
         report = {
             "deployment_timestamp": datetime.now().isoformat(),
@@ -813,7 +2036,25 @@ class WixCompleteDeployment:
             "domain": self.domain,
             "status": "completed",
             "endpoints": self.endpoints,
-            "deployment_log": self.deployment_log,
+            "endpoint_health": self.endpoint_health,
+            "http_connections": self.session.connection_stats(),
+            "rate_limit": self.session.rate_limit_stats(),
+            "bundle": self.bundler.report() if self.bundler else None,
+            "templates": self.templates.cache.stats(),
+            "data_imports": self.data_imports,
+            "media_assets": self.media_assets,
+            "images": self.images.report() if self.images else None,
+            "phases": self.phase_timings,
+            "critical_path": self.critical_path,
+            "trace": {
+                "trace_id": self.tracer.trace_id,
+                "files": self.trace_files,
+                "phases": self.tracer.phase_summary()
+            },
+            "errors": self.errors.to_list(),
+            "error_count": self.errors.total(),
+            "deployment_log": self.deployment_log.entries(),
+            "deployment_log_summary": self.deployment_log.summary(),
             "configuration": {
                 "theme": self.config['theme'],
                 "credentials": {
@@ -831,9 +2072,10 @@ class WixCompleteDeployment:
             ]
         }
         
-        # Save report
-        with open('/home/ubuntu/complete_deployment_report.json', 'w') as f:
-            json.dump(report, f, indent=2)
+        # Save report; fleet runs merge per-site results into one report instead
+        if self.report_path:
+            with open(self.report_path, 'w') as f:
+                json.dump(report, f, indent=2)
         
         return report
 
@@ -842,42 +2084,58 @@ class WixCompleteDeployment:
         self.log("🚀 STARTING COMPLETE REST API DEPLOYMENT")
         self.log("=" * 60)
         
+        scheduler = PhaseScheduler(
+            [Phase(name, getattr(self, name), depends_on) for name, depends_on in DEPLOYMENT_PHASES],
+            log=self.log
+        )
+        
         try:
-            # Phase 1: Install Site
-            self.install_site()
-            
-            # Phase 2: Create Collections
-            self.create_data_collections()
-            
-            # Phase 3: Deploy Pages
-            self.deploy_pages()
-            
-            # Phase 4: Configure Domain
-            self.configure_domain_mapping()
-            
-            # Phase 5: Setup API Endpoints
-            self.setup_api_endpoints()
-            
-            # Phase 6: Populate Sample Data
-            self.populate_sample_data()
-            
-            # Phase 7: Launch System
-            self.launch_system()
-            
-            # Generate Report
-            report = self.generate_deployment_report()
-            
-            self.log("=" * 60)
-            self.log("🎉 COMPLETE DEPLOYMENT FINISHED!")
-            self.log("=" * 60)
-            
-            self.print_deployment_summary()
+            # Independent phases run concurrently once install_site has set site_id
+            with self.tracer.span("deployment", **{"gfe.engine": "sync"}):
+                try:
+                    scheduler.run()
+                finally:
+                    self.manifest.save()
+                    self.phase_timings = scheduler.timings
+                    self.critical_path = scheduler.critical_path()
             
-            return report
+            return self.finish_deployment()
             
         except Exception as e:
             self.log(f"❌ Deployment failed: {str(e)}", "ERROR")
             return None
+        finally:
+            self.export_trace()
+
+    def trace_name(self):
+        """Trace file name stem; fleet sites get their own"""
+        return f"{TRACE_FILENAME}-{site_slug(self.site_name)}" if self.site_name else TRACE_FILENAME
+
+    def export_trace(self):
+        """Write the JSON and OTLP trace files into trace_dir, if set"""
+        if not self.trace_dir:
+            return
+        try:
+            self.tracer.export(self.trace_dir, self.trace_name())
+        except OSError as e:
+            self.log(f"⚠️ Could not write trace files: {e}", "WARNING")
+            return
+        self.log(f"🧭 Trace {self.tracer.trace_id} written to {self.trace_files['json']} and {self.trace_files['otlp']}")
+
+    def finish_deployment(self):
+        """Write the report and print the summary once every phase has run"""
+        self.logger.flush()
+        report = self.generate_deployment_report()
+        
+        self.log("=" * 60)
+        self.log("🎉 COMPLETE DEPLOYMENT FINISHED!")
+        self.log("=" * 60)
+        
+        self.print_deployment_summary()
+        self.logger.flush()
+        self.deployment_log.close()
+        
+        return report
 
     def print_deployment_summary(self):
         """Print deployment summary"""
@@ -888,6 +2146,36 @@ class WixCompleteDeployment:
         self.log(f"🆔 Site ID: {self.site_id}")
         self.log(f"📱 Total Endpoints: {len(self.endpoints)}")
         
+        if self.critical_path:
+            self.log(f"⏱️ Critical path: {' → '.join(self.critical_path['phases'])} "
+                     f"({self.critical_path['seconds']}s)")
+        
+        traced = self.tracer.phase_summary()
+        if traced:
+            busiest, totals = max(traced.items(), key=lambda item: item[1]['request_ms'])
+            self.log(f"🧭 {sum(phase['requests'] for phase in traced.values())} traced requests; "
+                     f"most request time in {busiest} ({totals['request_ms']:.0f}ms over {totals['requests']} calls)")
+        
+        connections = self.session.connection_stats()
+        self.log(f"🔌 HTTP connections: {connections['connections_opened']} opened, "
+                 f"{connections['connections_reused']} reused for {connections['requests']} requests")
+        
+        if self.images:
+            images = self.images.report()
+            for image_format, size in images['largest_variant_bytes'].items():
+                self.log(f"🖼️ Images as {image_format}: {size:,} bytes at the largest size vs "
+                         f"{images['original_bytes']:,} bytes of originals")
+        
+        if self.media_assets:
+            uploaded = [result for result in self.media_assets.values() if result.get("action") == "uploaded"]
+            self.log(f"🎞️ Media: {len(uploaded)} of {len(self.media_assets)} assets uploaded "
+                     f"({sum(result['bytes'] for result in uploaded):,} bytes streamed)")
+        
+        timed = [(name, result['latency_ms']['p95']) for name, result in self.endpoint_health.items() if result['latency_ms']]
+        if timed:
+            slowest, p95 = max(timed, key=lambda item: item[1])
+            self.log(f"🐢 Slowest endpoint: {slowest} (p95 {p95}ms)")
+        
         self.log("\n📋 Configured Endpoints:")
         for name, data in self.endpoints.items():
             if data.get('type') == 'page':
@@ -904,16 +2192,404 @@ class WixCompleteDeployment:
         self.log("   4. Set up analytics tracking")
         self.log("   5. Train staff on new tools")
 
+class AsyncWixCompleteDeployment(WixCompleteDeployment):
+    """WixCompleteDeployment on one asyncio event loop
+
+    Runs the same deployment steps, but API calls, bulk inserts and probes are
+    coroutines over one shared aiohttp/httpx pool, the pages, collections and
+    functions within a phase go out together, and a 401/403 answer cancels
+    everything still in flight.
+    """
+
+    def __init__(self, backend=None, **options):
+        self.backend = backend
+        super().__init__(**options)
+
+    def make_session(self, pool_size, max_retries, rate, max_rate, limiters=None):
+        """One aiohttp/httpx pool for the whole event loop"""
+        return AsyncSession(
+            pool_size=pool_size,
+            max_retries=max_retries,
+            rate=rate,
+            max_rate=max_rate,
+            backend=self.backend,
+            log=self.log,
+            limiters=limiters
+        )
+
+    async def make_api_request_async(self, method, endpoint, data=None, params=None):
+        """make_api_request on the event loop; raises FatalApiError on 401/403"""
+        url = urljoin(self.base_url, endpoint)
+        
+        try:
+            if method.upper() not in SUPPORTED_METHODS:
+                raise ValueError(f"Unsupported HTTP method: {method}")
+            
+            body = data if method.upper() in ("POST", "PUT", "PATCH") else None
+            response = await self.session.request(
+                method.upper(),
+                url,
+                headers=self.headers,
+                params=params,
+                json=body,
+                timeout=30
+            )
+        except Exception as e:
+            self.record_request_failure(method, endpoint, e)
+            return None
+        
+        self.record_response(method, endpoint, response)
+        if response.status_code in FATAL_STATUSES:
+            raise FatalApiError(f"{method.upper()} {endpoint} answered {response.status_code}; check the API token")
+        return response
+
+    async def stream_upload_async(self, method, url, body, headers):
+        """stream_upload on the event loop"""
+        endpoint = urlsplit(url).path
+        try:
+            response = await self.session.request(method, url, headers=headers, data=body, timeout=UPLOAD_TIMEOUT)
+        except Exception as e:
+            self.record_request_failure(method, endpoint, e)
+            return None
+        
+        self.record_response(method, endpoint, response)
+        return response
+
+    async def perform_async(self, effect):
+        """Carry out one ApiCall, StreamUpload, BulkInsert, ProbeEndpoints or BlockingCall step on the event loop"""
+        if isinstance(effect, ApiCall):
+            return await self.make_api_request_async(*effect)
+        if isinstance(effect, StreamUpload):
+            return await self.stream_upload_async(*effect)
+        if isinstance(effect, BlockingCall):
+            return await asyncio.to_thread(effect.func, *effect.args)
+        if isinstance(effect, BulkInsert):
+            return await self.bulk_insert_async(*effect)
+        if isinstance(effect, ProbeEndpoints):
+            return await self.probe_endpoints_async(effect.endpoints)
+        raise TypeError(f"Unknown deployment step: {effect!r}")
+
+    async def bulk_insert_async(self, collection_id, items):
+        """bulk_insert with the batches as tasks on the event loop"""
+        inserter = AsyncBulkInserter(
+            self.make_api_request_async,
+            collection_id,
+            batch_size=self.batch_size,
+            max_workers=self.insert_workers,
+            log=self.log
+        )
+        return self.record_import(collection_id, await inserter.insert(items))
+
+    async def probe_endpoints_async(self, endpoints):
+        """Health-check probes on the event loop with their own connection pool"""
+        prober = AsyncEndpointProber(
+            repeats=self.probe_repeats,
+            max_workers=self.probe_workers,
+            backend=self.session.backend
+        )
+        try:
+            return await prober.run(endpoints)
+        finally:
+            await prober.close()
+
+    def phase_coroutine(self, name):
+        """Coroutine function that runs one deployment phase's steps"""
+        return lambda: run_steps_async(getattr(self, f"{name}_steps")(), self.perform_async)
+
+    def execute_complete_deployment(self):
+        """Execute the complete deployment process on a fresh event loop"""
+        return asyncio.run(self.execute_complete_deployment_async())
+
+    async def execute_complete_deployment_async(self):
+        """execute_complete_deployment with every phase as a task on the running loop"""
+        self.log(f"🚀 STARTING COMPLETE REST API DEPLOYMENT (async engine, {self.session.backend})")
+        self.log("=" * 60)
+        
+        scheduler = AsyncPhaseScheduler(
+            [Phase(name, self.phase_coroutine(name), depends_on) for name, depends_on in DEPLOYMENT_PHASES],
+            log=self.log
+        )
+        
+        try:
+            with self.tracer.span("deployment", **{"gfe.engine": "async", "gfe.async_backend": self.session.backend}):
+                try:
+                    await scheduler.run()
+                finally:
+                    self.manifest.save()
+                    self.phase_timings = scheduler.timings
+                    self.critical_path = scheduler.critical_path()
+                    await self.session.close()
+            
+            return self.finish_deployment()
+            
+        except Exception as e:
+            self.log(f"❌ Deployment failed: {str(e)}", "ERROR")
+            return None
+        finally:
+            self.export_trace()
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Complete Wix REST API deployment for Good Faith Exteriors")
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help=f"Keep-alive connections kept per host (default: {DEFAULT_POOL_SIZE})"
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries for failed connections and 429/5xx responses (default: {DEFAULT_MAX_RETRIES})"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"Initial requests per second per host (default: {DEFAULT_RATE})"
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=DEFAULT_MAX_RATE,
+        help=f"Ceiling the adaptive rate may climb to (default: {DEFAULT_MAX_RATE})"
+    )
+    parser.add_argument(
+        "--no-minify",
+        action="store_true",
+        help="Upload page sources verbatim, without the bundling stage"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Items per bulk insert request (default: {DEFAULT_BATCH_SIZE}, max 1000)"
+    )
+    parser.add_argument(
+        "--insert-workers",
+        type=int,
+        default=DEFAULT_INSERT_WORKERS,
+        help=f"Bulk insert batches sent concurrently (default: {DEFAULT_INSERT_WORKERS})"
+    )
+    parser.add_argument(
+        "--probe-repeats",
+        type=int,
+        default=DEFAULT_PROBE_REPEATS,
+        help=f"Health-check probes per endpoint after launch (default: {DEFAULT_PROBE_REPEATS})"
+    )
+    parser.add_argument(
+        "--probe-workers",
+        type=int,
+        default=DEFAULT_PROBE_WORKERS,
+        help=f"Health-check probes in flight at once (default: {DEFAULT_PROBE_WORKERS})"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("sync", "async"),
+        default="sync",
+        help="sync: blocking calls on a thread pool; async: one event loop over aiohttp/httpx (default: sync)"
+    )
+    parser.add_argument(
+        "--async-backend",
+        choices=ASYNC_BACKENDS,
+        help="HTTP library for --engine async (default: whichever is installed, aiohttp first)"
+    )
+    parser.add_argument(
+        "--write-behind",
+        action="store_true",
+        help=f"Queue /api/quotes and /api/leads writes in {WRITE_QUEUE_COLLECTION} and bulk insert them from a scheduled job"
+    )
+    parser.add_argument(
+        "--trace-dir",
+        default=os.path.dirname(os.path.abspath(__file__)),
+        help=f"Directory for {TRACE_FILENAME}.json and {TRACE_FILENAME}.otlp.json (default: next to this script)"
+    )
+    parser.add_argument(
+        "--no-trace",
+        action="store_true",
+        help="Keep request spans in the report only, without writing trace files"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help=f"Re-upload every artifact even if {MANIFEST_FILENAME} shows it unchanged"
+    )
+    add_image_arguments(parser)
+    add_fake_wix_arguments(parser)
+    add_logging_arguments(parser)
+    
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.add_parser("deploy", help="Run the complete deployment (default)")
+    fleet_parser = commands.add_parser(
+        "fleet",
+        help="Deploy to every site in a fleet file, several at a time"
+    )
+    fleet_parser.add_argument(
+        "path",
+        help='JSON list of sites (or {"sites": [...]}), each with name, meta_site_id and '
+             'optional domain, account_id, api_token, theme and site_config'
+    )
+    fleet_parser.add_argument(
+        "--max-sites",
+        type=int,
+        default=DEFAULT_MAX_SITES,
+        help=f"Sites deployed at once (default: {DEFAULT_MAX_SITES}); they share one rate limit per host, "
+             "but each has its own pool, so up to max-sites x pool-size connections are open"
+    )
+    fleet_parser.add_argument(
+        "--output",
+        default=DEFAULT_FLEET_REPORT,
+        help=f"Where to write the merged fleet report (default: {DEFAULT_FLEET_REPORT})"
+    )
+    import_parser = commands.add_parser(
+        "import-catalog",
+        help="Stream a CSV/JSONL product file into a data collection"
+    )
+    import_parser.add_argument("path", help="Product file (.csv, .jsonl or .ndjson)")
+    import_parser.add_argument(
+        "--collection",
+        default=PRODUCT_COLLECTION,
+        help="Target collection (default: GFE_WindowProducts)"
+    )
+    import_parser.add_argument("--report", help="Write the import summary to this JSON file")
+    benchmark_parser = commands.add_parser(
+        "benchmark",
+        help="Load-test the /api/quotes, /api/leads and /api/products functions"
+    )
+    target = benchmark_parser.add_mutually_exclusive_group()
+    target.add_argument("--target", help="Base URL to load (default: https://goodfaithexteriors.com)")
+    target.add_argument("--stub", action="store_true", help="Run against an in-process stub of the functions")
+    benchmark_parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_BENCHMARK_RATE,
+        help=f"Requests started per second (default: {DEFAULT_BENCHMARK_RATE})"
+    )
+    benchmark_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_BENCHMARK_CONCURRENCY,
+        help=f"Requests in flight at most (default: {DEFAULT_BENCHMARK_CONCURRENCY})"
+    )
+    benchmark_parser.add_argument(
+        "--duration",
+        type=float,
+        default=DEFAULT_BENCHMARK_DURATION,
+        help=f"Seconds to generate load (default: {DEFAULT_BENCHMARK_DURATION})"
+    )
+    benchmark_parser.add_argument("--seed", type=int, help="Random seed for reproducible payloads")
+    benchmark_parser.add_argument(
+        "--output",
+        default="benchmark-results.json",
+        help="Where to write the JSON results (default: benchmark-results.json)"
+    )
+    return parser.parse_args()
+
 def main():
     """Main deployment function"""
-    deployer = WixCompleteDeployment()
+    args = parse_args()
+    log_backend = log_backend_from_args(args)
+    fake_wix = fake_wix_from_args(args)
+    try:
+        run(args, fake_wix.url if fake_wix else args.base_url, persist_manifest=not fake_wix,
+            log_backend=log_backend, probe_origin=fake_wix.url if fake_wix else None)
+    finally:
+        if fake_wix:
+            DeployLog(log_backend)(f"🧪 Fake Wix API: {json.dumps(fake_wix.stats())}")
+            fake_wix.stop()
+        log_backend.close()
+
+def run(args, base_url, persist_manifest=True, log_backend=None, probe_origin=None):
+    """Run the selected command against base_url; probe_origin serves the published site (the fake API's)"""
+    console = DeployLog(log_backend)
+    engine = WixCompleteDeployment
+    options = dict(
+        pool_size=args.pool_size,
+        max_retries=args.max_retries,
+        rate=args.rate_limit,
+        max_rate=args.max_rate,
+        force=args.force,
+        minify=not args.no_minify,
+        batch_size=args.batch_size,
+        insert_workers=args.insert_workers,
+        probe_repeats=args.probe_repeats,
+        probe_workers=args.probe_workers,
+        probe_origin=probe_origin,
+        base_url=base_url,
+        persist_manifest=persist_manifest,
+        write_behind=args.write_behind,
+        trace_dir=None if args.no_trace else args.trace_dir,
+        log_backend=log_backend,
+        optimize_images=args.optimize_images,
+        image_source_dir=args.image_source_dir,
+        image_cache=args.image_cache
+    )
+    # Catalog imports and benchmarks keep the sync engine
+    if args.engine == "async" and args.command in (None, "deploy", "fleet"):
+        engine = AsyncWixCompleteDeployment
+        options["backend"] = args.async_backend
+    
+    if args.command == "fleet":
+        run_fleet(args, engine, options, console)
+        return
+    
+    deployer = engine(**options)
+    
+    if args.command == "import-catalog":
+        result = deployer.import_catalog(args.path, args.collection)
+        if args.report:
+            with open(args.report, 'w') as f:
+                json.dump(result, f, indent=2)
+            console(f"📄 Import summary saved to: {args.report}")
+        return
+    
+    if args.command == "benchmark":
+        result = deployer.run_benchmark(
+            target=args.target,
+            rate=args.rate,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            stub=args.stub,
+            seed=args.seed
+        )
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        console(f"📄 Benchmark results saved to: {args.output}")
+        return
+    
     report = deployer.execute_complete_deployment()
     
     if report:
-        print(f"\n✅ Deployment completed successfully!")
-        print(f"📄 Report saved to: /home/ubuntu/complete_deployment_report.json")
+        console("✅ Deployment completed successfully!")
+        console(f"📄 Report saved to: {deployer.report_path}")
     else:
-        print(f"\n❌ Deployment failed. Check logs for details.")
+        console("❌ Deployment failed. Check logs for details.", "ERROR")
+
+def run_fleet(args, engine, options, console):
+    """Deploy every site in the fleet file and write the merged report
+
+    Every site paces its calls through the same per-host limiters, so the
+    fleet as a whole stays within --rate-limit/--max-rate and a 429 pauses
+    all sites; connections are bounded by max_sites x pool_size.
+    """
+    sites = load_fleet(args.path)
+    limiters = HostRateLimiters(rate=options["rate"], max_rate=options["max_rate"])
+    console(f"🚦 Sites share one rate limit per host; up to {args.max_sites * options['pool_size']} connections "
+            f"({args.max_sites} sites x {options['pool_size']})")
+    fleet = FleetDeployment(
+        sites,
+        lambda site: engine(site=site, report_path=None, limiters=limiters, **options),
+        max_sites=args.max_sites,
+        log=console
+    )
+    report = fleet.run()
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    console(f"📄 Fleet report saved to: {args.output}")
+    if report["summary"]["failed"]:
+        console(f"❌ {report['summary']['failed']} of {report['summary']['sites']} sites failed. Check the fleet report.",
+                "ERROR")
 
 if __name__ == "__main__":
     main()
@@ -4,16 +4,60 @@ Good Faith Exteriors - Wix Headless Blocks App Deployment Script
 Deploys all widgets with dark navy blue theme and gold accents to goodfaithexteriors.com
 """
 
+import argparse
 import json
-import requests
 import os
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from gfe_deploy.bundler import AssetBundler
+from gfe_deploy.fake_wix import DEFAULT_BASE_URL, add_fake_wix_arguments, fake_wix_from_args, manifest_scope
+from gfe_deploy.html_split import split_html_file
+from gfe_deploy.http_session import DEFAULT_MAX_RETRIES, DEFAULT_POOL_SIZE, PooledSession
+from gfe_deploy.image_pipeline import DEFAULT_IMAGE_CACHE, ImagePipeline, add_image_arguments, image_assets
+from gfe_deploy.manifest import MANIFEST_FILENAME, DeploymentManifest, content_hash
+from gfe_deploy.media_upload import DEFAULT_MEDIA_DIR, UPLOAD_TIMEOUT, deploy_media_steps
+from gfe_deploy.rate_limit import DEFAULT_MAX_RATE, DEFAULT_RATE
+from gfe_deploy.results import ErrorLog, response_endpoint
+from gfe_deploy.steps import ApiCall, StreamUpload, run_steps
+from gfe_deploy.structured_log import DeployLog, add_logging_arguments, log_backend_from_args
+
+DEFAULT_MAX_WORKERS = 4
+
 class WixHeadlessBlocksDeployer:
-    def __init__(self):
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, pool_size=DEFAULT_POOL_SIZE,
+                 max_retries=DEFAULT_MAX_RETRIES, rate=DEFAULT_RATE, max_rate=DEFAULT_MAX_RATE,
+                 force=False, minify=True, base_url=DEFAULT_BASE_URL, persist_manifest=True,
+                 log_backend=None, optimize_images=False, image_source_dir=None, image_cache=None):
+        self.logger = DeployLog(log_backend)
         self.config = self.load_config()
-        self.base_url = "https://www.wixapis.com"
+        self.max_workers = max(1, max_workers)
+        self.force = force
+        self.bundler = AssetBundler() if minify else None
+        self.images = ImagePipeline(
+            image_assets(self.config),
+            image_cache or os.path.join(os.path.dirname(__file__), DEFAULT_IMAGE_CACHE),
+            source_dir=image_source_dir,
+            log=self.log
+        ) if optimize_images else None
+        self.widget_parts = {}
+        self.shared_stylesheet_id = None
+        self.shared_stylesheet_url = None
+        self.errors = ErrorLog()
+        self.manifest = DeploymentManifest(
+            os.path.join(os.path.dirname(__file__), MANIFEST_FILENAME) if persist_manifest else None,
+            manifest_scope(self.config['wix']['headless']['meta_site_id'], base_url)
+        )
+        self.results_lock = threading.Lock()
+        self.session = PooledSession(
+            pool_size=max(pool_size, self.max_workers),
+            max_retries=max_retries,
+            rate=rate,
+            max_rate=max_rate,
+            log=self.log
+        )
+        self.base_url = base_url.rstrip("/")
         self.headers = {
             "Authorization": f"Bearer {self.config['wix']['headless']['api_token']}",
             "Content-Type": "application/json",
@@ -36,8 +80,7 @@ class WixHeadlessBlocksDeployer:
 
     def log(self, message, level="INFO"):
         """Log deployment messages"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] {level}: {message}")
+        self.logger(message, level)
 
     def create_widget_block(self, widget_id, widget_config):
         """Create a widget block in Wix Headless Blocks App"""
@@ -49,8 +92,10 @@ class WixHeadlessBlocksDeployer:
             self.log(f"Widget file not found: {widget_path}", "ERROR")
             return False
 
-        with open(widget_path, 'r', encoding='utf-8') as f:
-            widget_html = f.read()
+        # Prefer the bundled parts; otherwise split markup, CSS and JS in one streaming pass
+        widget_parts = self.widget_parts.get(widget_id)
+        if widget_parts is None:
+            widget_parts = split_html_file(widget_path)
 
         # Prepare widget block data
         block_data = {
@@ -58,13 +103,14 @@ class WixHeadlessBlocksDeployer:
             "description": widget_config["description"],
             "category": widget_config["category"],
             "icon": widget_config["icon"],
-            "html": widget_html,
-            "css": self.extract_css_from_html(widget_html),
-            "javascript": self.extract_js_from_html(widget_html),
+            "html": self.images.rewrite(widget_parts.markup) if self.images else widget_parts.markup,
+            "css": widget_parts.css,
+            "javascript": widget_parts.javascript,
             "configuration": {
                 "theme": self.config["theme"],
                 "images": self.config["image_assets"],
-                "domain": self.config["app"]["domain"]
+                "domain": self.config["app"]["domain"],
+                "shared_stylesheet": self.shared_stylesheet_id
             },
             "metadata": {
                 "version": self.config["app"]["version"],
@@ -76,59 +122,194 @@ class WixHeadlessBlocksDeployer:
         }
 
         try:
-            # Create block via Wix Blocks API
-            response = requests.post(
+            # Create or update block via Wix Blocks API
+            response, action, entry = self.upload_artifact(
+                "widgets",
+                widget_id,
+                block_data,
                 f"{self.base_url}/blocks/v1/blocks",
-                headers=self.headers,
-                json=block_data,
-                timeout=30
+                f"{self.base_url}/blocks/v1/blocks/{{id}}"
             )
             
+            if action == "unchanged":
+                self.log(f"⏭️ Widget block unchanged since last deploy: {widget_id}")
+                self.record_widget_result(widget_id, {
+                    "status": "success",
+                    "action": action,
+                    "block_id": entry["remote_id"],
+                    "name": widget_config["name"],
+                    "url": entry.get("url", ""),
+                    "created_at": entry["deployed_at"]
+                })
+                return True
+            
             if response.status_code in [200, 201]:
-                result = response.json()
-                self.log(f"✅ Widget block created successfully: {widget_id}")
-                self.deployment_results["widgets"][widget_id] = {
+                self.log(f"✅ Widget block {action} successfully: {widget_id}")
+                self.record_widget_result(widget_id, {
                     "status": "success",
-                    "block_id": result.get("id"),
+                    "action": action,
+                    "block_id": entry["remote_id"],
                     "name": widget_config["name"],
-                    "url": result.get("url", ""),
+                    "url": entry.get("url", ""),
                     "created_at": datetime.now().isoformat()
-                }
-                self.deployment_results["success_count"] += 1
+                })
                 return True
             else:
-                error_msg = f"Failed to create widget block: {response.status_code} - {response.text}"
-                self.log(error_msg, "ERROR")
-                self.deployment_results["widgets"][widget_id] = {
+                error = self.errors.record(
+                    "Failed to create widget block",
+                    response.status_code,
+                    response_endpoint(response),
+                    response.text
+                )
+                self.log(f"Failed to create widget block {widget_id}: {response.status_code} - {error['body']}", "ERROR")
+                self.record_widget_result(widget_id, {
                     "status": "error",
-                    "error": error_msg
-                }
-                self.deployment_results["errors"].append(error_msg)
+                    "error": f"HTTP {response.status_code}",
+                    "error_id": error["id"]
+                })
                 return False
 
         except Exception as e:
-            error_msg = f"Exception creating widget block {widget_id}: {str(e)}"
-            self.log(error_msg, "ERROR")
-            self.deployment_results["widgets"][widget_id] = {
+            error = self.errors.record("Exception creating widget block", body=str(e))
+            self.log(f"Exception creating widget block {widget_id}: {str(e)}", "ERROR")
+            self.record_widget_result(widget_id, {
                 "status": "error",
-                "error": error_msg
+                "error": error["body"],
+                "error_id": error["id"]
+            })
+            return False
+
+    def build_widget_assets(self, widgets):
+        """Split and minify every widget up front so rules they share are lifted once"""
+        artifacts = {}
+        for widget in widgets:
+            widget_path = os.path.join(os.path.dirname(__file__), 'widgets', f'{widget["id"]}.html')
+            if os.path.exists(widget_path):
+                artifacts[widget["id"]] = split_html_file(widget_path)
+        
+        self.widget_parts = self.bundler.build(artifacts)
+        for widget_id, size in self.bundler.sizes.items():
+            self.log(f"📦 {widget_id}: {size['bytes_before']:,} → {size['bytes_after']:,} bytes")
+
+    def deploy_shared_stylesheet(self):
+        """Deploy the theme rules lifted out of the widgets as one stylesheet block
+
+        Returns True once the sheet is live at a URL the widgets can link
+        (or there is nothing to share).
+        """
+        if not self.bundler.shared_css:
+            return True
+        
+        stylesheet_data = {
+            "name": "GFE Theme",
+            "description": "Leading theme rules shared by Good Faith Exteriors widgets",
+            "category": "theme",
+            "css": self.bundler.shared_css,
+            "metadata": {
+                "version": self.config["app"]["version"],
+                "author": "Good Faith Exteriors"
             }
-            self.deployment_results["errors"].append(error_msg)
+        }
+        
+        try:
+            response, action, entry = self.upload_artifact(
+                "stylesheets",
+                "gfe-theme",
+                stylesheet_data,
+                f"{self.base_url}/blocks/v1/blocks",
+                f"{self.base_url}/blocks/v1/blocks/{{id}}"
+            )
+            if action == "unchanged" or response.status_code in [200, 201]:
+                if not entry.get("url"):
+                    self.log("Shared stylesheet deployed without a URL to import it from", "WARNING")
+                    return False
+                self.shared_stylesheet_id = entry["remote_id"]
+                self.shared_stylesheet_url = entry["url"]
+                self.log(f"✅ Shared theme stylesheet {action} ({len(self.bundler.shared_css):,} bytes)")
+                return True
+            self.log(f"Shared stylesheet response: {response.status_code} - {response.text}", "WARNING")
+        except Exception as e:
+            self.log(f"Exception deploying shared stylesheet: {str(e)}", "WARNING")
+        return False
+
+    def upload_artifact(self, kind, key, payload, create_url, update_url):
+        """Upload an artifact unless the manifest shows identical content already deployed
+        
+        Known artifacts are PATCHed at update_url (formatted with the remote id);
+        new ones, or ones whose remote copy has gone, are POSTed to create_url.
+        Returns (response, action, manifest entry); response is None when unchanged.
+        """
+        digest = content_hash(payload)
+        entry = self.manifest.lookup(kind, key)
+        if not self.force and self.manifest.is_unchanged(kind, key, digest):
+            return None, "unchanged", entry
+        
+        if entry and entry.get("remote_id"):
+            response = self.session.patch(
+                update_url.format(id=entry["remote_id"]),
+                headers=self.headers,
+                json=payload,
+                timeout=30
+            )
+            action = "updated"
+            if response.status_code == 404:
+                self.manifest.forget(kind, key)
+                entry = None
+        if not entry or not entry.get("remote_id"):
+            response = self.session.post(create_url, headers=self.headers, json=payload, timeout=30)
+            action = "created"
+        
+        if response.status_code in [200, 201]:
+            try:
+                result = response.json()
+            except ValueError:
+                result = {}
+            remote_id = result.get("id") or (entry or {}).get("remote_id")
+            entry = self.manifest.record(kind, key, digest, remote_id, url=result.get("url", ""))
+        return response, action, entry
+
+    def optimize_images(self):
+        """Fetch, resize and convert the image assets and upload their srcset variants"""
+        self.log("🖼️ Optimizing image assets...")
+        try:
+            self.images.prepare()
+            run_steps(self.images.upload_steps(self.manifest, self.force), self.perform)
+        except Exception as e:
+            error = self.errors.record("Exception optimizing images", body=str(e))
+            self.log(f"Exception optimizing images: {error['body']}", "ERROR")
             return False
+        self.deployment_results["images"] = self.images.report()
+        return True
 
-    def extract_css_from_html(self, html_content):
-        """Extract CSS from HTML content"""
-        import re
-        css_pattern = r'<style[^>]*>(.*?)</style>'
-        matches = re.findall(css_pattern, html_content, re.DOTALL)
-        return '\n'.join(matches)
+    def upload_media_assets(self):
+        """Stream the large assets under media/ (video backgrounds, 3D previews) to the Media Manager"""
+        media_dir = os.path.join(os.path.dirname(__file__), DEFAULT_MEDIA_DIR)
+        try:
+            results = run_steps(deploy_media_steps(media_dir, self.manifest, self.force, log=self.log), self.perform)
+        except Exception as e:
+            error = self.errors.record("Exception uploading media assets", body=str(e))
+            self.log(f"Exception uploading media assets: {error['body']}", "ERROR")
+            return False
+        if results:
+            self.deployment_results["media"] = results
+        return all(result["status"] == "success" for result in results.values())
 
-    def extract_js_from_html(self, html_content):
-        """Extract JavaScript from HTML content"""
-        import re
-        js_pattern = r'<script[^>]*>(.*?)</script>'
-        matches = re.findall(js_pattern, html_content, re.DOTALL)
-        return '\n'.join(matches)
+    def perform(self, effect):
+        """Send one request of a media upload: a JSON API call or a streamed file body"""
+        if isinstance(effect, ApiCall):
+            return self.session.request(effect.method, f"{self.base_url}{effect.endpoint}", headers=self.headers,
+                                        params=effect.params, json=effect.data, timeout=30)
+        if isinstance(effect, StreamUpload):
+            return self.session.request(effect.method, effect.url, headers=effect.headers, data=effect.body,
+                                        timeout=UPLOAD_TIMEOUT)
+        raise TypeError(f"Unknown deployment step: {effect!r}")
+
+    def record_widget_result(self, widget_id, widget_result):
+        """Record a widget outcome; safe to call from deployment worker threads"""
+        with self.results_lock:
+            self.deployment_results["widgets"][widget_id] = widget_result
+            if widget_result["status"] == "success":
+                self.deployment_results["success_count"] += 1
 
     def deploy_landing_page(self):
         """Deploy the main landing page"""
@@ -141,6 +322,10 @@ class WixHeadlessBlocksDeployer:
 
         with open(landing_page_path, 'r', encoding='utf-8') as f:
             landing_html = f.read()
+        if self.images:
+            landing_html = self.images.rewrite(landing_html)
+        if self.bundler:
+            landing_html = self.bundler.bundle_page("landing-page", landing_html)
 
         # Deploy landing page as main site page
         page_data = {
@@ -161,39 +346,48 @@ class WixHeadlessBlocksDeployer:
         }
 
         try:
-            # Deploy page via Wix Sites API
-            response = requests.post(
-                f"{self.base_url}/sites/v1/sites/{self.config['wix']['headless']['meta_site_id']}/pages",
-                headers=self.headers,
-                json=page_data,
-                timeout=30
+            # Deploy or update page via Wix Sites API
+            pages_url = f"{self.base_url}/sites/v1/sites/{self.config['wix']['headless']['meta_site_id']}/pages"
+            response, action, entry = self.upload_artifact(
+                "pages",
+                "home",
+                page_data,
+                pages_url,
+                f"{pages_url}/{{id}}"
             )
             
-            if response.status_code in [200, 201]:
-                result = response.json()
-                self.log("✅ Landing page deployed successfully")
+            if action == "unchanged" or response.status_code in [200, 201]:
+                self.log(f"✅ Landing page {action}" + ("" if action == "unchanged" else " successfully"))
                 self.deployment_results["landing_page"] = {
                     "status": "success",
-                    "page_id": result.get("id"),
+                    "action": action,
+                    "page_id": entry["remote_id"],
                     "url": f"https://{self.config['app']['domain']}",
                     "deployed_at": datetime.now().isoformat()
                 }
                 return True
             else:
-                error_msg = f"Failed to deploy landing page: {response.status_code} - {response.text}"
-                self.log(error_msg, "ERROR")
+                error = self.errors.record(
+                    "Failed to deploy landing page",
+                    response.status_code,
+                    response_endpoint(response),
+                    response.text
+                )
+                self.log(f"Failed to deploy landing page: {response.status_code} - {error['body']}", "ERROR")
                 self.deployment_results["landing_page"] = {
                     "status": "error",
-                    "error": error_msg
+                    "error": f"HTTP {response.status_code}",
+                    "error_id": error["id"]
                 }
                 return False
 
         except Exception as e:
-            error_msg = f"Exception deploying landing page: {str(e)}"
-            self.log(error_msg, "ERROR")
+            error = self.errors.record("Exception deploying landing page", body=str(e))
+            self.log(f"Exception deploying landing page: {str(e)}", "ERROR")
             self.deployment_results["landing_page"] = {
                 "status": "error",
-                "error": error_msg
+                "error": error["body"],
+                "error_id": error["id"]
             }
             return False
 
@@ -210,7 +404,7 @@ class WixHeadlessBlocksDeployer:
         }
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/sites/v1/sites/{self.config['wix']['headless']['meta_site_id']}/domains",
                 headers=self.headers,
                 json=domain_config,
@@ -257,6 +451,13 @@ class WixHeadlessBlocksDeployer:
                     {"key": "quantity", "type": "number", "displayName": "Quantity"},
                     {"key": "total", "type": "number", "displayName": "Total Price"},
                     {"key": "status", "type": "text", "displayName": "Status"}
+                ],
+                "indexes": [
+                    {
+                        "name": "quoteId_unique",
+                        "fields": [{"path": "quoteId", "order": "ASC"}],
+                        "unique": True
+                    }
                 ]
             },
             {
@@ -278,10 +479,10 @@ class WixHeadlessBlocksDeployer:
         success_count = 0
         for collection in collections:
             try:
-                response = requests.post(
+                response = self.session.post(
                     f"{self.base_url}/data/v1/collections",
                     headers=self.headers,
-                    json=collection,
+                    json={key: value for key, value in collection.items() if key != "indexes"},
                     timeout=30
                 )
                 
@@ -293,10 +494,44 @@ class WixHeadlessBlocksDeployer:
                     
             except Exception as e:
                 self.log(f"Exception creating collection {collection['name']}: {str(e)}", "WARNING")
+            
+            # Indexes are created even when the collection already existed
+            for index in collection.get("indexes", []):
+                self.create_collection_index(collection['name'], index)
 
         self.log(f"Collections setup completed: {success_count}/{len(collections)} successful")
         return success_count > 0
 
+    def create_collection_index(self, collection_id, index):
+        """Create one index on a collection; an index that already exists counts as created"""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/wix-data/v2/indexes",
+                headers=self.headers,
+                json={"dataCollectionId": collection_id, "index": index},
+                timeout=30
+            )
+        except Exception as e:
+            self.log(f"Exception creating index {collection_id}.{index['name']}: {str(e)}", "WARNING")
+            return False
+        if response.status_code in [200, 201, 409]:
+            self.log(f"🗂️ Index ready: {collection_id}.{index['name']}")
+            return True
+        self.log(f"Index creation response: {response.status_code} - {response.text}", "WARNING")
+        return False
+
+    def deploy_widget(self, widget):
+        """Deploy a single widget entry from config["widgets"]"""
+        widget_id = widget["id"]
+        self.log(f"Deploying widget: {widget_id}")
+        
+        success = self.create_widget_block(widget_id, widget)
+        if success:
+            self.log(f"✅ Widget deployed: {widget_id}")
+        else:
+            self.log(f"❌ Widget failed: {widget_id}")
+        return success
+
     def deploy_all_widgets(self):
         """Deploy all widgets to Wix Headless Blocks App"""
         self.log("🚀 Starting Wix Headless Blocks App Deployment")
@@ -305,23 +540,32 @@ class WixHeadlessBlocksDeployer:
         widgets = self.config["widgets"]
         self.deployment_results["total_count"] = len(widgets)
         
-        # Deploy each widget
-        for widget in widgets:
-            widget_id = widget["id"]
-            self.log(f"Deploying widget: {widget_id}")
-            
-            success = self.create_widget_block(widget_id, widget)
-            if success:
-                self.log(f"✅ Widget deployed: {widget_id}")
+        # Image variants go up first so the widgets and landing page can point at them
+        if self.images:
+            self.optimize_images()
+        
+        # Minify widgets and deploy the styles they share once, ahead of the widgets;
+        # the widgets sharing them link the sheet, or keep those rules inline if it is not live
+        if self.bundler:
+            self.build_widget_assets(widgets)
+            if self.deploy_shared_stylesheet():
+                self.widget_parts = self.bundler.link_shared(self.widget_parts, self.shared_stylesheet_url)
             else:
-                self.log(f"❌ Widget failed: {widget_id}")
-            
-            # Small delay between deployments
-            time.sleep(1)
+                self.log("⚠️ Shared theme stylesheet is not live; widgets keep their shared rules inline", "WARNING")
+                self.widget_parts = self.bundler.unlift()
+        
+        # Deploy widgets, up to max_workers blocks in flight at once;
+        # pacing is left to the session's adaptive rate limiter
+        self.log(f"Deploying {len(widgets)} widgets with {self.max_workers} workers")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(self.deploy_widget, widgets))
 
         # Deploy landing page
         self.deploy_landing_page()
         
+        # Upload large media assets, streamed from disk
+        self.upload_media_assets()
+        
         # Configure domain
         self.configure_domain()
         
@@ -329,8 +573,17 @@ class WixHeadlessBlocksDeployer:
         self.setup_collections()
         
         # Finalize deployment
+        self.manifest.save()
         self.deployment_results["status"] = "completed"
         self.deployment_results["completion_time"] = datetime.now().isoformat()
+        self.deployment_results["http_connections"] = self.session.connection_stats()
+        self.deployment_results["rate_limit"] = self.session.rate_limit_stats()
+        self.deployment_results["errors"] = self.errors.to_list()
+        self.deployment_results["error_count"] = self.errors.total()
+        if self.bundler:
+            self.deployment_results["bundle"] = self.bundler.report()
+            self.deployment_results["shared_stylesheet"] = self.shared_stylesheet_id
+        self.session.close()
         
         # Save results
         self.save_deployment_results()
@@ -359,10 +612,16 @@ class WixHeadlessBlocksDeployer:
         self.log(f"🏢 Account ID: {self.config['wix']['headless']['account_id']}")
         self.log(f"🆔 Meta Site ID: {self.config['wix']['headless']['meta_site_id']}")
         
+        connections = self.deployment_results.get("http_connections")
+        if connections:
+            self.log(f"🔌 HTTP connections: {connections['connections_opened']} opened, "
+                     f"{connections['connections_reused']} reused for {connections['requests']} requests")
+        
         if self.deployment_results["errors"]:
-            self.log(f"⚠️  Errors encountered: {len(self.deployment_results['errors'])}")
+            self.log(f"⚠️  Errors encountered: {self.deployment_results['error_count']}")
             for error in self.deployment_results["errors"]:
-                self.log(f"   - {error}")
+                status = f" {error['status']}" if error["status"] else ""
+                self.log(f"   - {error['message']}:{status} {error['body']} (×{error['count']})")
         
         self.log("=" * 60)
         self.log("📋 Deployed Widgets:")
@@ -372,10 +631,81 @@ class WixHeadlessBlocksDeployer:
         
         self.log("=" * 60)
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Deploy the GFE widget suite to Wix Headless Blocks")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Widgets deployed concurrently (default: {DEFAULT_MAX_WORKERS}, 1 = serial)"
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help=f"Keep-alive connections kept per host (default: {DEFAULT_POOL_SIZE})"
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries for failed connections and 429/5xx responses (default: {DEFAULT_MAX_RETRIES})"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"Initial requests per second per host (default: {DEFAULT_RATE})"
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=DEFAULT_MAX_RATE,
+        help=f"Ceiling the adaptive rate may climb to (default: {DEFAULT_MAX_RATE})"
+    )
+    parser.add_argument(
+        "--no-minify",
+        action="store_true",
+        help="Upload widget and page sources verbatim, without the bundling stage"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help=f"Re-upload every artifact even if {MANIFEST_FILENAME} shows it unchanged"
+    )
+    add_image_arguments(parser)
+    add_fake_wix_arguments(parser)
+    add_logging_arguments(parser)
+    return parser.parse_args()
+
 def main():
     """Main deployment function"""
-    deployer = WixHeadlessBlocksDeployer()
-    deployer.deploy_all_widgets()
+    args = parse_args()
+    log_backend = log_backend_from_args(args)
+    fake_wix = fake_wix_from_args(args)
+    deployer = WixHeadlessBlocksDeployer(
+        max_workers=args.max_workers,
+        pool_size=args.pool_size,
+        max_retries=args.max_retries,
+        rate=args.rate_limit,
+        max_rate=args.max_rate,
+        force=args.force,
+        minify=not args.no_minify,
+        base_url=fake_wix.url if fake_wix else args.base_url,
+        persist_manifest=not fake_wix,
+        log_backend=log_backend,
+        optimize_images=args.optimize_images,
+        image_source_dir=args.image_source_dir,
+        image_cache=args.image_cache
+    )
+    try:
+        deployer.deploy_all_widgets()
+    finally:
+        if fake_wix:
+            deployer.log(f"🧪 Fake Wix API: {json.dumps(fake_wix.stats())}")
+            fake_wix.stop()
+        log_backend.close()
 
 if __name__ == "__main__":
     main()
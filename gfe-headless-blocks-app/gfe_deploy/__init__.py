@@ -0,0 +1,4 @@
+"""
+Good Faith Exteriors - Shared deployment helpers
+Used by deploy-headless-blocks.py and the complete REST API deployment script
+"""
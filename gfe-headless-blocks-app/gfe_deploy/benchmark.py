@@ -0,0 +1,247 @@
+"""
+Good Faith Exteriors - HTTP function load generator
+Drives a fixed request rate at /api/quotes, /api/leads and /api/products with
+payloads shaped like GFE_Quotes and GFE_Leads, and reports throughput, latency
+histograms and error rates per scenario
+"""
+
+import bisect
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from gfe_deploy.health_check import latency_summary
+
+DEFAULT_BENCHMARK_RATE = 20.0
+DEFAULT_BENCHMARK_CONCURRENCY = 8
+DEFAULT_BENCHMARK_DURATION = 30.0
+DEFAULT_BENCHMARK_TIMEOUT = 10
+HISTOGRAM_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+FIRST_NAMES = ("Maria", "James", "Priya", "Chen", "Olivia", "Marcus", "Sofia", "Daniel")
+LAST_NAMES = ("Nguyen", "Smith", "Patel", "Garcia", "Johnson", "Kowalski", "Reyes", "Brown")
+WINDOW_TYPES = ("casement", "double-hung", "sliding", "awning", "picture", "bay")
+BRANDS = ("Andersen", "Pella", "Marvin", "Milgard", "Provia")
+MATERIALS = ("vinyl", "wood", "fiberglass", "aluminum", "composite")
+LEAD_SOURCES = ("website", "ai-estimator", "referral", "google-ads", "facebook")
+PRODUCT_FIELD_SETS = ("", "name,brand,basePrice,image", "name,brand,style,material,basePrice")
+
+def contact(rng):
+    """Name, email and phone for a synthetic customer"""
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES)
+    return {
+        "name": f"{first} {last}",
+        "email": f"{first}.{last}{rng.randint(1, 9999)}@example.com".lower(),
+        "phone": f"(612) 555-{rng.randint(0, 9999):04d}"
+    }
+
+def quote_payload(rng):
+    """POST /api/quotes body with the fields post_quotes copies into GFE_Quotes"""
+    quantity = rng.randint(1, 24)
+    unit_price = rng.choice((350, 480, 620, 750, 890, 1150))
+    payload = contact(rng)
+    payload.update({
+        "windowType": rng.choice(WINDOW_TYPES),
+        "brand": rng.choice(BRANDS),
+        "material": rng.choice(MATERIALS),
+        "quantity": quantity,
+        "unitPrice": unit_price,
+        "total": quantity * unit_price
+    })
+    return payload
+
+def lead_payload(rng):
+    """POST /api/leads body with the fields post_leads copies into GFE_Leads"""
+    payload = contact(rng)
+    payload.update({
+        "source": rng.choice(LEAD_SOURCES),
+        "notes": f"Interested in {rng.randint(2, 15)} {rng.choice(WINDOW_TYPES)} windows"
+    })
+    return payload
+
+def product_catalog(count, seed=None):
+    """Synthetic GFE_WindowProducts rows for seeding the function stub"""
+    rng = random.Random(seed)
+    products = []
+    for index in range(count):
+        brand = rng.choice(BRANDS)
+        style = rng.choice(WINDOW_TYPES)
+        products.append({
+            "name": f"{brand} {style.title()} {index}",
+            "brand": brand,
+            "type": "windows",
+            "style": style,
+            "material": rng.choice(MATERIALS),
+            "basePrice": rng.randrange(300, 1500, 10),
+            "features": ["Low-E Glass", "Energy Star"],
+            "description": f"{brand} {style} window"
+        })
+    return products
+
+def product_query_params(rng):
+    """Query string for a catalog page view: optional brand/style/price filters and projection"""
+    params = {"limit": rng.choice((12, 24, 48))}
+    if rng.random() < 0.5:
+        params["brand"] = rng.choice(BRANDS)
+    if rng.random() < 0.3:
+        params["style"] = rng.choice(WINDOW_TYPES)
+    if rng.random() < 0.3:
+        low = rng.randrange(300, 1000, 100)
+        params.update({"minPrice": low, "maxPrice": low + 400})
+    fields = rng.choice(PRODUCT_FIELD_SETS)
+    if fields:
+        params["fields"] = fields
+    return urlencode(params)
+
+class ScenarioStats:
+    """Latencies, status counts and a fixed-bucket histogram for one scenario"""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def record(self, status, seconds):
+        """Add one completed request (status "error" for transport failures)"""
+        self.latencies.append(seconds)
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        if status == "error" or status >= 400:
+            self.errors += 1
+        self.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, seconds * 1000)] += 1
+
+    def report(self, elapsed):
+        """Throughput, error rate, percentiles and histogram over elapsed seconds"""
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        completed = len(self.latencies)
+        return {
+            "requests": completed,
+            "throughput_rps": round(completed / elapsed, 2) if elapsed else None,
+            "errors": self.errors,
+            "error_rate": round(self.errors / completed, 4) if completed else None,
+            "status_counts": self.statuses,
+            "latency_ms": latency_summary(self.latencies),
+            "histogram_ms": dict(zip(labels, self.histogram))
+        }
+
+class LoadGenerator:
+    """Open-loop load: requests start on a fixed schedule, at most concurrency in flight
+
+    A tick that finds every worker busy is counted as saturated rather than
+    queued, so a slow target shows up as lost throughput instead of hiding
+    behind a growing backlog.
+    """
+
+    def __init__(self, base_url, rate=DEFAULT_BENCHMARK_RATE, concurrency=DEFAULT_BENCHMARK_CONCURRENCY,
+                 duration=DEFAULT_BENCHMARK_DURATION, timeout=DEFAULT_BENCHMARK_TIMEOUT, seed=None, log=None):
+        self.base_url = base_url.rstrip("/") + "/"
+        self.rate = max(0.1, rate)
+        self.concurrency = max(1, concurrency)
+        self.duration = duration
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message, level="INFO": None)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(self.concurrency)
+        self.stats = {}
+        self.overall = ScenarioStats()
+        self.quote_ids = []
+        self.saturated = 0
+        # (scenario, weight): writes dominate, as they do for a quoting site
+        self.scenarios = [
+            ("create_quote", 4),
+            ("get_quote", 2),
+            ("create_lead", 3),
+            ("list_products", 3)
+        ]
+
+    def next_request(self):
+        """(scenario, method, path, body) for the next tick"""
+        names = [name for name, _ in self.scenarios]
+        weights = [weight for _, weight in self.scenarios]
+        with self.lock:
+            scenario = self.rng.choices(names, weights)[0]
+            if scenario == "get_quote" and not self.quote_ids:
+                scenario = "create_quote"
+            if scenario == "create_quote":
+                return scenario, "POST", "api/quotes", quote_payload(self.rng)
+            if scenario == "get_quote":
+                return scenario, "GET", f"api/quotes/{self.rng.choice(self.quote_ids)}", None
+            if scenario == "create_lead":
+                return scenario, "POST", "api/leads", lead_payload(self.rng)
+            return scenario, "GET", f"api/products?{product_query_params(self.rng)}", None
+
+    def send(self, scenario, method, path, body):
+        """Issue one request and record its outcome; always frees the worker slot"""
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, urljoin(self.base_url, path), json=body, timeout=self.timeout)
+            status = response.status_code
+            quote_id = None
+            if scenario == "create_quote" and status < 400:
+                try:
+                    quote_id = response.json().get("quoteId")
+                except ValueError:
+                    pass
+        except requests.RequestException:
+            status = "error"
+            quote_id = None
+        finally:
+            elapsed = time.perf_counter() - start
+            self.slots.release()
+        with self.lock:
+            self.stats.setdefault(scenario, ScenarioStats()).record(status, elapsed)
+            self.overall.record(status, elapsed)
+            if quote_id:
+                self.quote_ids.append(quote_id)
+
+    def run(self):
+        """Generate load for duration seconds and return the benchmark report"""
+        self.log(f"🏋️ Benchmarking {self.base_url} at {self.rate:g} req/s, "
+                 f"{self.concurrency} concurrent, for {self.duration:g}s...")
+        interval = 1.0 / self.rate
+        started = time.perf_counter()
+        scheduled = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while True:
+                next_tick = started + scheduled * interval
+                if next_tick - started >= self.duration:
+                    break
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                scheduled += 1
+                if not self.slots.acquire(blocking=False):
+                    self.saturated += 1
+                    continue
+                pool.submit(self.send, *self.next_request())
+        elapsed = time.perf_counter() - started
+        self.session.close()
+        return self.report(scheduled, elapsed)
+
+    def report(self, scheduled, elapsed):
+        """Totals plus per-scenario throughput, error rate and latency distribution"""
+        result = self.overall.report(elapsed)
+        result.update({
+            "target": self.base_url,
+            "target_rate_rps": self.rate,
+            "concurrency": self.concurrency,
+            "duration_seconds": round(elapsed, 3),
+            "scheduled": scheduled,
+            "saturated": self.saturated,
+            "scenarios": {name: stats.report(elapsed) for name, stats in sorted(self.stats.items())}
+        })
+        self.log(f"🏋️ {result['requests']} requests, {result['throughput_rps']} req/s, "
+                 f"error rate {result['error_rate']}, p95 "
+                 f"{(result['latency_ms'] or {}).get('p95')}ms, {self.saturated} ticks saturated")
+        return result
@@ -0,0 +1,144 @@
+"""
+Good Faith Exteriors - Batched, concurrent item inserts for Wix Data collections
+Seeds catalog collections through the bulk insert endpoint and retries only
+the items Wix rejected
+"""
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from gfe_deploy.tracing import in_current_context
+
+BULK_INSERT_ENDPOINT = "/wix-data/v2/bulk/items/insert"
+DEFAULT_BATCH_SIZE = 100
+MAX_BATCH_SIZE = 1000
+DEFAULT_INSERT_WORKERS = 4
+DEFAULT_MAX_ATTEMPTS = 3
+MAX_FAILURE_SAMPLES = 100
+
+def chunked(items, size):
+    """Yield lists of up to size items without materialising the whole iterable"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class BulkInserter:
+    """Inserts items into one collection in concurrent batches
+
+    request is the deployer's make_api_request(method, endpoint, data), which
+    returns a response or None when the call itself failed.
+    """
+
+    def __init__(self, request, collection_id, batch_size=DEFAULT_BATCH_SIZE,
+                 max_workers=DEFAULT_INSERT_WORKERS, max_attempts=DEFAULT_MAX_ATTEMPTS, log=None):
+        self.request = request
+        self.collection_id = collection_id
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.max_workers = max(1, max_workers)
+        self.max_attempts = max(1, max_attempts)
+        self.log = log or (lambda message, level="INFO": None)
+        self.lock = threading.Lock()
+        self.inserted = 0
+        self.failed = 0
+        self.failure_samples = []
+        self.batches = 0
+        self.retried_items = 0
+
+    def insert(self, items):
+        """Insert every item; returns counts plus a sample of the items that still failed after retries"""
+        in_flight = set()
+        offset = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for chunk in chunked(items, self.batch_size):
+                # Keep a bounded number of batches queued so streamed input stays streamed
+                if len(in_flight) >= self.max_workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                indexed = list(enumerate(chunk, start=offset))
+                offset += len(chunk)
+                in_flight.add(pool.submit(in_current_context(self.insert_batch), indexed))
+            for future in in_flight:
+                future.result()
+        return self.summary(offset)
+
+    def insert_batch(self, indexed):
+        """Send one batch, then resend only the rejected items until max_attempts"""
+        pending = indexed
+        errors = {}
+        for attempt in range(1, self.max_attempts + 1):
+            if attempt > 1:
+                with self.lock:
+                    self.retried_items += len(pending)
+            errors = self.send(pending)
+            pending = self.record_attempt(pending, errors)
+            if not pending:
+                return
+        self.record_failures(pending, errors)
+
+    def record_attempt(self, pending, errors):
+        """Count one sent batch; returns the items to resend"""
+        with self.lock:
+            self.inserted += len(pending) - len(errors)
+            self.batches += 1
+        return [(index, item) for index, item in pending if index in errors]
+
+    def record_failures(self, pending, errors):
+        """Count the items still rejected after the last attempt, keeping the first few as samples"""
+        with self.lock:
+            self.failed += len(pending)
+            room = MAX_FAILURE_SAMPLES - len(self.failure_samples)
+            self.failure_samples.extend(
+                {"index": index, "error": errors[index]} for index, _ in pending[:max(0, room)]
+            )
+        self.log(f"{len(pending)} {self.collection_id} items failed after {self.max_attempts} attempts", "WARNING")
+
+    def send(self, indexed):
+        """POST one bulk insert; returns {global index: error} for the items that failed"""
+        response = self.request("POST", BULK_INSERT_ENDPOINT, self.batch_body(indexed))
+        return self.batch_errors(indexed, response)
+
+    def batch_body(self, indexed):
+        """Bulk insert request body for (index, item) pairs"""
+        return {
+            "dataCollectionId": self.collection_id,
+            "dataItems": [{"data": item} for _, item in indexed],
+            "returnEntity": False
+        }
+
+    def batch_errors(self, indexed, response):
+        """{global index: error} for the items a bulk insert response rejected"""
+        if response is None:
+            return {index: "request failed" for index, _ in indexed}
+        if response.status_code not in [200, 201]:
+            return {index: f"HTTP {response.status_code}" for index, _ in indexed}
+
+        try:
+            results = response.json().get("results", [])
+        except ValueError:
+            results = []
+        errors = {}
+        for result in results:
+            metadata = result.get("itemMetadata", {})
+            position = metadata.get("originalIndex")
+            if metadata.get("success", True) or position is None or position >= len(indexed):
+                continue
+            error = metadata.get("error") or {}
+            errors[indexed[position][0]] = error.get("description") or error.get("code") or "rejected"
+        return errors
+
+    def summary(self, total):
+        """Insert counts for the deployment report"""
+        return {
+            "collection": self.collection_id,
+            "total": total,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "batches_sent": self.batches,
+            "retried_items": self.retried_items,
+            "failure_samples": self.failure_samples
+        }
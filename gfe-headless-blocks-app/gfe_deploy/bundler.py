@@ -0,0 +1,309 @@
+"""
+Good Faith Exteriors - Widget asset bundler
+Minifies the CSS, JavaScript and markup of each widget before upload and lifts
+the style rules widgets open with alike into one shared theme stylesheet
+"""
+
+import re
+from html import escape
+
+from gfe_deploy.html_split import HtmlParts, split_html
+
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+CSS_STRING = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+CSS_SPACE_AROUND = re.compile(r"\s*([{};,>])\s*")
+CSS_SPACE_AFTER_COLON = re.compile(r":\s+")
+HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+HTML_PRESERVE = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+
+# A "/" after one of these starts a regex literal rather than a division
+JS_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+JS_REGEX_KEYWORDS = {
+    "return", "typeof", "case", "do", "else", "in", "instanceof",
+    "new", "delete", "void", "throw", "yield", "await"
+}
+JS_PUNCTUATION = set("{}()[];,:=<>+-*/%&|!?~^")
+JS_NEWLINE_DROP_AFTER = set("{([;,")
+JS_NEWLINE_DROP_BEFORE = set("})];,")
+
+def minify_css(css):
+    """Strip comments and collapse whitespace, leaving quoted strings untouched"""
+    css = CSS_COMMENT.sub("", css)
+    pieces = CSS_STRING.split(css)
+    for index in range(0, len(pieces), 2):
+        piece = WHITESPACE.sub(" ", pieces[index])
+        piece = CSS_SPACE_AROUND.sub(r"\1", piece)
+        piece = CSS_SPACE_AFTER_COLON.sub(":", piece)
+        pieces[index] = piece.replace(";}", "}")
+    return "".join(pieces).strip()
+
+def collapse_html(markup):
+    """Drop comments (except conditional ones) and collapse whitespace outside pre/textarea/script/style"""
+    markup = HTML_COMMENT.sub("", markup)
+    pieces = HTML_PRESERVE.split(markup)
+    collapsed = []
+    # split() yields text, then the preserved element and its tag-name group, repeating
+    for index in range(0, len(pieces), 3):
+        collapsed.append(WHITESPACE.sub(" ", pieces[index]))
+        if index + 1 < len(pieces):
+            collapsed.append(pieces[index + 1])
+    return "".join(collapsed).strip()
+
+def skip_js_string(js, start):
+    """Index just past the quoted string opening at start"""
+    quote = js[start]
+    i = start + 1
+    while i < len(js):
+        if js[i] == "\\":
+            i += 2
+            continue
+        if js[i] == quote or (js[i] == "\n" and quote != "`"):
+            return i + 1
+        if quote == "`" and js.startswith("${", i):
+            i = skip_js_braces(js, i + 1)
+            continue
+        i += 1
+    return i
+
+def skip_js_braces(js, start):
+    """Index just past the {...} opening at start, skipping nested strings and templates"""
+    depth = 0
+    i = start
+    while i < len(js):
+        c = js[i]
+        if c in "\"'`":
+            i = skip_js_string(js, i)
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+def skip_js_regex(js, start):
+    """Index just past the regex literal (and its flags) opening at start"""
+    i = start + 1
+    in_class = False
+    while i < len(js) and js[i] != "\n":
+        c = js[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            i += 1
+            while i < len(js) and (js[i].isalnum() or js[i] == "_"):
+                i += 1
+            return i
+        i += 1
+    return i
+
+def regex_allowed(out):
+    """Whether a "/" following the emitted output would start a regex literal"""
+    tail = "".join(out[-16:]).rstrip()
+    if not tail:
+        return True
+    if tail[-1] in JS_REGEX_PRECEDERS:
+        return True
+    word = re.search(r"[A-Za-z_$][\w$]*$", tail)
+    return bool(word and word.group(0) in JS_REGEX_KEYWORDS)
+
+def minify_js(js):
+    """Conservative JS minifier: strips comments and redundant whitespace, keeps ASI-relevant newlines"""
+    out = []
+    pending = None  # whitespace seen since the last token: None, " " or "\n"
+    i = 0
+    n = len(js)
+    while i < n:
+        c = js[i]
+        if c.isspace():
+            pending = "\n" if (c == "\n" or pending == "\n") else " "
+            i += 1
+            continue
+        if js.startswith("//", i):
+            end = js.find("\n", i)
+            i = n if end < 0 else end
+            continue
+        if js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            comment = js[i:] if end < 0 else js[i:end + 2]
+            pending = "\n" if ("\n" in comment or pending == "\n") else (pending or " ")
+            i = n if end < 0 else end + 2
+            continue
+
+        if c in "\"'`":
+            end = skip_js_string(js, i)
+        elif c == "/" and regex_allowed(out):
+            end = skip_js_regex(js, i)
+        else:
+            end = i + 1
+
+        if pending and out:
+            prev = out[-1][-1]
+            if pending == "\n":
+                if prev not in JS_NEWLINE_DROP_AFTER and c not in JS_NEWLINE_DROP_BEFORE:
+                    out.append("\n")
+            elif prev in "+-" and c == prev:
+                out.append(" ")
+            elif prev not in JS_PUNCTUATION and c not in JS_PUNCTUATION:
+                out.append(" ")
+            elif prev == "/" or c == "/":
+                out.append(" ")
+        pending = None
+        out.append(js[i:end])
+        i = end
+    return "".join(out)
+
+def split_css_rules(css):
+    """Top-level statements of minified CSS: rules, at-rule blocks and ;-terminated at-rules"""
+    rules = []
+    depth = 0
+    start = 0
+    i = 0
+    while i < len(css):
+        c = css[i]
+        if c in "\"'":
+            match = CSS_STRING.match(css, i)
+            i = match.end() if match else i + 1
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append(css[start:i + 1])
+                start = i + 1
+        elif c == ";" and depth == 0:
+            rules.append(css[start:i + 1])
+            start = i + 1
+        i += 1
+    if css[start:].strip():
+        rules.append(css[start:])
+    return rules
+
+def rule_selector(rule):
+    """Selector (or at-rule prelude) of a CSS statement"""
+    return rule.split("{", 1)[0]
+
+def common_leading_run(rules):
+    """(rules, names): the leading run of rules that saves the most bytes when
+    lifted out of the artifacts that all open with it
+
+    rules maps each artifact name to its top-level CSS statements. The run stops
+    at the first at-rule, and is empty when no two artifacts open alike.
+    """
+    best, best_saving, sharing = [], 0, []
+    for name, artifact_rules in rules.items():
+        lead = []
+        for rule in artifact_rules:
+            if rule.startswith("@"):
+                break
+            lead.append(rule)
+            names = [other for other, other_rules in rules.items() if other_rules[:len(lead)] == lead]
+            saving = len("".join(lead).encode("utf-8")) * (len(names) - 1)
+            if saving > best_saving:
+                best, best_saving, sharing = list(lead), saving, names
+    return best, sharing
+
+class AssetBundler:
+    """Builds minified widget parts and the shared stylesheet for one deployment"""
+
+    def __init__(self, lift_shared=True):
+        self.lift_shared = lift_shared
+        self.shared_css = ""
+        self.sharing = []
+        self.minified = {}
+        self.sizes = {}
+
+    def minify(self, parts):
+        """Minified copy of one artifact's parts"""
+        return HtmlParts(
+            markup=collapse_html(parts.markup),
+            css=minify_css(parts.css),
+            javascript=minify_js(parts.javascript)
+        )
+
+    def build(self, artifacts):
+        """Minify every artifact and lift the leading rules two or more share into shared_css
+
+        Only a run of rules that opens every sharing artifact, in the same order,
+        is lifted, and only those artifacts link the sheet (ahead of their own
+        styles), so no rule changes place in the cascade. Rules shared further
+        down an artifact stay inline.
+        """
+        bundled = {name: self.minify(parts) for name, parts in artifacts.items()}
+        self.minified = dict(bundled)
+        rules = {name: split_css_rules(parts.css) for name, parts in bundled.items()}
+
+        lifted, self.sharing = [], []
+        if self.lift_shared and len(bundled) > 1:
+            lifted, self.sharing = common_leading_run(rules)
+
+        self.shared_css = "".join(lifted)
+        for name, parts in bundled.items():
+            if name in self.sharing:
+                bundled[name] = parts._replace(css="".join(rules[name][len(lifted):]))
+            self.sizes[name] = {
+                "bytes_before": self.size(artifacts[name]),
+                "bytes_after": self.size(bundled[name])
+            }
+        return bundled
+
+    def link_shared(self, bundled, url):
+        """Widget parts whose markup links the shared stylesheet served at url
+
+        The <link> goes just before </head>, ahead of the <style> the widget's
+        own rules render into, and the browser finds it while parsing the
+        markup rather than after fetching the widget CSS, as with @import.
+        """
+        if not self.shared_css:
+            return bundled
+        link = f'<link rel="stylesheet" href="{escape(url)}">'
+        linked = dict(bundled)
+        for name in self.sharing:
+            markup = bundled[name].markup
+            head_end = markup.lower().rfind("</head>")
+            markup = markup[:head_end] + link + markup[head_end:] if head_end >= 0 else link + markup
+            linked[name] = bundled[name]._replace(markup=markup)
+        return linked
+
+    def unlift(self):
+        """Minified widget parts with their shared rules kept inline, for when the shared stylesheet is not live"""
+        self.shared_css = ""
+        self.sharing = []
+        for name, parts in self.minified.items():
+            self.sizes[name]["bytes_after"] = self.size(parts)
+        return dict(self.minified)
+
+    def bundle_page(self, name, html):
+        """Minify a standalone page document; pages keep all their styles inline"""
+        page = self.minify(split_html(html)).render()
+        self.sizes[name] = {
+            "bytes_before": len(html.encode("utf-8")),
+            "bytes_after": len(page.encode("utf-8"))
+        }
+        return page
+
+    @staticmethod
+    def size(parts):
+        """UTF-8 bytes across markup, CSS and JavaScript"""
+        return sum(len(part.encode("utf-8")) for part in parts)
+
+    def report(self):
+        """Bytes before/after per artifact, plus the shared stylesheet deployed once"""
+        before = sum(size["bytes_before"] for size in self.sizes.values())
+        after = sum(size["bytes_after"] for size in self.sizes.values()) + len(self.shared_css.encode("utf-8"))
+        return {
+            "artifacts": self.sizes,
+            "shared_stylesheet_bytes": len(self.shared_css.encode("utf-8")),
+            "shared_by": self.sharing,
+            "total_bytes_before": before,
+            "total_bytes_after": after
+        }
@@ -0,0 +1,338 @@
+"""
+Good Faith Exteriors - Local Wix REST API stand-in
+Serves the Blocks, Sites, Data, Backend and Media endpoints the deployment
+scripts call, plus the published pages and /api functions the post-launch
+probes hit, with configurable latency, injected errors and 429 rate limiting,
+so deployments can be run and timed offline
+"""
+
+import hashlib
+import random
+import threading
+import uuid
+from datetime import datetime
+
+from gfe_deploy.bulk_insert import BULK_INSERT_ENDPOINT
+from gfe_deploy.media_upload import RESUMABLE_UPLOAD_URL_ENDPOINT, UPLOAD_URL_ENDPOINT
+from gfe_deploy.stub_server import FaultInjector, FunctionStore, Route, StubServer, http_function_routes
+
+DEFAULT_BASE_URL = "https://www.wixapis.com"
+MEDIA_UPLOAD_PATH = "/_media/upload"
+
+class FakeWixState:
+    """Everything the fake API has been sent, keyed the way the real API returns it"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.blocks = {}
+        self.sites = {}
+        self.pages = {}
+        self.domains = {}
+        self.publishes = []
+        self.collections = {}
+        self.items = {}
+        self.functions = {}
+        self.indexes = {}
+        self.uploads = {}
+        self.media = {}
+
+    def create(self, store, body, **extra):
+        """Store a new resource under a fresh id and return it"""
+        resource = dict(body or {})
+        resource.update(extra)
+        resource["id"] = str(uuid.uuid4())
+        resource["createdDate"] = datetime.now().isoformat()
+        with self.lock:
+            store[resource["id"]] = resource
+        return resource
+
+    def update(self, store, resource_id, body):
+        """Replace a resource's fields; None when the id is unknown"""
+        with self.lock:
+            if resource_id not in store:
+                return None
+            store[resource_id].update(body or {})
+            store[resource_id]["updatedDate"] = datetime.now().isoformat()
+            return store[resource_id]
+
+    def snapshot(self):
+        """Resource counts, for asserting on what a deployment sent"""
+        with self.lock:
+            return {
+                "blocks": len(self.blocks),
+                "sites": len(self.sites),
+                "pages": len(self.pages),
+                "domains": len(self.domains),
+                "publishes": len(self.publishes),
+                "collections": len(self.collections),
+                "items": {collection: len(items) for collection, items in self.items.items()},
+                "functions": len(self.functions),
+                "indexes": sorted(self.indexes),
+                "media": len(self.media)
+            }
+
+def not_found(kind, resource_id):
+    """Wix-style 404 body for an unknown resource id"""
+    return 404, {"message": f"{kind} {resource_id} not found", "details": {"code": "NOT_FOUND"}}
+
+def site_scoped(request, name):
+    """Key for a per-site resource; Wix Data collections belong to the site in wix-site-id"""
+    site = request.headers.get("wix-site-id") if request.headers else None
+    return f"{site}/{name}" if site else name
+
+def fake_wix_routes(state, item_error_rate=0.0, seed=None):
+    """Routes for every endpoint the deployers call; item_error_rate rejects single bulk items"""
+    rng = random.Random(seed)
+
+    def create_block(request):
+        block = state.create(state.blocks, request.body)
+        block["url"] = f"https://blocks.wix.com/{block['id']}"
+        return 200, block
+
+    def update_block(request):
+        block = state.update(state.blocks, request.match["id"], request.body)
+        return (200, block) if block else not_found("Block", request.match["id"])
+
+    def update_site(request):
+        with state.lock:
+            site = state.sites.setdefault(request.match["site"], {"id": request.match["site"]})
+            site.update(request.body or {})
+        return 200, site
+
+    def create_page(request):
+        return 200, state.create(state.pages, request.body, siteId=request.match["site"])
+
+    def update_page(request):
+        page = state.update(state.pages, request.match["id"], request.body)
+        return (200, page) if page else not_found("Page", request.match["id"])
+
+    def create_domain(request):
+        return 200, state.create(state.domains, request.body, siteId=request.match["site"])
+
+    def publish(request):
+        with state.lock:
+            state.publishes.append({"siteId": request.match["site"], "date": datetime.now().isoformat()})
+        return 200, {"published": True}
+
+    def create_collection(request):
+        body = request.body or {}
+        # The complete deployer names collections by "id", the headless one by "name"
+        collection_id = body.get("id") or body.get("name")
+        if not collection_id:
+            return 400, {"message": "Collection id is required"}
+        key = site_scoped(request, collection_id)
+        with state.lock:
+            if key in state.collections:
+                return 409, {"message": f"Collection {collection_id} already exists",
+                             "details": {"code": "ALREADY_EXISTS"}}
+            state.collections[key] = body
+            state.items.setdefault(key, {})
+        return 200, {"collection": body}
+
+    def create_item(request):
+        collection_id = request.match["collection"]
+        key = site_scoped(request, collection_id)
+        item = dict((request.body or {}).get("dataItem", {}).get("data") or request.body or {})
+        item["_id"] = str(uuid.uuid4())
+        with state.lock:
+            state.items.setdefault(key, {})[item["_id"]] = item
+        return 200, {"dataItem": {"id": item["_id"], "dataCollectionId": collection_id, "data": item}}
+
+    def list_items(request):
+        with state.lock:
+            items = list(state.items.get(site_scoped(request, request.match["collection"]), {}).values())
+        return 200, {"dataItems": [{"id": item["_id"], "data": item} for item in items]}
+
+    def bulk_insert(request):
+        body = request.body or {}
+        collection_id = body.get("dataCollectionId")
+        key = site_scoped(request, collection_id)
+        results = []
+        for index, data_item in enumerate(body.get("dataItems") or []):
+            with state.lock:
+                rejected = item_error_rate and rng.random() < item_error_rate
+            if rejected:
+                results.append({"itemMetadata": {
+                    "originalIndex": index,
+                    "success": False,
+                    "error": {"code": "WDE0080", "description": "Injected item failure"}
+                }})
+                continue
+            item = dict(data_item.get("data") or {})
+            item["_id"] = str(uuid.uuid4())
+            with state.lock:
+                state.items.setdefault(key, {})[item["_id"]] = item
+            results.append({"itemMetadata": {"id": item["_id"], "originalIndex": index, "success": True}})
+        succeeded = sum(1 for result in results if result["itemMetadata"]["success"])
+        return 200, {
+            "results": results,
+            "bulkActionMetadata": {"totalSuccesses": succeeded, "totalFailures": len(results) - succeeded}
+        }
+
+    def create_index(request):
+        body = request.body or {}
+        index = body.get("index") or {}
+        key = site_scoped(request, f"{body.get('dataCollectionId')}.{index.get('name')}")
+        with state.lock:
+            if key in state.indexes:
+                return 409, {"message": f"Index {key} already exists", "details": {"code": "ALREADY_EXISTS"}}
+            state.indexes[key] = index
+        return 200, {"index": dict(index, status="ACTIVE")}
+
+    def create_upload_url(request):
+        body = request.body or {}
+        if not body.get("fileName") or not body.get("mimeType"):
+            return 400, {"message": "fileName and mimeType are required"}
+        token = uuid.uuid4().hex
+        with state.lock:
+            state.uploads[token] = {"metadata": body, "received": 0, "sha256": hashlib.sha256()}
+        result = {"uploadUrl": f"http://{request.headers.get('Host')}{MEDIA_UPLOAD_PATH}/{token}"}
+        if request.path == RESUMABLE_UPLOAD_URL_ENDPOINT:
+            result.update(uploadToken=token, uploadProtocol="TUS")
+        return 200, result
+
+    def receive_upload(request, upload):
+        """Hash the streamed body without holding it; returns the new offset"""
+        for chunk in request.stream:
+            upload["sha256"].update(chunk)
+            upload["received"] += len(chunk)
+        return upload["received"]
+
+    def finish_upload(token, upload):
+        expected = int(upload["metadata"].get("sizeInBytes") or upload["received"])
+        if upload["received"] != expected:
+            return 400, {"message": f"Received {upload['received']} of {expected} bytes"}
+        file_id = f"{token[:6]}_{upload['sha256'].hexdigest()[:32]}"
+        descriptor = {
+            "id": file_id,
+            "displayName": upload["metadata"]["fileName"],
+            "url": f"https://static.wixstatic.com/media/{file_id}",
+            "mimeType": upload["metadata"]["mimeType"],
+            "sizeInBytes": str(upload["received"]),
+            "hash": upload["sha256"].hexdigest(),
+            "parentFolderId": upload["metadata"].get("parentFolderId"),
+            "operationStatus": "READY"
+        }
+        with state.lock:
+            state.uploads.pop(token, None)
+            state.media[file_id] = descriptor
+        return 200, {"file": descriptor}
+
+    def put_upload(request):
+        token = request.match["token"]
+        upload = state.uploads.get(token)
+        if upload is None or upload["received"]:
+            return not_found("Upload", token)
+        receive_upload(request, upload)
+        return finish_upload(token, upload)
+
+    def patch_upload(request):
+        token = request.match["token"]
+        upload = state.uploads.get(token)
+        if upload is None:
+            return not_found("Upload", token)
+        if int(request.headers.get("Upload-Offset") or -1) != upload["received"]:
+            return 409, {"message": "Upload-Offset does not match"}, {"Upload-Offset": str(upload["received"])}
+        offset = receive_upload(request, upload)
+        if offset < int(upload["metadata"].get("sizeInBytes") or 0):
+            return 200, {"uploadOffset": offset}, {"Upload-Offset": str(offset)}
+        return finish_upload(token, upload)
+
+    def published_page(request):
+        url = "/" + request.match.get("slug", "")
+        with state.lock:
+            html = next((page.get("html") or "" for page in state.pages.values() if page.get("url") == url), None)
+        if html is None:
+            return not_found("Page", url)
+        return 200, html.encode("utf-8"), {"Content-Type": "text/html; charset=utf-8"}
+
+    def create_function(request):
+        return 200, state.create(state.functions, request.body)
+
+    def update_function(request):
+        function = state.update(state.functions, request.match["id"], request.body)
+        return (200, function) if function else not_found("Function", request.match["id"])
+
+    def delete_function(request):
+        with state.lock:
+            function = state.functions.pop(request.match["id"], None)
+        return (200, {}) if function else not_found("Function", request.match["id"])
+
+    return [
+        Route("POST", "/blocks/v1/blocks", create_block),
+        Route("PATCH", "/blocks/v1/blocks/{id}", update_block),
+        Route("PATCH", "/sites/v1/sites/{site}", update_site),
+        Route("POST", "/sites/v1/sites/{site}/pages", create_page),
+        Route("PATCH", "/sites/v1/sites/{site}/pages/{id}", update_page),
+        Route("POST", "/sites/v1/sites/{site}/domains", create_domain),
+        Route("POST", "/sites/v1/sites/{site}/publish", publish),
+        Route("POST", "/data/v1/collections", create_collection),
+        Route("POST", "/data/v1/collections/{collection}/items", create_item),
+        Route("GET", "/data/v1/collections/{collection}/items", list_items),
+        Route("POST", BULK_INSERT_ENDPOINT, bulk_insert),
+        Route("POST", "/wix-data/v2/indexes", create_index),
+        Route("POST", "/backend/v1/functions", create_function),
+        Route("PUT", "/backend/v1/functions/{id}", update_function),
+        Route("DELETE", "/backend/v1/functions/{id}", delete_function),
+        Route("POST", UPLOAD_URL_ENDPOINT, create_upload_url),
+        Route("POST", RESUMABLE_UPLOAD_URL_ENDPOINT, create_upload_url),
+        Route("PUT", MEDIA_UPLOAD_PATH + "/{token}", put_upload, raw=True),
+        Route("PATCH", MEDIA_UPLOAD_PATH + "/{token}", patch_upload, raw=True),
+        # The published site, for post-launch probes: deployed pages by URL and the /api functions
+        Route("GET", "/", published_page),
+        Route("GET", "/{slug}", published_page)
+    ] + http_function_routes(FunctionStore())
+
+class FakeWixServer(StubServer):
+    """StubServer preloaded with the Wix routes and its own FakeWixState"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None,
+                 item_error_rate=0.0, seed=None, port=0):
+        faults = FaultInjector(latency=latency, jitter=jitter, error_rate=error_rate,
+                               rate_limit=rate_limit, seed=seed)
+        self.state = FakeWixState()
+        super().__init__(fake_wix_routes(self.state, item_error_rate, seed), port=port, faults=faults)
+
+    def stats(self):
+        """What was deployed plus the faults served, for the deployment report"""
+        stats = self.state.snapshot()
+        stats.update(self.faults.stats())
+        stats["requests"] = self.requests_served
+        return stats
+
+def manifest_scope(site_id, base_url):
+    """Manifest key for a site; artifacts deployed to another API host are tracked separately"""
+    if base_url.rstrip("/") == DEFAULT_BASE_URL:
+        return site_id
+    return f"{site_id}@{base_url.rstrip('/')}"
+
+def add_fake_wix_arguments(parser):
+    """--base-url and the --fake-wix options shared by both deployment scripts"""
+    parser.add_argument(
+        "--base-url",
+        default=DEFAULT_BASE_URL,
+        help=f"Wix REST API base URL (default: {DEFAULT_BASE_URL})"
+    )
+    parser.add_argument(
+        "--fake-wix",
+        action="store_true",
+        help="Deploy against an in-process fake of the Wix REST API instead of --base-url"
+    )
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="Seconds added to every fake API call")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0, help="Fraction of fake API calls answered 503")
+    parser.add_argument("--fake-rate-limit", type=float, help="Fake API requests per second before it answers 429")
+    parser.add_argument("--fake-item-error-rate", type=float, default=0.0,
+                        help="Fraction of fake bulk-insert items rejected individually")
+    parser.add_argument("--fake-seed", type=int, help="Seed for reproducible fake API faults")
+
+def fake_wix_from_args(args):
+    """Started FakeWixServer when --fake-wix was given, else None"""
+    if not args.fake_wix:
+        return None
+    return FakeWixServer(
+        latency=args.fake_latency,
+        error_rate=args.fake_error_rate,
+        rate_limit=args.fake_rate_limit,
+        item_error_rate=args.fake_item_error_rate,
+        seed=args.fake_seed
+    ).start()
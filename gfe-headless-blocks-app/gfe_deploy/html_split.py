@@ -0,0 +1,135 @@
+"""
+Good Faith Exteriors - Single-pass HTML splitter
+Separates inline <style> and <script> bodies from widget markup in one scan,
+so block payloads carry markup, CSS and JavaScript once each
+"""
+
+from collections import namedtuple
+from html.parser import HTMLParser
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# <script type=...> values extracted as classic JavaScript; modules keep their
+# own scoping and defer semantics, so they stay in the markup like data blocks
+JS_SCRIPT_TYPES = {
+    "",
+    "text/javascript",
+    "application/javascript",
+    "application/ecmascript",
+    "text/ecmascript"
+}
+
+class HtmlParts(namedtuple("HtmlParts", ["markup", "css", "javascript"])):
+    """Markup with inline styles/scripts removed, plus the extracted CSS and JavaScript"""
+
+    __slots__ = ()
+
+    def render(self):
+        """Reassemble a standalone document: one <style> in head, one <script> before </body>"""
+        markup = self.markup
+        if self.css:
+            style = f"<style>\n{self.css}\n</style>\n"
+            head_end = markup.lower().rfind("</head>")
+            markup = markup[:head_end] + style + markup[head_end:] if head_end >= 0 else style + markup
+        if self.javascript:
+            script = f"<script>\n{self.javascript}\n</script>\n"
+            body_end = markup.lower().rfind("</body>")
+            markup = markup[:body_end] + script + markup[body_end:] if body_end >= 0 else markup + script
+        return markup
+
+class HtmlSplitter(HTMLParser):
+    """Incremental tokenizer: feed() chunks, then close() and read parts()"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.markup = []
+        self.css = []
+        self.javascript = []
+        # Where text currently goes: self.markup, or the style/script being captured
+        self.capture = None
+        self.capture_tag = None
+        self.style_media = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if self.capture is None and tag == "style":
+            self.capture, self.capture_tag = [], tag
+            media = (attributes.get("media") or "").strip()
+            self.style_media = media if media and media.lower() != "all" else None
+            return
+        if self.capture is None and tag == "script" and self.is_inline_js(attributes):
+            self.capture, self.capture_tag = [], tag
+            return
+        self.emit(self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        self.emit(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if self.capture is not None and tag == self.capture_tag:
+            body = "".join(self.capture).strip("\n")
+            if tag == "style":
+                if self.style_media:
+                    body = f"@media {self.style_media} {{\n{body}\n}}"
+                self.css.append(body)
+            else:
+                self.javascript.append(body)
+            self.capture = self.capture_tag = self.style_media = None
+            return
+        self.emit(f"</{tag}>")
+
+    def handle_data(self, data):
+        self.emit(data)
+
+    def handle_entityref(self, name):
+        self.emit(f"&{name};")
+
+    def handle_charref(self, name):
+        self.emit(f"&#{name};")
+
+    def handle_comment(self, data):
+        self.emit(f"<!--{data}-->")
+
+    def handle_decl(self, decl):
+        self.emit(f"<!{decl}>")
+
+    def handle_pi(self, data):
+        self.emit(f"<?{data}>")
+
+    def unknown_decl(self, data):
+        self.emit(f"<![{data}]>")
+
+    def emit(self, text):
+        """Append raw text to the markup, or to the style/script body being captured"""
+        (self.capture if self.capture is not None else self.markup).append(text)
+
+    @staticmethod
+    def is_inline_js(attributes):
+        """External scripts and data blocks (JSON-LD, templates) stay in the markup"""
+        if attributes.get("src"):
+            return False
+        return (attributes.get("type") or "").strip().lower() in JS_SCRIPT_TYPES
+
+    def parts(self):
+        """The split document; call after close()"""
+        return HtmlParts(
+            markup="".join(self.markup),
+            css="\n".join(self.css),
+            javascript="\n".join(self.javascript)
+        )
+
+def split_html(html_content):
+    """Split an HTML string into markup, CSS and JavaScript"""
+    splitter = HtmlSplitter()
+    splitter.feed(html_content)
+    splitter.close()
+    return splitter.parts()
+
+def split_html_file(path, encoding="utf-8"):
+    """Split an HTML file, streaming it through the tokenizer in fixed-size chunks"""
+    splitter = HtmlSplitter()
+    with open(path, 'r', encoding=encoding) as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), ""):
+            splitter.feed(chunk)
+    splitter.close()
+    return splitter.parts()
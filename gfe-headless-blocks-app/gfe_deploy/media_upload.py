@@ -0,0 +1,259 @@
+"""
+Good Faith Exteriors - Streaming media uploads
+Large widget and page assets (video backgrounds, 3D window previews) go to the
+Wix Media Manager without ever becoming Python strings or JSON: the metadata
+alone asks for an upload URL, then the file body is streamed from an mmap of
+the file, in one PUT or as fixed-size resumable parts, so peak memory stays
+flat whatever the asset size
+"""
+
+import hashlib
+import mimetypes
+import mmap
+import os
+import threading
+from urllib.parse import quote
+
+from gfe_deploy.steps import ApiCall, StreamUpload
+
+UPLOAD_URL_ENDPOINT = "/site-media/v1/files/generate-upload-url"
+RESUMABLE_UPLOAD_URL_ENDPOINT = "/site-media/v1/files/generate-resumable-upload-url"
+DEFAULT_MEDIA_DIR = "media"
+DEFAULT_MEDIA_FOLDER = "media-root"
+# Slice handed to the socket per write; a whole number of pages so released ranges stay aligned
+STREAM_CHUNK_SIZE = 256 * 1024
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+DEFAULT_RESUMABLE_THRESHOLD = 64 * 1024 * 1024
+UPLOAD_TIMEOUT = 300
+RESUMABLE_PROTOCOL_VERSION = "1.0.0"
+
+def page_multiple(size):
+    """size rounded down to whole memory pages, at least one page"""
+    return max(mmap.PAGESIZE, size // mmap.PAGESIZE * mmap.PAGESIZE)
+
+def media_type(path):
+    """MIME type for an upload, from the file extension"""
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+def media_files(directory):
+    """Paths of the files under directory, relative to it, skipping dotfiles"""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if not name.startswith("."))
+        for name in sorted(files):
+            if not name.startswith("."):
+                found.append(os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/"))
+    return found
+
+class MappedFile:
+    """Read-only view of a file to upload: an mmap, or the open handle where mmap is unavailable
+
+    Pages already streamed are dropped from the process with MADV_DONTNEED,
+    so resident memory covers one chunk rather than the whole file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.map = None
+        self.lock = threading.Lock()
+        if self.size:
+            try:
+                self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                self.map = None
+        if self.map is not None and hasattr(mmap, "MADV_SEQUENTIAL"):
+            self.map.madvise(mmap.MADV_SEQUENTIAL)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def body(self, start=0, length=None, chunk_size=STREAM_CHUNK_SIZE):
+        """Request body for length bytes from start (to the end of the file by default)"""
+        remaining = self.size - start
+        return FileBody(self, start, remaining if length is None else min(length, remaining), chunk_size)
+
+    def chunks(self, start, length, chunk_size=STREAM_CHUNK_SIZE):
+        """Consecutive slices of the range: zero-copy memoryviews of the mapping, or handle reads"""
+        chunk_size = page_multiple(chunk_size)
+        end = start + length
+        if self.map is None:
+            for offset in range(start, end, chunk_size):
+                with self.lock:
+                    self.file.seek(offset)
+                    chunk = self.file.read(min(chunk_size, end - offset))
+                yield chunk
+            return
+        view = memoryview(self.map)
+        try:
+            for offset in range(start, end, chunk_size):
+                yield view[offset:min(offset + chunk_size, end)]
+                # The consumer asked for the next slice, so this one has been sent
+                self.release(offset, min(chunk_size, end - offset))
+        finally:
+            view.release()
+
+    def release(self, offset, length):
+        """Unmap a streamed range from this process; the page cache keeps it for re-reads"""
+        if hasattr(mmap, "MADV_DONTNEED") and offset % mmap.PAGESIZE == 0:
+            try:
+                self.map.madvise(mmap.MADV_DONTNEED, offset, length)
+            except (OSError, ValueError):
+                pass
+
+    def digest(self):
+        """sha256 of the file, streamed through the same chunks"""
+        digest = hashlib.sha256()
+        for chunk in self.chunks(0, self.size):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def close(self):
+        """Unmap and close; a mapping still borrowed by an unsent slice is left to the garbage collector"""
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                pass
+            self.map = None
+        self.file.close()
+
+class FileBody:
+    """Length-aware, re-iterable request body over part of a MappedFile
+
+    requests sees __len__ and sends a Content-Length instead of chunked
+    encoding, a retry iterates it again from the start, and aiohttp and httpx
+    stream it through __aiter__.
+    """
+
+    def __init__(self, source, start, length, chunk_size=STREAM_CHUNK_SIZE):
+        self.source = source
+        self.start = start
+        self.length = length
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return self.source.chunks(self.start, self.length, self.chunk_size)
+
+    async def __aiter__(self):
+        for chunk in self.source.chunks(self.start, self.length, self.chunk_size):
+            yield chunk
+
+def file_digest(path):
+    """sha256 of a file without reading it into memory"""
+    with MappedFile(path) as mapped:
+        return mapped.digest()
+
+def upload_metadata(name, size, mime_type, folder=DEFAULT_MEDIA_FOLDER):
+    """JSON sent to ask for an upload URL; the file body never goes through JSON"""
+    return {
+        "mimeType": mime_type,
+        "fileName": name,
+        "sizeInBytes": str(size),
+        "parentFolderId": folder
+    }
+
+def uploaded_file(response):
+    """File descriptor from an upload answer, or None when the upload did not complete"""
+    if response is None or response.status_code not in (200, 201):
+        return None
+    try:
+        result = response.json()
+    except ValueError:
+        return None
+    return result.get("file") or None
+
+def upload_file_steps(path, name=None, folder=DEFAULT_MEDIA_FOLDER, part_size=DEFAULT_PART_SIZE,
+                      resumable_threshold=DEFAULT_RESUMABLE_THRESHOLD, chunk_size=STREAM_CHUNK_SIZE, log=None):
+    """Steps that upload one file to the Media Manager; returns its file descriptor, or None
+
+    Files up to resumable_threshold go in one PUT to the upload URL; larger
+    ones ask for a resumable upload URL and PATCH part_size parts, each
+    streamed straight from the mapping.
+    """
+    log = log or (lambda message, level="INFO": None)
+    name = name or os.path.basename(path)
+    mime_type = media_type(path)
+    with MappedFile(path) as mapped:
+        resumable = mapped.size > resumable_threshold
+        response = yield ApiCall(
+            "POST",
+            RESUMABLE_UPLOAD_URL_ENDPOINT if resumable else UPLOAD_URL_ENDPOINT,
+            upload_metadata(name, mapped.size, mime_type, folder)
+        )
+        upload_url = None
+        if response is not None and response.status_code in (200, 201):
+            try:
+                upload_url = response.json().get("uploadUrl")
+            except ValueError:
+                upload_url = None
+        if not upload_url:
+            log(f"⚠️ No upload URL for {name}", "WARNING")
+            return None
+
+        if not resumable:
+            body = mapped.body(chunk_size=chunk_size)
+            response = yield StreamUpload("PUT", f"{upload_url}?filename={quote(name)}", body, {
+                "Content-Type": mime_type,
+                "Content-Length": str(len(body))
+            })
+            return uploaded_file(response)
+
+        part_size = page_multiple(part_size)
+        parts = (mapped.size + part_size - 1) // part_size
+        for offset in range(0, mapped.size, part_size):
+            body = mapped.body(offset, part_size, chunk_size)
+            response = yield StreamUpload("PATCH", upload_url, body, {
+                "Content-Type": "application/offset+octet-stream",
+                "Content-Length": str(len(body)),
+                "Upload-Offset": str(offset),
+                "Tus-Resumable": RESUMABLE_PROTOCOL_VERSION
+            })
+            if response is None or response.status_code not in (200, 201, 204):
+                log(f"⚠️ Upload of {name} stopped at part {offset // part_size + 1}/{parts}", "WARNING")
+                return None
+        return uploaded_file(response)
+
+def deploy_media_steps(directory, manifest, force=False, folder=DEFAULT_MEDIA_FOLDER, log=None, **upload_options):
+    """Steps that upload every new or changed file under directory; returns {relative path: result}
+
+    Files are matched against the manifest by content hash, so unchanged
+    assets cost one streamed read and no request.
+    """
+    log = log or (lambda message, level="INFO": None)
+    names = media_files(directory) if os.path.isdir(directory) else []
+    if not names:
+        return {}
+    log(f"🎞️ Uploading {len(names)} media assets...")
+    results = yield [media_asset_steps(directory, name, manifest, force, folder, log, upload_options)
+                     for name in names]
+    uploaded = sum(1 for result in results if result["status"] == "success")
+    log(f"🎞️ Media assets: {uploaded}/{len(names)} uploaded or unchanged")
+    return dict(zip(names, results))
+
+def media_asset_steps(directory, name, manifest, force, folder, log, upload_options):
+    """Upload one media file unless the manifest has the same content"""
+    path = os.path.join(directory, name)
+    digest = file_digest(path)
+    size = os.path.getsize(path)
+    entry = manifest.lookup("media", name)
+    if not force and manifest.is_unchanged("media", name, digest):
+        log(f"⏭️ Media unchanged: {name}")
+        return {"status": "success", "action": "unchanged", "file_id": entry["remote_id"],
+                "url": entry.get("url", ""), "bytes": size}
+
+    descriptor = yield from upload_file_steps(path, os.path.basename(name), folder, log=log, **upload_options)
+    if descriptor is None:
+        log(f"⚠️ Media upload failed: {name}", "WARNING")
+        return {"status": "error", "bytes": size}
+    manifest.record("media", name, digest, descriptor.get("id"), url=descriptor.get("url", ""))
+    log(f"✅ Media uploaded: {name} ({size:,} bytes)")
+    return {"status": "success", "action": "uploaded", "file_id": descriptor.get("id"),
+            "url": descriptor.get("url", ""), "bytes": size}
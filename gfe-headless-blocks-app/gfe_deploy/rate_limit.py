@@ -0,0 +1,143 @@
+"""
+Good Faith Exteriors - Adaptive token-bucket rate limiter for Wix API calls
+Paces outbound requests and slows down when the API pushes back
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+DEFAULT_RATE = 5.0
+DEFAULT_MAX_RATE = 50.0
+DEFAULT_BURST = 10
+DEFAULT_TARGET_LATENCY = 1.0
+MIN_RATE = 0.5
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class AdaptiveRateLimiter:
+    """Token bucket whose refill rate follows observed latency and throttling"""
+
+    def __init__(self, rate=DEFAULT_RATE, max_rate=DEFAULT_MAX_RATE, burst=DEFAULT_BURST,
+                 target_latency=DEFAULT_TARGET_LATENCY):
+        self.rate = float(rate)
+        self.max_rate = max(float(max_rate), self.rate)
+        self.burst = burst
+        self.target_latency = target_latency
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.latency_ewma = None
+        self.lock = threading.Lock()
+        self.throttled = 0
+        self.waited_seconds = 0.0
+
+    def refill(self, now):
+        """Add tokens for the time elapsed since the last refill; none accrue while paused"""
+        if now < self.paused_until:
+            self.updated = now
+            return
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Take a token if one is free; otherwise return the seconds to wait before retrying"""
+        with self.lock:
+            now = time.monotonic()
+            self.refill(now)
+            if now >= self.paused_until and self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            self.waited_seconds += wait
+            return wait
+
+    def acquire(self):
+        """Block until a token is available and any Retry-After pause has passed"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def record(self, latency, status_code=None):
+        """Feed back one response: additive increase, multiplicative decrease"""
+        with self.lock:
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+
+            if status_code in RETRY_STATUSES:
+                self.throttled += 1
+                self.rate = max(MIN_RATE, self.rate * 0.5)
+            elif self.latency_ewma > self.target_latency:
+                self.rate = max(MIN_RATE, self.rate * 0.9)
+            else:
+                self.rate = min(self.max_rate, self.rate + 0.5)
+
+    def pause(self, seconds):
+        """Hold every caller until the server's Retry-After window has passed"""
+        with self.lock:
+            self.tokens = 0
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def stats(self):
+        """Current pacing state for the deployment report"""
+        with self.lock:
+            return {
+                "current_rate": round(self.rate, 2),
+                "latency_ewma_seconds": round(self.latency_ewma or 0, 3),
+                "throttled_responses": self.throttled,
+                "waited_seconds": round(self.waited_seconds, 3)
+            }
+
+class HostRateLimiters:
+    """One AdaptiveRateLimiter per host, shared by every session handed this registry
+
+    A fleet gives the same registry to all its sites, so calls to one host are
+    paced, and paused on Retry-After, as a whole rather than once per site.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, max_rate=DEFAULT_MAX_RATE):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def for_url(self, url):
+        """Rate limiter shared by every call to the URL's host"""
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.limiters:
+                self.limiters[host] = AdaptiveRateLimiter(rate=self.rate, max_rate=self.max_rate)
+            return self.limiters[host]
+
+    def stats(self):
+        """Pacing state per host"""
+        with self.lock:
+            limiters = dict(self.limiters)
+        return {host: limiter.stats() for host, limiter in limiters.items()}
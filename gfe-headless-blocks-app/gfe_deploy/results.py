@@ -0,0 +1,139 @@
+"""
+Good Faith Exteriors - Bounded deployment results
+Size-capped, deduplicated error records and a ring-buffer deployment log that
+spills older lines to disk, so reports stay small even for failing runs
+"""
+
+import hashlib
+import re
+import threading
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlsplit
+
+MAX_BODY_CHARS = 300
+DEFAULT_MAX_ERRORS = 200
+DEFAULT_LOG_CAPACITY = 500
+
+HTML_TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+HTML_TAG = re.compile(r"<[^>]+>")
+WHITESPACE = re.compile(r"\s+")
+
+def summarize_body(body, limit=MAX_BODY_CHARS):
+    """Short, single-line form of a response body; HTML error pages shrink to their title"""
+    if not body:
+        return ""
+    text = str(body)
+    if "<html" in text[:500].lower():
+        title = HTML_TITLE.search(text)
+        text = f"HTML page: {title.group(1)}" if title else HTML_TAG.sub(" ", text)
+    text = WHITESPACE.sub(" ", text).strip()
+    return text if len(text) <= limit else text[:limit] + "…"
+
+def response_endpoint(response):
+    """"METHOD /path" of the request behind a response"""
+    request = getattr(response, "request", None)
+    method = getattr(request, "method", None) or "?"
+    return f"{method} {urlsplit(getattr(response, 'url', '') or '').path}"
+
+class ErrorLog:
+    """Deduplicated error records keyed by a hash of status, endpoint and full body"""
+
+    def __init__(self, max_records=DEFAULT_MAX_ERRORS):
+        self.max_records = max_records
+        self.records = {}
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def record(self, message, status=None, endpoint=None, body=None):
+        """Add an error, or bump the count of an identical one; returns the record"""
+        digest = hashlib.sha1(f"{message}|{status}|{endpoint}|{body}".encode("utf-8")).hexdigest()[:12]
+        now = datetime.now().isoformat()
+        with self.lock:
+            existing = self.records.get(digest)
+            if existing:
+                existing["count"] += 1
+                existing["last_seen"] = now
+                return existing
+            entry = {
+                "id": digest,
+                "message": message,
+                "status": status,
+                "endpoint": endpoint,
+                "body": summarize_body(body),
+                "count": 1,
+                "first_seen": now,
+                "last_seen": now
+            }
+            if len(self.records) >= self.max_records:
+                self.dropped += 1
+            else:
+                self.records[digest] = entry
+            return entry
+
+    def total(self):
+        """Occurrences recorded, including duplicates and records past the cap"""
+        with self.lock:
+            return sum(entry["count"] for entry in self.records.values()) + self.dropped
+
+    def to_list(self):
+        """Records for the results file, most frequent first"""
+        with self.lock:
+            return sorted(self.records.values(), key=lambda entry: -entry["count"])
+
+class LogBuffer:
+    """Keeps the newest log lines in memory and appends evicted ones to a spill file"""
+
+    def __init__(self, capacity=DEFAULT_LOG_CAPACITY, spill_path=None):
+        self.lines = deque(maxlen=capacity)
+        self.spill_path = spill_path
+        self.spill_file = None
+        self.spill_opened = False
+        self.spilled = 0
+        self.lock = threading.Lock()
+
+    def append(self, line):
+        """Add a line, spilling the oldest one once the buffer is full"""
+        with self.lock:
+            if len(self.lines) == self.lines.maxlen:
+                self.spill(self.lines[0])
+            self.lines.append(line)
+
+    def spill(self, line):
+        """Write an evicted line to disk, opening the spill file on first use"""
+        self.spilled += 1
+        if not self.spill_path:
+            return
+        if self.spill_file is None:
+            # Truncate on this run's first spill, append if reopened after close()
+            self.spill_file = open(self.spill_path, 'a' if self.spill_opened else 'w', encoding='utf-8')
+            self.spill_opened = True
+        self.spill_file.write(line + "\n")
+
+    def entries(self):
+        """Lines still held in memory, oldest first"""
+        with self.lock:
+            return list(self.lines)
+
+    def summary(self):
+        """How much of the log lives on disk rather than in the report"""
+        with self.lock:
+            return {
+                "in_memory": len(self.lines),
+                "spilled": self.spilled,
+                "spill_file": self.spill_path if self.spilled and self.spill_path else None
+            }
+
+    def close(self):
+        """Flush and close the spill file"""
+        with self.lock:
+            if self.spill_file:
+                self.spill_file.close()
+                self.spill_file = None
+
+    def __iter__(self):
+        return iter(self.entries())
+
+    def __len__(self):
+        with self.lock:
+            return len(self.lines)
@@ -0,0 +1,227 @@
+"""
+Good Faith Exteriors - Structured deployment logging
+Leveled JSON lines with monotonic timestamps, handed to a QueueListener thread
+so deploy workers only ever enqueue a record; sinks are stdout and an optional
+rotating file, with the emoji "[HH:MM:SS] LEVEL: message" lines kept as the
+human renderer
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from gfe_deploy.tracing import CURRENT_SPAN
+
+LOG_FORMATS = ("human", "json")
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+DEFAULT_LOG_FORMAT = "human"
+DEFAULT_LOG_LEVEL = "INFO"
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUPS = 5
+LOGGER_NAME = "gfe_deploy"
+# Longest flush() waits for the listener before giving up
+FLUSH_TIMEOUT = 10.0
+
+# Origin of the "mono" field: seconds on the monotonic clock since this module loaded
+MONOTONIC_ORIGIN_NS = time.perf_counter_ns()
+
+def level_number(level):
+    """logging level number for a level name such as "WARNING"; unknown names count as INFO"""
+    number = logging.getLevelName(str(level).upper())
+    return number if isinstance(number, int) else logging.INFO
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per record: wall time, monotonic offset, level, message and fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="microseconds"),
+            "mono": round((record.mono_ns - MONOTONIC_ORIGIN_NS) / 1e9, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        entry.update(record.fields)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class HumanFormatter(logging.Formatter):
+    """The original "[HH:MM:SS] LEVEL: message" lines, prefixed with the site in fleet runs"""
+
+    def format(self, record):
+        timestamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        message = record.getMessage()
+        site = record.fields.get("site")
+        if site:
+            message = f"[{site}] {message}"
+        return f"[{timestamp}] {record.levelname}: {message}"
+
+class BufferHandler(logging.Handler):
+    """Appends human-rendered lines to the LogBuffer a record was logged with, on the listener thread"""
+
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(HumanFormatter())
+
+    def emit(self, record):
+        if record.buffer is not None:
+            record.buffer.append(self.format(record))
+
+class RecordQueueHandler(QueueHandler):
+    """QueueHandler that enqueues records as built
+
+    DeployLog records already carry their final message and no args or
+    exc_info, so the stock prepare() (format plus a copy) is pure overhead
+    on the logging thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+class FlushingQueueListener(QueueListener):
+    """QueueListener that sets any threading.Event it dequeues, marking a flush point"""
+
+    def handle(self, record):
+        if isinstance(record, threading.Event):
+            record.set()
+            return
+        super().handle(record)
+
+class LogBackend:
+    """A QueueHandler in front of the sinks; one QueueListener thread formats and writes every record
+
+    The queue is unbounded, so logging never blocks a deploy worker on I/O.
+    Once closed, records are written on the caller's thread instead of queued.
+    """
+
+    def __init__(self, handlers=(), level=DEFAULT_LOG_LEVEL):
+        self.level = level_number(level)
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = RecordQueueHandler(self.queue)
+        self.handlers = list(handlers) + [BufferHandler()]
+        self.listener = FlushingQueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        self.lock = threading.Lock()
+        atexit.register(self.close)
+
+    def handle(self, record):
+        """Enqueue a record for the listener, or write it straight away once the backend is closed"""
+        with self.lock:
+            if self.listener is not None:
+                self.queue_handler.emit(record)
+                return
+        self.write(record)
+
+    def write(self, record):
+        """Hand one record to every sink whose level it meets, as the listener does"""
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Wait until every record enqueued so far has been written; False if timeout passed first
+
+        The flush marker is enqueued under the lock close() takes, so it is
+        always ahead of the listener's stop sentinel and gets set.
+        """
+        with self.lock:
+            if self.listener is None:
+                return True
+            written = threading.Event()
+            self.queue.put(written)
+        return written.wait(timeout)
+
+    def close(self):
+        """Drain the queue, stop the listener and close the sinks; safe to call twice"""
+        with self.lock:
+            if self.listener is None:
+                return
+            self.listener.stop()
+            self.listener = None
+        for handler in self.handlers:
+            handler.close()
+
+def stream_sink(log_format=DEFAULT_LOG_FORMAT, stream=None):
+    """stdout sink rendering records as human lines or JSON lines"""
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonLineFormatter() if log_format == "json" else HumanFormatter())
+    return handler
+
+def rotating_file_sink(path, max_bytes=DEFAULT_LOG_MAX_BYTES, backups=DEFAULT_LOG_BACKUPS):
+    """JSON-lines file rolled over at max_bytes, keeping backups old files"""
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+    handler.setFormatter(JsonLineFormatter())
+    return handler
+
+default_backend_lock = threading.Lock()
+default_backend_instance = None
+
+def default_backend():
+    """Process-wide human stdout backend for deployers constructed without one"""
+    global default_backend_instance
+    with default_backend_lock:
+        if default_backend_instance is None:
+            default_backend_instance = LogBackend([stream_sink()])
+        return default_backend_instance
+
+class DeployLog:
+    """The log(message, level="INFO") callback the deployers and gfe_deploy helpers take
+
+    Fields bound here (site, ...) and the active trace span are attached to
+    every record; buffer, if given, also receives the rendered line.
+    """
+
+    def __init__(self, backend=None, buffer=None, name=LOGGER_NAME, **fields):
+        self.backend = backend or default_backend()
+        self.buffer = buffer
+        self.name = name
+        self.fields = {key: value for key, value in fields.items() if value is not None}
+
+    def __call__(self, message, level="INFO", **fields):
+        number = level_number(level)
+        if number < self.backend.level:
+            return
+        record = logging.LogRecord(self.name, number, "", 0, message, None, None)
+        record.mono_ns = time.perf_counter_ns()
+        record.buffer = self.buffer
+        record.fields = dict(self.fields, **fields) if fields else self.fields
+        span = CURRENT_SPAN.get()
+        if span is not None:
+            record.fields = dict(record.fields, trace_id=span.tracer.trace_id, span_id=span.span_id)
+        self.backend.handle(record)
+
+    def bind(self, buffer=None, **fields):
+        """Child log with extra fields and, optionally, its own buffer"""
+        return DeployLog(self.backend, buffer, self.name, **dict(self.fields, **fields))
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Wait for everything logged so far to reach the sinks and buffer; False on timeout"""
+        return self.backend.flush(timeout)
+
+def add_logging_arguments(parser):
+    """--log-format, --log-file and friends, shared by both deployment scripts"""
+    parser.add_argument(
+        "--log-format",
+        choices=LOG_FORMATS,
+        default=DEFAULT_LOG_FORMAT,
+        help=f"stdout rendering: emoji lines or JSON lines (default: {DEFAULT_LOG_FORMAT})"
+    )
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default=DEFAULT_LOG_LEVEL,
+                        help=f"Lowest level logged (default: {DEFAULT_LOG_LEVEL})")
+    parser.add_argument("--log-file", help="Also write JSON lines to this file, rotated by size")
+    parser.add_argument("--log-max-bytes", type=int, default=DEFAULT_LOG_MAX_BYTES,
+                        help=f"Rotate --log-file at this size (default: {DEFAULT_LOG_MAX_BYTES})")
+    parser.add_argument("--log-backups", type=int, default=DEFAULT_LOG_BACKUPS,
+                        help=f"Rotated --log-file copies kept (default: {DEFAULT_LOG_BACKUPS})")
+
+def log_backend_from_args(args):
+    """Started LogBackend with the sinks the command line asked for"""
+    sinks = [stream_sink(args.log_format)]
+    if args.log_file:
+        sinks.append(rotating_file_sink(args.log_file, args.log_max_bytes, args.log_backups))
+    return LogBackend(sinks, level=args.log_level)